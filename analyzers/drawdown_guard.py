@@ -0,0 +1,28 @@
+from collections import OrderedDict
+import backtrader as bt
+
+
+class DrawdownGuard(bt.Analyzer):
+    '''
+    Stops the run once the drawdown of the broker value passes max_drawdown (percent of the peak value),
+    so that searches don't spend the rest of the history on a run that is already known to be bad.
+    The analysis tells whether the run was stopped, when, and the max drawdown until then.
+    '''
+
+    params = (
+        ('max_drawdown', 20.0),
+    )
+
+    def create_analysis(self):
+        self.rets = OrderedDict(stopped=False, datetime=None, max_drawdown=0.0)
+        self._peak = None
+
+    def next(self):
+        value = self.strategy.broker.getvalue()
+        self._peak = value if self._peak is None else max(self._peak, value)
+        drawdown = (self._peak - value) / self._peak * 100 if self._peak > 0 else 0.0
+        self.rets['max_drawdown'] = max(self.rets['max_drawdown'], drawdown)
+        if drawdown > self.p.max_drawdown and not self.rets['stopped']:
+            self.rets['stopped'] = True
+            self.rets['datetime'] = self.strategy.datetime.datetime(0)
+            self.strategy.env.runstop()
@@ -0,0 +1,14 @@
+from collections import OrderedDict
+import backtrader as bt
+
+
+class EquityCurve(bt.Analyzer):
+    '''
+    Records the value of the broker at the end of every bar, keyed by the bar's datetime.
+    '''
+
+    def create_analysis(self):
+        self.rets = OrderedDict()
+
+    def next(self):
+        self.rets[self.strategy.datetime.datetime(0)] = self.strategy.broker.getvalue()
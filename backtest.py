@@ -1,66 +1,47 @@
-from backtrader.dataseries import TimeFrame
-from utils.backtrader_helpers import print_trades_length
-from analyzers.exposer import Exposer
+from analyzers.basic_trade_stats import BasicTradeStats
 from strategies.candle_pattern_long import CandlePatternLong
 import backtrader as bt
 from datetime import datetime
-from analyzers.basic_trade_stats import BasicTradeStats
-from backtrader.analyzers.tradeanalyzer import TradeAnalyzer
-import globals as gb
-import strategies
 from logger import *
 from charts.plotter import PlotlyPlotter
-from database.data_loader import DataLoader, StaticLoader
-from utils import utils
-import os
+from database.data_loader import StaticLoader
+from runners.session import BacktestSession
+from runners.sharded import ShardedBacktest
+from runners.results import RunResult, summarize
+from runners.result_cache import ResultCache
+
+SHARD_WORKERS = 0  # run the universe in shards over this number of processes (see ShardedBacktest), 0 runs a single cerebro
+PER_SYMBOL_CAPITAL = False  # when sharding - run every symbol on its own independent capital
+START_DATE, END_DATE = datetime(2016,11,30), datetime(2021, 4, 26)
+CASH = 10000.0
+USE_RESULT_CACHE = False  # skip runs that were already done (same strategy code, params, dates, cash and data files) - no strategies to plot then
 
 
 def main():
-    utils.clean_previous_output()
-    global cerebro
-    cerebro = gb.cerebro
-    add_strategies(CandlePatternLong)
     stock_for_testing = ['ABC.csv',   'BAC.csv',   'CDW.csv',   'CVX.csv',   'GD.csv',    'GPN.csv',   'IP.csv',    'JNJ.csv',   'LDOS.csv',  'MNST.csv',  'NKE.csv',   'OKE.csv', 'PNW.csv',   'RE.csv',    'STE.csv',   'UDR.csv',   'WELL.csv',  '^GSPC.csv', 'ADSK.csv',  'BR.csv','CNP.csv','EBAY.csv','GNRC.csv','HPQ.csv','JCI.csv','JNPR.csv', 'LNC.csv','MRO.csv', 'NVDA.csv', 'ORLY.csv', 'PVH.csv','SEE.csv','SWK.csv', 'VLO.csv',   'WHR.csv', 'ANSS.csv',  'CB.csv','CTAS.csv','EXR.csv','GOOG.csv', 'IFF.csv','JKHY.csv', 'JPM.csv','MCHP.csv','NFLX.csv','ODFL.csv', 'PKG.csv','PWR.csv','SNA.csv','TXT.csv', 'VRTX.csv',  'ZTS.csv']
-    load_data(StaticLoader(cerebro), limit=0, random=False, start_date=datetime(2016,11,30), end_date=datetime(2021, 4, 26), dirpath='data_feeds', stock_names=stock_for_testing)
+    if SHARD_WORKERS:
+        result = ShardedBacktest(CandlePatternLong, start_date=START_DATE, end_date=END_DATE, cash=CASH, analyzers=[(BasicTradeStats, dict(_name='basic_trade_stats', useStandardPrint=False))],
+                                 result_cache=ResultCache() if USE_RESULT_CACHE else None) \
+            .run(stock_for_testing, workers=SHARD_WORKERS, per_symbol=PER_SYMBOL_CAPITAL)
+        show_result_statistics(result)
+        return
+    session = BacktestSession(cash=CASH)
+    session.clean_output()
+    session.add_strategy(CandlePatternLong)
+    session.load_data(StaticLoader, limit=0, random=False, start_date=START_DATE, end_date=END_DATE, dirpath='data_feeds', stock_names=stock_for_testing)
     # disk_data = bt.feeds.GenericCSVData(dataname='data_feeds/NVDA.csv', fromdate=datetime(2018, 9, 1), todate=datetime(2019,4,26), dtformat='%Y-%m-%d', high=1, low=2, open=3, close=4, volume=5)
-    # cerebro.adddata(disk_data, name=disk_data._name)
-    # add_analyzers()
-    # add_observers()
+    # session.cerebro.adddata(disk_data, name=disk_data._name)
+    # session.add_analyzers()
+    # session.add_observers()
+    if USE_RESULT_CACHE:  # strategies are not available for plotting - turn off to plot
+        show_result_statistics(session.run_cached(ResultCache()))
+        return session
     global strategies
-    strategies = backtest()
+    strategies = session.run()
     pass
-    # show_statistics(strategies)
-    # cerebro.plot(plotter=PlotlyPlotter(trades_only=True))
-
-
-def add_strategies(strategy: bt.Strategy):
-    loginfo(f'backtesting strategy {strategy.__class__.__name__}')
-    cerebro.addstrategy(strategy)
-
-def load_data(data_loader : DataLoader, **kwargs):
-    data_loader.load_feeds(**kwargs)
-    
-
-def add_analyzers():
-    cerebro.addanalyzer(BasicTradeStats, _name='basic_trade_stats', useStandardPrint=False)
-    cerebro.addanalyzer(TradeAnalyzer)
-    cerebro.addanalyzer(Exposer)
-    cerebro.addanalyzer(bt.analyzers.DrawDown)
-    cerebro.addanalyzer(bt.analyzers.SQN)
-    cerebro.addanalyzer(bt.analyzers.SharpeRatio)
-    cerebro.addanalyzer(bt.analyzers.SharpeRatio_A)
-
-def add_observers():
-    cerebro.addobserver(bt.observers.DrawDown)
-    cerebro.addobserver(bt.observers.LogReturns, timeframe=TimeFrame.Months, compression=0)
-
-
-def backtest():
-    cerebro.broker.setcash(10000.0)
-    cerebro.broker.set_shortcash(False)
-    loginfo(f'Strating portfolio value: {cerebro.broker.getvalue():.2f}')
-    strategies = cerebro.run()
-    return strategies
+    # session.show_statistics()
+    # session.cerebro.plot(plotter=PlotlyPlotter(trades_only=True))
+    return session
 
 
 #TODO cleanup
@@ -68,21 +49,11 @@ def plot(strategy: bt.Strategy, *args, **kwargs):
     strategy.plot(*args, **kwargs)
 
 
-def show_statistics(strategies):
-    loginfo(f'Final portfolio value: {cerebro.broker.getvalue():.2f}')
-    strategies[0].analyzers.basic_trade_stats.print()
-    print_trades_length(strategies[0].analyzers.tradeanalyzer)
-    strategies[0].analyzers.exposer.print()
-    '''
-    strategies[0].analyzers.tradeanalyzer.print()
-    strategies[0].analyzers.drawdown.print()
-    strategies[0].analyzers.sqn.print()
-    strategies[0].analyzers.sharperatio.print()
-    strategies[0].analyzers.sharperatio_a.print()
-    '''
+def show_result_statistics(result: RunResult):
+    summary = summarize(result)
+    loginfo(f'Final portfolio value: {summary["final_value"]:.2f} ({summary["return_percent"]:.2f}%), max drawdown: {summary["max_drawdown_percent"]:.2f}%')
+    loginfo(f'Trades: {summary["trades"]}')
 
 
 if __name__ == '__main__':
     main()
-
-
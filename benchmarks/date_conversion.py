@@ -0,0 +1,42 @@
+'''
+Compares the per-element num2date conversion to the vectorized num2datetime64,
+as done by feed_to_dataframe and extract_line_data_datetime, on daily feeds of 5k and 100k bars.
+Run from the repository root: python -m benchmarks.date_conversion
+'''
+import timeit
+from zoneinfo import ZoneInfo
+import numpy as np
+import pandas as pd
+from backtrader import num2date, date2num
+from utils.date_utils import num2datetime64
+
+SIZES = [5000, 100000]
+REPEATS = 5
+TZ = ZoneInfo('US/Eastern')
+
+
+def per_element(nums, tz=None):
+    ''' The conversion feed_to_dataframe used to do '''
+    index = pd.Index(nums).map(lambda timestamp: num2date(timestamp, tz))
+    index = index.map(lambda datetime: datetime.date())
+    return pd.to_datetime(index)
+
+
+def vectorized(nums, tz=None):
+    return pd.to_datetime(num2datetime64(nums, tz).astype('datetime64[D]'))
+
+
+def daily_dates(size) -> np.ndarray:
+    first = date2num(pd.Timestamp('1900-01-01').to_pydatetime())
+    return first + np.arange(size, dtype=np.float64) + 0.99999988  # end of session, like the csv feeds
+
+
+if __name__ == '__main__':
+    print(f'{"bars":>8} {"tz":>11} {"per element [s]":>16} {"vectorized [s]":>15} {"speedup":>8}')
+    for size in SIZES:
+        nums = daily_dates(size)
+        for tz in [None, TZ]:
+            assert per_element(nums, tz).equals(vectorized(nums, tz))
+            slow = min(timeit.repeat(lambda: per_element(nums, tz), number=1, repeat=REPEATS))
+            fast = min(timeit.repeat(lambda: vectorized(nums, tz), number=1, repeat=REPEATS))
+            print(f'{size:>8} {str(tz):>11} {slow:>16.4f} {fast:>15.4f} {slow / fast:>7.0f}x')
@@ -0,0 +1,59 @@
+'''
+Time per combination of a parameter sweep over 50 symbols, when every combination reads the csv files
+(a BacktestSession fed by StaticLoader without the cache) and when it runs on the feeds the sweep preloaded once
+(ParameterSweep). The time of the whole grid is extrapolated from it.
+Run from the repository root: python -m benchmarks.parameter_sweep
+'''
+import os
+import time
+from datetime import datetime
+import backtrader as bt
+from database.data_loader import StaticLoader
+from runners.optimizer import ParameterSweep, grid
+from runners.session import BacktestSession
+
+DIRPATH = os.path.abspath('data_feeds')
+SYMBOLS = 50
+START_DATE, END_DATE = datetime(2016, 11, 30), datetime(2021, 4, 26)
+GRID = grid(fast=[5, 10, 15, 20], slow=[30, 50])
+GRID_SIZE = 1000
+
+
+class SmaCross(bt.Strategy):
+    params = dict(fast=10, slow=30)
+
+    def __init__(self):
+        self.crosses = [bt.ind.CrossOver(bt.ind.SMA(data, period=self.p.fast), bt.ind.SMA(data, period=self.p.slow)) for data in self.datas]
+
+    def next(self):
+        for data, cross in zip(self.datas, self.crosses):
+            if cross > 0:
+                self.buy(data, size=1)
+            elif cross < 0:
+                self.close(data)
+
+
+def reloading(stocks, params):
+    session = BacktestSession()
+    session.load_data(StaticLoader, start_date=START_DATE, end_date=END_DATE, dirpath=DIRPATH, stock_names=stocks, use_cache=False)
+    session.add_strategy(SmaCross, **params)
+    session.run()
+
+
+if __name__ == '__main__':
+    stocks = sorted(f for f in os.listdir(DIRPATH) if f.endswith('.csv'))[:SYMBOLS]
+    start = time.perf_counter()
+    for params in GRID:
+        reloading(stocks, params)
+    slow = (time.perf_counter() - start) / len(GRID)
+    start = time.perf_counter()
+    sweep = ParameterSweep(SmaCross, START_DATE, END_DATE, dirpath=DIRPATH).load(stocks)
+    loaded = time.perf_counter() - start
+    start = time.perf_counter()
+    list(sweep.run(GRID, workers=1))
+    fast = (time.perf_counter() - start) / len(GRID)
+    workers = os.cpu_count()
+    print(f'{len(stocks)} symbols, {len(GRID)} combinations, universe loaded once in {loaded:.2f}s')
+    print(f'{"":>22} {"per combination [s]":>20} {f"{GRID_SIZE} grid on {workers} cpus [min]":>26}')
+    print(f'{"reading the csv files":>22} {slow:>20.3f} {slow * GRID_SIZE / workers / 60:>26.1f}')
+    print(f'{"preloaded feeds":>22} {fast:>20.3f} {(loaded + fast * GRID_SIZE / workers) / 60:>26.1f}')
@@ -0,0 +1,36 @@
+'''
+Runs CandlePatternLong on the whole data_feeds universe with its states visited on every bar and with the
+event-driven dispatch (see TradeState.wake_up), and compares the results, the number of state visits and the time.
+Run from the repository root: python -m benchmarks.state_dispatch
+'''
+import os
+import time
+from datetime import datetime
+from database.data_loader import StaticLoader
+from runners.results import summarize
+from runners.session import BacktestSession
+from strategies.candle_pattern_long import CandlePatternLong
+
+DIRPATH = os.path.abspath('data_feeds')
+START_DATE, END_DATE = datetime(2016, 11, 30), datetime(2021, 4, 26)
+
+
+def run(event_driven: bool):
+    CandlePatternLong.event_driven = event_driven
+    session = BacktestSession()
+    session.load_data(StaticLoader, start_date=START_DATE, end_date=END_DATE, dirpath=DIRPATH, use_cache=True)
+    session.add_strategy(CandlePatternLong)
+    start = time.perf_counter()
+    strategy = session.run()[0]
+    return time.perf_counter() - start, strategy.scheduler.visits, len(strategy), summarize(session.result())
+
+
+if __name__ == '__main__':
+    print(f'{"dispatch":>13} {"run [s]":>8} {"state visits":>13} {"feed-bars":>10} {"final value":>12} {"trades":>7}')
+    results = []
+    for event_driven in [False, True]:
+        elapsed, visits, bars, summary = run(event_driven)
+        results.append(summary)
+        feeds = len([f for f in os.listdir(DIRPATH) if f.endswith('.csv')])
+        print(f'{"event driven" if event_driven else "every bar":>13} {elapsed:>8.1f} {visits:>13} {bars * feeds:>10} {summary["final_value"]:>12.2f} {summary["trades"]["closed"]:>7}')
+    assert results[0] == results[1], 'the dispatch changed the results'
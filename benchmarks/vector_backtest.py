@@ -0,0 +1,68 @@
+'''
+Time per combination of a parameter sweep of a moving average crossover over 50 symbols, backtested by the event
+engine (ParameterSweep, on the feeds it preloaded once) and by the vectorized one (VectorBacktest, on the same feeds),
+and whether both give the same trades and final value. The vectorized time is split to the computation of the
+signals (the moving averages and their crossover) and the backtest. The symbols are those with bars over all the dates, as a
+strategy without prenext doesn't start before all its feeds are warmed up.
+Run from the repository root: python -m benchmarks.vector_backtest
+'''
+import os
+import time
+from datetime import datetime
+import backtrader as bt
+from money_mgmt.sizers import PortionSizer
+from runners.optimizer import ParameterSweep, grid
+from runners.scanner import between
+from runners.vector_backtest import VectorBacktest, pattern_signals
+from strategies import conditions
+
+DIRPATH = os.path.abspath('data_feeds')
+SYMBOLS = 50
+PERCENTS = 2
+START_DATE, END_DATE = datetime(2016, 11, 30), datetime(2021, 4, 26)
+GRID = grid(pfast=[5, 10, 15, 20], pslow=[30, 50])
+
+
+class SmaCross(bt.Strategy):
+    ''' The SmaCross of samples/hello_bt_signals.py on every data, sized by a PortionSizer '''
+    params = dict(pfast=10, pslow=30)
+
+    def __init__(self):
+        self.setsizer(PortionSizer(percents=PERCENTS))
+        self.crosses = [bt.ind.CrossOver(bt.ind.SMA(data, period=self.p.pfast), bt.ind.SMA(data, period=self.p.pslow)) for data in self.datas]
+
+    def next(self):
+        for data, cross in zip(self.datas, self.crosses):
+            if not self.getposition(data) and cross > 0:
+                self.buy(data)
+            elif self.getposition(data) and cross < 0:
+                self.close(data)
+
+
+def covering(sweep: ParameterSweep) -> list:
+    ''' The stocks with bars on the first and the last day of the sweep '''
+    full = max(len(between(feed, START_DATE, END_DATE)) for feed in sweep.feeds.values())
+    return [symbol for symbol, feed in sweep.feeds.items() if len(between(feed, START_DATE, END_DATE)) == full]
+
+
+if __name__ == '__main__':
+    stocks = sorted(f for f in os.listdir(DIRPATH) if f.endswith('.csv'))[:SYMBOLS * 2]
+    sweep = ParameterSweep(SmaCross, START_DATE, END_DATE, dirpath=DIRPATH).load(stocks)
+    symbols = covering(sweep)[:SYMBOLS]
+    feeds = {symbol: sweep.feeds[symbol] for symbol in symbols}
+    event_time = signals_time = vector_time = 0.0
+    for params in GRID:
+        start = time.perf_counter()
+        expected = sweep.backtest(params, symbols=symbols)
+        event_time += time.perf_counter() - start
+        start = time.perf_counter()
+        bars, signals = pattern_signals(feeds, conditions.SMA_CROSS, params, START_DATE, END_DATE)
+        signals_time += time.perf_counter() - start
+        start = time.perf_counter()
+        result = VectorBacktest(percents=PERCENTS).run(bars, signals)
+        vector_time += time.perf_counter() - start
+        same = (len(result.closed_trades) == len(expected.closed_trades) and abs(result.final_value - expected.final_value) < 1e-6)
+        print(f'{params}: {len(result.closed_trades)} trades, final value {result.final_value:.2f} - {"same" if same else "DIFFERENT"}')
+    print(f'{len(symbols)} symbols, {len(GRID)} combinations, per combination: '
+          f'event engine {event_time / len(GRID):.3f}s, vectorized {(signals_time + vector_time) / len(GRID):.3f}s '
+          f'({event_time / (signals_time + vector_time):.0f}x) - of which the signals {signals_time / len(GRID):.3f}s, the backtest {vector_time / len(GRID):.3f}s')
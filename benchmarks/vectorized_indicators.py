@@ -0,0 +1,52 @@
+'''
+Runs the trend and range indicators of CandlePatternLong (Highest, Lowest, 3 EMAs and the trend line of their stack)
+on every feed of the data_feeds universe, built of backtrader's indicators and of the vectorized ones
+(custom_indicators.vectorized), and compares the time of the runs and the lines.
+Run from the repository root: python -m benchmarks.vectorized_indicators
+'''
+import os
+import time
+from datetime import datetime
+import numpy as np
+import backtrader as bt
+from custom_indicators import vectorized
+from database.data_loader import StaticLoader
+from runners.session import BacktestSession
+
+DIRPATH = os.path.abspath('data_feeds')
+START_DATE, END_DATE = datetime(2016, 11, 30), datetime(2021, 4, 26)
+
+
+class Indicators(bt.Strategy):
+    params = dict(vectorized=False, highs_period=37, ema_fast=21, ema_medium=40, ema_slow=100)
+
+    def __init__(self):
+        ind = vectorized if self.p.vectorized else bt.indicators
+        self.lines_of = []
+        for feed in self.datas:
+            highest = ind.Highest(feed.high, period=self.p.highs_period)
+            lowest = ind.Lowest(feed.low, period=self.p.highs_period)
+            fast, medium, slow = [ind.EMA(feed.close, period=period) for period in [self.p.ema_fast, self.p.ema_medium, self.p.ema_slow]]
+            if self.p.vectorized:
+                trend = vectorized.TrendLine(fast, medium, slow)
+            else:
+                trend = bt.And(fast > medium, medium > slow) - bt.And(fast < medium, medium < slow)
+            self.lines_of.append([highest, lowest, fast, medium, slow, trend])
+
+
+def run(vectorized: bool):
+    session = BacktestSession()
+    session.load_data(StaticLoader, start_date=START_DATE, end_date=END_DATE, dirpath=DIRPATH, use_cache=True)
+    session.add_strategy(Indicators, vectorized=vectorized)
+    start = time.perf_counter()
+    strategy = session.run()[0]
+    return time.perf_counter() - start, [[np.array(line.lines[0].array) for line in lines] for lines in strategy.lines_of]
+
+
+if __name__ == '__main__':
+    backtrader_time, backtrader_lines = run(vectorized=False)
+    vectorized_time, vectorized_lines = run(vectorized=True)
+    for feed_lines, expected_lines in zip(vectorized_lines, backtrader_lines):
+        for line, expected in zip(feed_lines, expected_lines):
+            np.testing.assert_array_equal(line, expected)
+    print(f'{len(backtrader_lines)} feeds, run with backtrader indicators: {backtrader_time:.1f}s, vectorized: {vectorized_time:.1f}s - same lines')
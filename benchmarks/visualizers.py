@@ -0,0 +1,51 @@
+'''
+Runs the visualizers HighestHighsBreakoutStrategy attaches to every feed (a breakout SingleMarker and two PartialLevels
+over its ATR and highest high) on the whole data_feeds universe, with the vectorized once() of the visualizers and
+with the loops they had before, and compares the time and the lines.
+Run from the repository root: python -m benchmarks.visualizers
+'''
+import os
+import time
+from datetime import datetime
+import numpy as np
+import backtrader as bt
+from backtrader import talib
+from custom_indicators import visualizers
+from database.data_loader import StaticLoader
+from runners.session import BacktestSession
+from tests.custom_indicators.visualizers_test import LoopPartialLevel, LoopSingleMarker
+
+DIRPATH = os.path.abspath('data_feeds')
+START_DATE, END_DATE = datetime(2016, 11, 30), datetime(2021, 4, 26)
+
+
+class Visualized(bt.Strategy):
+    params = dict(loops=False, atr_period=20, highs_period=63, entry_period=10)
+
+    def __init__(self):
+        marker, level = (LoopSingleMarker, LoopPartialLevel) if self.p.loops else (visualizers.SingleMarker, visualizers.PartialLevel)
+        self.visualizers = []
+        for feed in self.datas:
+            atr = talib.ATR(feed.high, feed.low, feed.close, timeperiod=self.p.atr_period)
+            highest = talib.MAX(feed.high, timeperiod=self.p.highs_period)
+            breakout = marker(signals=feed.high > highest(-1), level=feed.high)
+            self.visualizers += [breakout,
+                                 level(signal=breakout, level=feed.low - 2 * atr, length=self.p.entry_period),
+                                 level(signal=breakout, level=feed.low - 3.5 * atr, length=self.p.entry_period)]
+
+
+def run(loops: bool):
+    session = BacktestSession()
+    session.load_data(StaticLoader, start_date=START_DATE, end_date=END_DATE, dirpath=DIRPATH, use_cache=True)
+    session.add_strategy(Visualized, loops=loops)
+    start = time.perf_counter()
+    strategy = session.run()[0]
+    return time.perf_counter() - start, [np.array(visualizer.lines[0].array) for visualizer in strategy.visualizers]
+
+
+if __name__ == '__main__':
+    loop_time, loop_lines = run(loops=True)
+    vectorized_time, vectorized_lines = run(loops=False)
+    for loop_line, vectorized_line in zip(loop_lines, vectorized_lines):
+        np.testing.assert_array_equal(vectorized_line, loop_line)
+    print(f'{len(loop_lines)} visualizers, run with loops: {loop_time:.1f}s, vectorized: {vectorized_time:.1f}s - same lines')
@@ -0,0 +1,86 @@
+import os
+import array
+import hashlib
+import json
+import weakref
+import numpy as np
+import backtrader as bt
+from backtrader import talib
+from utils.disk_cache import DiskLRU
+from logger import *
+
+DEFAULT_DIR = os.path.join('.cache', 'indicators')
+DEFAULT_MAX_BYTES = 256 << 20
+
+
+class IndicatorStore(DiskLRU):
+    '''
+    Lines of talib indicators (ATR, MAX, MIN, SMA, EMA, CDLDOJISTAR, CDLMARUBOZU, ...) computed by earlier runs, keyed
+    by the hash of the data they were computed of, the indicator and its params - see key(). Every entry is a single
+    float64 array of a row per line. Bounded by size, the least recently used entries are evicted first.
+
+    Indicators are saved as they are computed and the store is trimmed to its size once, after the run (see evict).
+    Only runonce (vectorized) runs use the store: the indicators of stored() classes fill their lines from it in once()
+    instead of computing them. A session uses a store through IndicatorRegistry (see BacktestSession.use_indicator_store).
+    '''
+
+    def __init__(self, cache_dir=DEFAULT_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        super().__init__(cache_dir, max_bytes)
+        self._digests = {}  # id of a line's array -> (weak reference to the array, its hash), data is hashed once per run
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, indicator: bt.Indicator) -> str:
+        cls = getattr(indicator, 'stored_of', type(indicator))
+        content = dict(indicator=f'{cls.__module__}.{cls.__qualname__}', params=indicator.p._getkwargs(), data=[self.data_hash(data.lines[0].array) for data in indicator.datas])
+        return hashlib.sha256(json.dumps(content, sort_keys=True).encode()).hexdigest()
+
+    def data_hash(self, values: array.array) -> str:
+        entry = self._digests.get(id(values))
+        if entry is None or entry[0]() is not values:
+            entry = self._digests[id(values)] = (weakref.ref(values), hashlib.sha256(values).hexdigest())
+        return entry[1]
+
+    def load(self, indicator: bt.Indicator) -> bool:
+        ''' Fills the lines of the indicator from the store, False if they aren't there '''
+        key = self.key(indicator)
+        lines = self.get(key)
+        if lines is None or lines.shape[0] != indicator.size() or lines.shape[1] != len(indicator.datas[0].lines[0].array):
+            self.misses += 1
+            return False
+        for line, values in zip(indicator.lines, lines):
+            line.array = array.array('d', values.tobytes())
+        self.hits += 1
+        return True
+
+    def save(self, indicator: bt.Indicator):
+        ''' Stores the lines of the indicator, evict() is left to the end of the run '''
+        self.put(self.key(indicator), np.array([line.array for line in indicator.lines], dtype=np.float64), evict=False)
+
+    def report(self):
+        loginfo(f'indicator store: {self.hits} indicators loaded, {self.misses} computed')
+
+
+_stored_classes = {}
+
+
+def stored(cls):
+    '''
+    The subclass of the talib indicator class cls whose lines are read from (and written to) the IndicatorStore set
+    as the `store` of its instances (by IndicatorRegistry), in runonce. Without a store it's just cls.
+    '''
+    if cls not in _stored_classes:
+        def once(self, start, end):
+            if self.store is None or not self.store.load(self):
+                cls.once(self, start, end)
+                if self.store is not None:
+                    self.store.save(self)
+
+        _stored_classes[cls] = type(cls.__name__, (cls,), dict(__module__=cls.__module__, once=once, store=None, stored_of=cls))
+    return _stored_classes[cls]
+
+
+def storable(cls) -> bool:
+    ''' talib indicators are pure functions of the whole arrays they are computed of, so their lines can be stored '''
+    return isinstance(cls, type) and issubclass(cls, talib._TALibIndicator)
+
@@ -0,0 +1,40 @@
+import math
+import backtrader as bt
+from custom_indicators.vectorized import EMA, TrendLine
+
+UP, NEUTRAL, DOWN = 1, 0, -1
+
+
+class MarketRegime():
+    '''
+    The regime of the market - UP, NEUTRAL or DOWN - by the stack of 3 EMAs of the close of an index feed
+    (see TrendLine). The feed is resolved and the regime line is created once per strategy (in the strategy's __init__),
+    so states, sizers and risk functions read the regime of the current bar without looking the index up.
+    The EMAs and the stack are asked from strategy.indicator when the strategy has it (see IndicatorRegistry),
+    so a strategy that computes the same trend on the index feed as on its other feeds shares it with the regime.
+    A run without the index feed can still create the regime, only reading it fails.
+    '''
+
+    RISK_FACTORS = {UP: 1, NEUTRAL: 2, DOWN: 3}
+
+    def __init__(self, strategy: bt.Strategy, index='^GSPC', fast=21, medium=40, slow=100):
+        self.index = index
+        self.feed = strategy.env.datasbyname.get(index)
+        self.line = None
+        if self.feed is not None:
+            indicator = getattr(strategy, 'indicator', None) or (lambda cls, *args, **kwargs: cls(*args, **kwargs))
+            emas = [indicator(EMA, self.feed.close, period=period, plot=False) for period in (fast, medium, slow)]
+            self.line = indicator(TrendLine, *emas, plot=False)
+
+    def __call__(self, ago=0) -> int:
+        if self.line is None:
+            raise Exception(f'market regime requires the data feed of the index {self.index}')
+        value = self.line[ago]
+        return NEUTRAL if math.isnan(value) else int(value)
+
+    def downtrend(self) -> bool:
+        return self() == DOWN
+
+    def risk_factor(self) -> int:
+        ''' Multiplier of the risk of a position - higher as the market is weaker '''
+        return self.RISK_FACTORS[self()]
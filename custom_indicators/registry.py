@@ -0,0 +1,70 @@
+import backtrader as bt
+from backtrader.lineroot import LineRoot
+from custom_indicators.indicator_store import IndicatorStore, stored, storable
+from logger import *
+
+
+class IndicatorRegistry():
+    '''
+    The indicators of a session (of a cerebro) by what they compute - their class, the lines they are computed of
+    and their params - so asking for an indicator that already exists, for another strategy or again by the same one,
+    returns the existing instance instead of computing it again. Plotting arguments aren't part of the key,
+    the first instance keeps its own. Indicators are shared within a single run of the strategies only - a run of
+    cerebro creates new ones (e.g. every combination of optstrategy, or a second run()) even of the same feeds.
+    With a store, the talib indicators are created to read their lines from it (see IndicatorStore).
+    '''
+
+    def __init__(self):
+        self._indicators = {}  # key -> (indicator, args) - the args are kept so the ids in the key stay theirs
+        self._run = None  # the list of the strategies of the run the indicators belong to (cerebro.runningstrats)
+        self.created = 0
+        self.avoided = 0  # the number of duplicate indicators that weren't created
+        self.store: IndicatorStore = None
+
+    @staticmethod
+    def of(cerebro: bt.Cerebro) -> 'IndicatorRegistry':
+        ''' The registry of the cerebro, created on first use, with the indicators of its current run only '''
+        registry = getattr(cerebro, 'indicator_registry', None)
+        if registry is None:
+            registry = cerebro.indicator_registry = IndicatorRegistry()
+        run = getattr(cerebro, 'runningstrats', None)  # a new list on every run of the strategies
+        if run is not registry._run:
+            registry._indicators.clear()
+            registry._run = run
+        return registry
+
+    def get(self, owner: bt.Strategy, cls, *args, **kwargs):
+        '''
+        The indicator cls(*args, **kwargs) for the owner (the strategy whose __init__ asks for it).
+        An instance that another strategy created is returned with a zero delay copy of its line registered
+        to the owner, so that the owner's minimum period still accounts for the indicator.
+        '''
+        key = self.key(cls, args, kwargs)
+        if key not in self._indicators:
+            self._indicators[key] = (self._create(cls, args, kwargs), args)
+            self.created += 1
+            return self._indicators[key][0]
+        indicator = self._indicators[key][0]
+        self.avoided += 1
+        if indicator._owner is not owner:
+            indicator.lines[0](0)
+        return indicator
+
+    def _create(self, cls, args, kwargs):
+        if self.store is None or not storable(cls):
+            return cls(*args, **kwargs)
+        indicator = stored(cls)(*args, **kwargs)
+        indicator.store = self.store
+        return indicator
+
+    @staticmethod
+    def key(cls, args: tuple, kwargs: dict) -> tuple:
+        params = dict(cls.params._getitems())
+        params.update((name, value) for name, value in kwargs.items() if name in params)
+        sources = tuple(('line', id(arg)) if isinstance(arg, LineRoot) else ('value', arg) for arg in args)
+        return cls, sources, tuple(sorted(params.items()))
+
+    def report(self):
+        loginfo(f'indicators: {self.created} computed, {self.avoided} duplicates avoided')
+        if self.store is not None:
+            self.store.report()
@@ -0,0 +1,156 @@
+import math
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from globals import *
+
+
+class VectorIndicator(bt.Indicator):
+    '''
+    An indicator that is a pure function of the arrays of its datas: subclasses define compute(*arrays), returning
+    an array (or a tuple of arrays, one per line) of the same length with NaN where the values are undefined.
+    In runonce the lines are filled by a single compute() of the whole arrays, instead of a graph of line operations
+    evaluated bar by bar. In next mode compute() runs on the last `lookback` values of the datas on every bar (the whole
+    history when None) - so subclasses whose value of a bar depends on a window of the datas only set it. The indicators
+    here define next() of their own, of plain floats as backtrader's indicators, which is faster bar by bar.
+    '''
+    lookback: int = None
+
+    def compute(self, *arrays: np.ndarray):
+        raise NotImplementedError
+
+    def oncestart(self, start, end):
+        pass  # once() fills all the bars
+
+    def once(self, start, end):
+        outputs = self._compute([np.asarray(data.lines[0].array, dtype=np.float64) for data in self.datas])
+        for line, values in zip(self.lines, outputs):
+            view = np.frombuffer(line.array, dtype=np.float64)  # writes through to the line
+            view[:] = values[:len(view)]  # feeds may be extended beyond the bars of the clock
+
+    def next(self):
+        size = len(self) if self.lookback is None else min(len(self), self.lookback)
+        outputs = self._compute([np.asarray(data.lines[0].get(size=size), dtype=np.float64) for data in self.datas])
+        for line, values in zip(self.lines, outputs):
+            line[0] = values[-1]
+
+    def _compute(self, arrays: list) -> tuple:
+        outputs = self.compute(*arrays)
+        return (outputs,) if isinstance(outputs, np.ndarray) else outputs
+
+
+class PeriodIndicator(VectorIndicator):
+    ''' A VectorIndicator of a window of `period` bars of a single data '''
+    params = (('period', 1),)
+
+    def __init__(self):
+        self.addminperiod(self.p.period)
+
+    @property
+    def lookback(self) -> int:
+        return self.p.period
+
+    def windows(self, values: np.ndarray) -> np.ndarray:
+        ''' The windows of period values ending at every bar from period - 1 (NaN-padded in front to len(values)) '''
+        return sliding_window_view(values, self.p.period) if len(values) >= self.p.period else np.empty((0, self.p.period))
+
+    def padded(self, values: np.ndarray, length: int) -> np.ndarray:
+        return np.concatenate([np.full(length - len(values), np.nan), values])
+
+
+class Highest(PeriodIndicator):
+    ''' As bt.indicators.Highest - the max of the last period values '''
+    lines = ('highest',)
+    plotinfo = dict(subplot=False)
+
+    def compute(self, values):
+        return self.padded(self.windows(values).max(axis=1), len(values))
+
+    def next(self):
+        self.lines[0][0] = max(self.data.get(size=self.p.period))
+
+
+class Lowest(PeriodIndicator):
+    ''' As bt.indicators.Lowest - the min of the last period values '''
+    lines = ('lowest',)
+    plotinfo = dict(subplot=False)
+
+    def compute(self, values):
+        return self.padded(self.windows(values).min(axis=1), len(values))
+
+    def next(self):
+        self.lines[0][0] = min(self.data.get(size=self.p.period))
+
+
+class SMA(PeriodIndicator):
+    ''' As bt.indicators.SMA - the mean of the last period values (in runonce summed by numpy, not by math.fsum, so last bits of rounding may differ) '''
+    lines = ('sma',)
+    params = (('period', 30),)
+    plotinfo = dict(subplot=False)
+
+    def compute(self, values):
+        return self.padded(self.windows(values).sum(axis=1) / self.p.period, len(values))
+
+    def next(self):
+        self.lines[0][0] = math.fsum(self.data.get(size=self.p.period)) / self.p.period
+
+
+class EMA(PeriodIndicator):
+    '''
+    As bt.indicators.EMA - exponential smoothing by 2 / (1 + period), seeded by the mean of the first period values
+    (see exponential_smoothing).
+    '''
+    lines = ('ema',)
+    params = (('period', 30),)
+    plotinfo = dict(subplot=False)
+
+    def compute(self, values):
+        return exponential_smoothing(values, self.p.period, self.alpha())
+
+    def alpha(self) -> float:
+        return 2.0 / (1.0 + self.p.period)
+
+    def nextstart(self):
+        self.lines[0][0] = math.fsum(self.data.get(size=self.p.period)) / self.p.period
+
+    def next(self):
+        alpha = self.alpha()
+        self.lines[0][0] = self.lines[0][-1] * (1.0 - alpha) + self.data[0] * alpha
+
+
+class TrendLine(VectorIndicator):
+    '''
+    1 when fast > medium > slow, -1 when fast < medium < slow, 0 otherwise - of the lines of 3 moving averages (its datas).
+    As bt.And(fast > medium, medium > slow) - bt.And(fast < medium, medium < slow).
+    '''
+    lines = ('trend',)
+
+    def compute(self, fast, medium, slow):
+        trend = ((fast > medium) & (medium > slow)).astype(np.float64) - ((fast < medium) & (medium < slow))
+        trend[np.isnan(fast) | np.isnan(medium) | np.isnan(slow)] = np.nan
+        return trend
+
+    def next(self):
+        fast, medium, slow = [data[0] for data in self.datas]
+        if math.isnan(fast) or math.isnan(medium) or math.isnan(slow):
+            self.lines[0][0] = math.nan
+        else:
+            self.lines[0][0] = float((fast > medium and medium > slow) - (fast < medium and medium < slow))
+
+
+def exponential_smoothing(values: np.ndarray, period: int, alpha: float) -> np.ndarray:
+    '''
+    As bt.indicators.ExponentialSmoothing - seeded by the mean of the first period values. The recursion is a loop over
+    a list of floats in the same order of operations as backtrader's, so the values are identical.
+    '''
+    alpha1 = 1.0 - alpha
+    smoothed = np.full(len(values), np.nan)
+    first = int(np.argmax(~np.isnan(values))) + period - 1  # the data may start with NaNs (an indicator's warm up)
+    if first >= len(values) or np.isnan(values).all():
+        return smoothed
+    prev = math.fsum(values[first - period + 1:first + 1]) / period
+    recursion = [prev]
+    for value in values[first + 1:].tolist():
+        prev = prev * alpha1 + value * alpha
+        recursion.append(prev)
+    smoothed[first:] = recursion
+    return smoothed
@@ -1,3 +1,4 @@
+import numpy as np
 from globals import *
 
 class PartialLevel(bt.Indicator):
@@ -12,11 +13,19 @@ class PartialLevel(bt.Indicator):
         self.plotlines.level.linecolor = color
 
     def once(self, start, end):
-        for i in range(start,end):
-            for j in range(i-self.length+1, i+1):
-                if not math.isnan(self.signal[j]) and self.signal[j] != 0:
-                    self.lines.level[i] = self.level[j]
-                    break
+        '''
+        level[i] = level[j] of the first bar j of the `length` bars until i whose signal is set - as a loop over the bars
+        and each one's window would, with the indices relative to the lines' positions (the first windows reach
+        before the start of the arrays, so like negative list indices they wrap to their end).
+        '''
+        if start >= end or self.length <= 0:
+            return
+        first = start - self.length + 1
+        is_set = _is_set(_values(self.signal, np.arange(first, end)))
+        next_set = _next_set(is_set)  # position (from first) of the first set signal at or after each one
+        hit = next_set[np.arange(start, end) - self.length + 1 - first]
+        bars = np.flatnonzero(hit <= np.arange(start, end) - first)
+        _set(self.lines.level, start, bars, _values(self.level, first + hit[bars]))
 
 
 class SingleMarker(bt.Indicator):  # For backward compatibility with bokeh
@@ -33,7 +42,29 @@ class SingleMarker(bt.Indicator):  # For backward compatibility with bokeh
         self.plotlines.marker.mode = 'markers'
 
     def once(self, start, end):
-        for i in range(start, end):
-            if self.signals[i] != 0 and not math.isnan(self.signals[i]):
-                self.lines.marker[i] = self.level[i]
+        ''' marker[i] = level[i] on the bars whose signal is set '''
+        if start >= end:
+            return
+        bars = np.flatnonzero(_is_set(_values(self.signals, np.arange(start, end))))
+        _set(self.lines.marker, start, bars, _values(self.level, start + bars))
 
+
+def _values(line, agos: np.ndarray) -> np.ndarray:
+    ''' The values of line[ago] for all the agos at once - indexed as a LineBuffer does, from the line's current position '''
+    buffer = line.lines[0]
+    return np.asarray(buffer.array, dtype=np.float64)[buffer.idx + agos]
+
+
+def _is_set(values: np.ndarray) -> np.ndarray:
+    return ~np.isnan(values) & (values != 0)
+
+
+def _next_set(is_set: np.ndarray) -> np.ndarray:
+    ''' For each position, the first position at or after it that is set (len(is_set) when none is) '''
+    positions = np.where(is_set, np.arange(len(is_set)), len(is_set))
+    return np.minimum.accumulate(positions[::-1])[::-1]
+
+
+def _set(buffer, start: int, bars: np.ndarray, values: np.ndarray):
+    ''' buffer[start + bar] = value for the bars (positions from start) and their values, indexed as a LineBuffer does '''
+    np.frombuffer(buffer.array, dtype=np.float64)[buffer.idx + start + bars] = values  # a view - writes through to the array
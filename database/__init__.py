@@ -3,6 +3,7 @@ import numpy
 import backtrader as bt
 from backtrader import num2date
 from typing import Callable
+from utils.date_utils import num2datetime64
 
 DATETIME_LABEL = 'datetime'
 
@@ -22,12 +23,15 @@ def merge_data_feeds_csv(file1, file2, include_intervals=False):
 
 def merge_data_feeds(dataframe1: pd.DataFrame, dataframe2: pd.DataFrame, include_intervals=False, validator:Callable[[pd.DataFrame],bool]=None):
     '''
-    Returns dataframe which is the join merge result of the 2 dataframes.
+    Returns the dataframe of the rows of dataframe1 and the rows of dataframe2's other dates, sorted by date -
+    an index aligned concat (see _merge_data_frames). On the dates both contain the values must be equal, values that
+    are NaN in both count as equal, otherwise FeedMergeException is raised - as it is when a dataframe repeats a date.
     If include_interval is True, it returns tuple of (merge_result, intervals),
     intervals contains numberic indexies of the rows, of the merge result's dataframe,
     that exists in dataframe2 but not in dataframe1.
     '''
     _validate_headers(dataframe1, dataframe2)
+    _validate_dates(dataframe1, dataframe2)
     merged, intervals = _merge_data_frames(dataframe1, dataframe2, include_intervals)
     if validator and not validator(merged):
         raise FeedMergeException(f'Merge result fails on validation of {validator}')
@@ -40,39 +44,46 @@ def _validate_headers(dataframe1, dataframe2):
     else:
         raise FeedMergeException('Feeds have different headers and cannot be merged')
 
+def _validate_dates(*dataframes):
+    # the rows are aligned by date, a repeated one has no single row to compare with
+    for dataframe in dataframes:
+        duplicated = dataframe.index[dataframe.index.duplicated()]
+        if len(duplicated):
+            raise FeedMergeException(f'Feed has duplicate dates and cannot be merged: {list(duplicated.unique())}')
+
 def _merge_data_frames(dataframe1, dataframe2, include_intervals):
-    merge_on = [dataframe1.index.name] + list(dataframe1.columns.intersection(dataframe2.columns))
-    merged_and_intervals = pd.merge(dataframe1, dataframe2, how='outer', on=merge_on, indicator='intervals', sort=True)
-    merged = merged_and_intervals.drop('intervals', axis=1)
-    def no_conflicts(dataframe): 
-        intersect_dates = dataframe.index.intersection(merged.index)
-        compare_same_dates = merged.eq(dataframe).loc[intersect_dates]
-        return compare_same_dates.all().all()  # rows of the same date contain similar values as the merge result -> no coflicts
-    if not no_conflicts(dataframe2) or not no_conflicts(dataframe1):
-        raise FeedMergeException('Merge shows conflicts of values in dataframes')
+    '''
+    Index aligned merge - only the rows of the dates both dataframes contain are compared,
+    the rows of dataframe2's other dates are added to dataframe1's and the result is sorted by date.
+    '''
+    dataframe2 = dataframe2[dataframe1.columns]
+    in_dataframe1 = dataframe2.index.isin(dataframe1.index)
+    if in_dataframe1.any():
+        overlap1 = dataframe1.loc[dataframe2.index[in_dataframe1]].to_numpy()
+        overlap2 = dataframe2[in_dataframe1].to_numpy()
+        same = (overlap1 == overlap2) | (pd.isna(overlap1) & pd.isna(overlap2))
+        if not same.all():
+            raise FeedMergeException('Merge shows conflicts of values in dataframes')
+    new_rows = dataframe2[~in_dataframe1]
+    merged = pd.concat([dataframe1, new_rows]) if len(new_rows) else dataframe1.copy()
+    is_new = numpy.concatenate([numpy.zeros(len(dataframe1), dtype=bool), numpy.ones(len(new_rows), dtype=bool)])
+    if not merged.index.is_monotonic_increasing:
+        order = numpy.argsort(merged.index.to_numpy(), kind='stable')
+        merged, is_new = merged.iloc[order], is_new[order]
+    merged.index.name = dataframe1.index.name
     if include_intervals:
-        intervals = _find_new_intervals(merged_and_intervals)
-        return merged, intervals
+        return merged, _ascending_intervals(numpy.flatnonzero(is_new))
     return merged, None
 
 
-def _find_new_intervals(dataframe, column='intervals'):
-    new_interval_identifier = 'right_only'
-    new_rows = numpy.where(dataframe['intervals'] == new_interval_identifier)[0]
-
-    def find_ascending_intervals(numbers):
-        intervals = []
-        interval = (numbers[0], numbers[0])
-        for row in numbers:
-            if row == interval[1] + 1:
-                interval = (interval[0], row)
-            if row > interval[1] + 1:
-                intervals.append(interval)
-                interval = (row, row)
-        if interval:
-            intervals.append(interval)
-        return intervals
-    return find_ascending_intervals(new_rows) if len(new_rows) else []
+def _ascending_intervals(rows: numpy.ndarray) -> list:
+    ''' Groups sorted row numbers into (first, last) intervals of consecutive rows '''
+    if not len(rows):
+        return []
+    breaks = numpy.flatnonzero(numpy.diff(rows) != 1)
+    firsts = rows[numpy.concatenate([[0], breaks + 1])]
+    lasts = rows[numpy.concatenate([breaks, [len(rows) - 1]])]
+    return list(zip(firsts.tolist(), lasts.tolist()))
     
 
 class FeedMergeException(Exception):
@@ -84,11 +95,10 @@ def feed_to_dataframe(feed: bt.DataBase, idx_line=DATETIME_LABEL, lines=['open',
         lines.remove(idx_line)
     index = getattr(feed.lines, idx_line).getzero(idx=0, size=len(feed))
     values = {line: getattr(feed.lines, line).getzero(idx=-0, size=len(feed)) for line in lines}
-    df = pd.DataFrame(index=pd.Series(index, name=idx_line), data=values)
-    df.index = df.index.map(lambda timestamp: num2date(timestamp, feed._tz)) # convert to datetime.datetime
-    df.index = df.index.map(lambda datetime: datetime.date()) if date_only else df.index
-    df.index = pd.to_datetime(df.index) # since pandas force the index type to be pandas.datetime on read_csv(), I have to align with that here.
-    return df
+    dates = num2datetime64(index, feed._tz)
+    dates = dates.astype('datetime64[D]') if date_only else dates
+    # since pandas force the index type to be pandas.datetime on read_csv(), I have to align with that here.
+    return pd.DataFrame(index=pd.DatetimeIndex(pd.to_datetime(dates), name=idx_line), data=values)
 
 def csv_to_dataframe(file) -> pd.DataFrame:
-    return pd.read_csv(file, index_col=[0], parse_dates=True)
+    return pd.read_csv(file, index_col=[0], parse_dates=True, float_precision='round_trip')  # keeps the exact values on rewrite
@@ -0,0 +1,124 @@
+import numpy as np
+import backtrader as bt
+from datetime import datetime, timedelta
+from backtrader.linebuffer import LineBuffer
+from backtrader.utils.date import date2num, time2num
+
+EPOCH = datetime(1970, 1, 1)
+ORDINAL_OF_EPOCH = EPOCH.toordinal()
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+class FeedArrays():
+    '''
+    Columnar bars of a single feed: `dates` is a datetime64[s] array and `columns` maps
+    a column name ('open', 'high', ...) to a float64 array of the same length.
+    The arrays may be views of a memory mapped file - slicing never copies them.
+    '''
+
+    def __init__(self, dates: np.ndarray, columns: dict):
+        self.dates = dates
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.dates)
+
+    def __getitem__(self, column) -> np.ndarray:
+        return self.columns[column]
+
+    def slice(self, start, end) -> 'FeedArrays':
+        return FeedArrays(self.dates[start:end], {name: values[start:end] for name, values in self.columns.items()})
+
+    def window(self, fromdate: datetime = None, todate: datetime = None) -> 'FeedArrays':
+        '''
+        Returns the bars between the dates, with a margin of one day on each side.
+        The margin keeps the exact from/to filtering (which depends on the session end and timezone) to the feed.
+        '''
+        start = np.searchsorted(self.dates, np.datetime64(fromdate - timedelta(days=1), 's')) if fromdate else 0
+        end = np.searchsorted(self.dates, np.datetime64(todate + timedelta(days=1), 's'), side='right') if todate else len(self)
+        return self.slice(start, end)
+
+
+class ArrayData(bt.feed.DataBase):
+    '''
+    Data feed of bars that are already held in memory as `FeedArrays` (passed as dataname).
+    Produces the same bars as GenericCSVData reading the same data, without parsing any text -
+    on preload the lines are filled in bulk.
+    '''
+
+    params = (
+        ('openinterest', 'adj_close'),  # column to load as openinterest, None for NaN
+    )
+
+    def start(self):
+        super().start()
+        self._bars = self.p.dataname.window(self.p.fromdate, self.p.todate)
+        self._values = None
+        self._idx = -1
+
+    def _column_of(self, alias):
+        column = self.p.openinterest if alias == 'openinterest' else alias
+        if column is None or column not in self._bars.columns:
+            return np.full(len(self._bars), np.nan)
+        return self._bars[column]
+
+    def _prepare(self):
+        ''' Computes the line values of the bars inside fromdate-todate. Done lazily since these are known only after start '''
+        dtnums = self._datetime_nums()
+        if self._tzinput:  # values are localized again by load(), which also filters them
+            begin, end = 0, len(dtnums)
+        else:
+            begin, end = np.searchsorted(dtnums, self.fromdate, side='left'), np.searchsorted(dtnums, self.todate, side='right')
+        self._values = {alias: (dtnums if alias == 'datetime' else self._column_of(alias))[begin:end] for alias in self.getlinealiases()}
+        self._size = end - begin
+
+    def _datetime_nums(self) -> np.ndarray:
+        seconds = self._bars.dates.astype(np.int64)
+        if self._tz is not None or self._tzinput:
+            return np.array([self._datetime_num(EPOCH + timedelta(seconds=s)) for s in seconds.tolist()])
+        days, seconds_of_day = np.divmod(seconds, SECONDS_PER_DAY)
+        dtnums = (days + ORDINAL_OF_EPOCH).astype(np.float64) + _seconds_to_num(seconds_of_day)
+        if self.p.timeframe >= bt.TimeFrame.Days:
+            end_of_session = (days + ORDINAL_OF_EPOCH).astype(np.float64) + time2num(self.p.sessionend)
+            dtnums = np.where(end_of_session > dtnums, end_of_session, dtnums)
+        return dtnums
+
+    def _datetime_num(self, dt: datetime) -> float:
+        ''' Same conversion GenericCSVData does for a parsed date '''
+        if self.p.timeframe < bt.TimeFrame.Days:
+            return date2num(dt)
+        dtnum = date2num(self._tzinput.localize(dt) if self._tzinput else dt)
+        end_of_session = self.date2num(datetime.combine(dt.date(), self.p.sessionend))
+        if end_of_session > dtnum:
+            return end_of_session
+        return date2num(dt) if self._tzinput else dtnum
+
+    def _load(self):
+        if self._values is None:
+            self._prepare()
+            self._values = {alias: values.tolist() for alias, values in self._values.items()}
+        self._idx += 1
+        if self._idx >= self._size:
+            return False
+        for alias, values in self._values.items():
+            getattr(self.lines, alias)[0] = values[self._idx]
+        return True
+
+    def preload(self):
+        if self._filters or self._tzinput or self.lines.datetime.mode != LineBuffer.UnBounded:
+            return super().preload()  # bar by bar through _load
+        self._prepare()
+        for alias, values in self._values.items():
+            line = getattr(self.lines, alias)
+            line.array.frombytes(np.ascontiguousarray(values, dtype=np.float64).tobytes())
+            line.idx += self._size
+            line.lencount += self._size
+        self._last()
+        self.home()
+
+
+def _seconds_to_num(seconds_of_day: np.ndarray) -> np.ndarray:
+    ''' Vectorized time2num of the time of day (whole seconds) '''
+    hours, rest = np.divmod(seconds_of_day, 60 * 60)
+    minutes, seconds = np.divmod(rest, 60)
+    return hours / 24.0 + minutes / (24.0 * 60) + seconds / float(SECONDS_PER_DAY)
@@ -6,11 +6,17 @@ import sys
 import numpy as np
 from database.data_source import DataSource, IBDataSource
 from logger import *
-from database.data_writer import DataWriter
+from database.data_writer import DataWriter, compact
+from database.array_feed import ArrayData
+from database.feed_cache import FeedCache, read_feeds
+from database.feed_index import FeedIndex, IndexedCSVData
+from database.panel_store import PanelStore, symbol_of
 from backtrader.feeds import GenericCSVData
 
 class DataLoader(ABC):
 
+    filepaths: list = None  # the static files the feeds were loaded from, None for live data
+
     def __init__(self, cerebro:bt.Cerebro):
         self.cerebro = cerebro
     
@@ -23,22 +29,87 @@ class StaticLoader(DataLoader):
     # TODO rename to yahooLoader
     """Load data feeds from static files solely"""
 
-    def load_feeds(self, start_date: datetime, end_date: datetime, limit=0, dtformat='%Y-%m-%d', dirpath='data_feeds', stock_names=None, high_idx=1, low_idx=2, open_idx=3, close_idx=4, volume_idx=5, stock2file= lambda s:s, random=False):
+    def load_feeds(self, start_date: datetime, end_date: datetime, limit=0, dtformat='%Y-%m-%d', dirpath='data_feeds', stock_names=None, high_idx=1, low_idx=2, open_idx=3, close_idx=4, volume_idx=5, stock2file= lambda s:s, random=False, use_cache=False, cache_dir=None, index_dir=None, workers=0):
+        '''
+        use_cache - feed cerebro from binary copies of the csv files (see FeedCache) instead of parsing them on every run.
+        cache_dir - where to keep the binary copies, defaults to {dirpath}/.cache
+        index_dir - without use_cache, read the csv files from start_date on by seeking through a date-offset index
+                    kept in this directory (see FeedIndex). None parses the whole files and writes nothing next to them.
+        workers - number of processes that read and slice the files in parallel. The feeds are handed to cerebro as
+                  ready arrays (ArrayData). 0 reads the files on the main process.
+        '''
         modpath = os.path.dirname(os.path.abspath(sys.argv[0]))
         dirpath = os.path.join(modpath, dirpath)
-        stocks = stock_names or os.listdir(dirpath)
+        stocks = stock_names or sorted(f for f in os.listdir(dirpath) if f.endswith('.csv'))
         if random:
             stocks = np.random.permutation(stocks)
         stocks = stocks[:limit or len(stocks)]
         logdebug(f'adding {len(stocks)} data feeds: {stocks}')
-        for i, stock in enumerate(stocks):
-            feed = GenericCSVData(
-                dataname=os.path.join(dirpath, stock2file(stock)), fromdate=start_date,
-                todate=end_date, dtformat=dtformat,
-                high=high_idx, low=low_idx, open=open_idx, close=close_idx, volume=volume_idx, plot=False)
+        cache_dir = cache_dir or os.path.join(dirpath, FeedCache.DEFAULT_DIR)
+        cache = FeedCache(cache_dir) if use_cache else None
+        index = FeedIndex(index_dir) if index_dir and not use_cache else None
+        columns = dict(high=high_idx, low=low_idx, open=open_idx, close=close_idx, volume=volume_idx, adj_close=6)
+        self.filepaths = [os.path.join(dirpath, stock2file(stock)) for stock in stocks]
+        if workers:
+            feeds_bars = read_feeds(self.filepaths, columns, dtformat, start_date, end_date, cache_dir if use_cache else None, workers, index_dir=index_dir)
+            for stock, bars in zip(stocks, feeds_bars):
+                self.cerebro.adddata(ArrayData(dataname=bars, fromdate=start_date, todate=end_date, plot=False), name=stock.strip('.csv'))
+            return
+        for stock, filepath in zip(stocks, self.filepaths):
+            if cache:
+                feed = ArrayData(dataname=cache.load(filepath, columns, dtformat), fromdate=start_date, todate=end_date, plot=False)
+            elif index:
+                feed = IndexedCSVData(
+                    dataname=filepath, fromdate=start_date,
+                    todate=end_date, dtformat=dtformat, index=index,
+                    high=high_idx, low=low_idx, open=open_idx, close=close_idx, volume=volume_idx, plot=False)
+            else:
+                feed = GenericCSVData(
+                    dataname=filepath, fromdate=start_date,
+                    todate=end_date, dtformat=dtformat,
+                    high=high_idx, low=low_idx, open=open_idx, close=close_idx, volume=volume_idx, plot=False)
             self.cerebro.adddata(feed, name=stock.strip('.csv'))
 
 
+class PanelLoader(DataLoader):
+    """Load data feeds as zero-copy slices of the universe panel (see PanelStore) built from the static files"""
+
+    def load_feeds(self, start_date: datetime, end_date: datetime, limit=0, dtformat='%Y-%m-%d', dirpath='data_feeds', stock_names=None, random=False, panel_dir=None, workers=0):
+        '''
+        The panel is built from all the csv files of dirpath (and rebuilt when any of them changes),
+        stock_names selects the files (e.g. 'AAPL.csv') to feed cerebro with.
+        panel_dir - where to keep the panel, defaults to {dirpath}/.panel
+        '''
+        modpath = os.path.dirname(os.path.abspath(sys.argv[0]))
+        dirpath = os.path.join(modpath, dirpath)
+        filepaths = [os.path.join(dirpath, f) for f in sorted(os.listdir(dirpath)) if f.endswith('.csv')]
+        panel = PanelStore(panel_dir or os.path.join(dirpath, PanelStore.DEFAULT_DIR)).load(
+            filepaths, dtformat=dtformat, cache_dir=os.path.join(dirpath, FeedCache.DEFAULT_DIR), workers=max(workers, 1))
+        stocks = stock_names or [os.path.basename(filepath) for filepath in filepaths]
+        if random:
+            stocks = np.random.permutation(stocks)
+        stocks = stocks[:limit or len(stocks)]
+        logdebug(f'adding {len(stocks)} data feeds: {stocks}')
+        self.filepaths = [os.path.join(dirpath, stock) for stock in stocks]
+        for stock in stocks:
+            symbol = symbol_of(stock)
+            self.cerebro.adddata(ArrayData(dataname=panel.feed_arrays(symbol), fromdate=start_date, todate=end_date, plot=False), name=symbol)
+        return panel
+
+
+class ArrayLoader(DataLoader):
+    """Feed cerebro with bars already held in memory, e.g. read once and shared by many runs (see ParameterSweep)"""
+
+    def load_feeds(self, feeds: dict, start_date: datetime = None, end_date: datetime = None, filepaths: list = None):
+        '''
+        feeds - FeedArrays by the name of the feed, the feeds only view them
+        filepaths - the files the bars were read from, if any (they identify the data for the result cache)
+        '''
+        self.filepaths = filepaths
+        for name, bars in feeds.items():
+            self.cerebro.adddata(ArrayData(dataname=bars, fromdate=start_date, todate=end_date, plot=False), name=name)
+
+
 class IBLoader(DataLoader):
 
     source : DataSource = IBDataSource()
@@ -60,11 +131,13 @@ class IBLoader(DataLoader):
         start_date = start_date or end_date - timedelta(days=100)
         for symbol in symbols:
             backfill_data = None
+            if store:
+                compact(IBLoader.source.get_feed_path(symbol))  # folds the bars logged by the previous session
             if backfill_from_database:
                 backfill_data = GenericCSVData(dataname=IBLoader.source.get_feed_path(symbol), fromdate=start_date, todate=end_date, dtformat='%Y-%m-%d', tz='US/Eastern', sessionend=IBLoader.end_of_day)
             data = self.data_store.getdata(dataname=IBLoader.source.get_feed_fullname(symbol), **IBLoader.config, fromdate=start_date, todate=end_date, backfill_from=backfill_data)
             if store:
-                data = DataWriter.decorate_writing(data, IBLoader.source.get_feed_path(symbol))
+                data = DataWriter.decorate_streaming(data, IBLoader.source.get_feed_path(symbol))
             self.cerebro.adddata(data, symbol)
     
     '''
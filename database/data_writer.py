@@ -1,8 +1,10 @@
 import os
 import io
+import numpy as np
 import backtrader as bt
+from backtrader import date2num, num2date
 from logger import *
-from . import merge_data_feeds, FeedMergeException, feed_to_dataframe, csv_to_dataframe
+from . import merge_data_feeds, FeedMergeException, feed_to_dataframe, csv_to_dataframe, DATETIME_LABEL
 from . import pd
 
 class DataWriter():
@@ -14,6 +16,16 @@ class DataWriter():
         live_data.stop = DataWriter._store_and_stop_decorator(live_data.stop, live_data, output_filepath) 
         return live_data
 
+    @staticmethod
+    def decorate_streaming(live_data: bt.feed.AbstractDataBase, output_filepath: str, sync=False):
+        ''' Adds the data object the ability to log every bar it loads to an append-only BarLog next to the output file.
+            The log is folded into the output file by compact() - typically before the next session loads it.
+            sync - fsync every bar, so even a crash of the machine doesn't lose bars '''
+        log = BarLog(output_filepath + BarLog.SUFFIX, sync)
+        live_data.load = DataWriter._load_and_log_decorator(live_data.load, live_data, log)
+        live_data.stop = DataWriter._close_and_stop_decorator(live_data.stop, log)
+        return live_data
+
     @staticmethod
     def _store_and_stop_decorator(stop_func, data, export_file):
         def store_and_stop():
@@ -21,6 +33,87 @@ class DataWriter():
             stop_func()
         return store_and_stop
 
+    @staticmethod
+    def _load_and_log_decorator(load_func, data, log):
+        def load_and_log():
+            loaded = load_func()
+            if loaded:
+                log.append(data)
+            return loaded
+        return load_and_log
+
+    @staticmethod
+    def _close_and_stop_decorator(stop_func, log):
+        def close_and_stop():
+            log.close()
+            stop_func()
+        return close_and_stop
+
+
+class BarLog():
+    '''
+    Append-only binary log of bars - every record is the float64 values of FIELDS, the datetime is stored localized
+    (as the bar's date is written to the feed file). A bar that is loaded again is logged again, the last record of a
+    date wins. A partial record at the end (a crash in the middle of a write) is ignored.
+    '''
+
+    SUFFIX = '.barlog'
+    FIELDS = [DATETIME_LABEL, 'open', 'high', 'low', 'close', 'volume']
+
+    def __init__(self, filepath, sync=False):
+        self.filepath = filepath
+        self.sync = sync
+        self._file = None
+
+    def append(self, data):
+        if self._file is None:
+            self._file = io.open(self.filepath, mode='ab')
+        record = [date2num(data.datetime.datetime(0))] + [getattr(data.lines, field)[0] for field in BarLog.FIELDS[1:]]
+        self._file.write(np.array(record, dtype=np.float64).tobytes())
+        self._file.flush()
+        if self.sync:
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def read(self) -> pd.DataFrame:
+        ''' Returns the logged bars in the format of feed_to_dataframe '''
+        values = np.fromfile(self.filepath, dtype=np.float64) if os.path.exists(self.filepath) else np.empty(0)
+        records = values[:len(values) // len(BarLog.FIELDS) * len(BarLog.FIELDS)].reshape(-1, len(BarLog.FIELDS))
+        dates = pd.to_datetime([num2date(dtnum).date() for dtnum in records[:, 0]])
+        df = pd.DataFrame(index=pd.Series(dates, name=DATETIME_LABEL), data=records[:, 1:], columns=BarLog.FIELDS[1:])
+        return df[~df.index.duplicated(keep='last')].sort_index()
+
+
+def compact(filepath) -> bool:
+    '''
+    Folds the bar log of the feed file into it (merged like store() does) and removes the log.
+    Returns False when the merge fails - the logged bars are then kept in {filepath}.premerged.
+    Safe to call again after a crash, bars that are already in the file are merged without change.
+    '''
+    log = BarLog(filepath + BarLog.SUFFIX)
+    if not os.path.exists(log.filepath):
+        return True
+    logged = log.read()
+    compacted = True
+    if len(logged) == 0:
+        pass
+    elif os.path.exists(filepath) and os.path.isfile(filepath):
+        try:
+            merged, intervals = merge_data_feeds(csv_to_dataframe(filepath), logged, include_intervals=True, validator=weeksdays_validator)
+            write_to_file(merged, intervals, filepath)
+        except FeedMergeException as exp:
+            logerror(f'Compacting bar log {log.filepath} failed. Reason: {exp}')
+            logged.to_csv(filepath+'.premerged')
+            compacted = False
+    else:
+        logged.to_csv(filepath, index=True)
+    os.remove(log.filepath)
+    return compacted
+
         
 def store(data, filepath):
     live_data = feed_to_dataframe(data)
@@ -0,0 +1,88 @@
+import os
+import json
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from database.array_feed import FeedArrays
+from database.feed_index import FeedIndex
+from database.file_utils import file_stamp, stamp_matches, atomic_write
+from logger import *
+
+DEFAULT_COLUMNS = dict(high=1, low=2, open=3, close=4, volume=5, adj_close=6)  # column indices in the csv files of data_feeds/
+
+
+def read_feed_csv(filepath, columns: dict = DEFAULT_COLUMNS, dtformat='%Y-%m-%d', datetime_idx=0) -> FeedArrays:
+    '''
+    Parses a csv data feed into FeedArrays. `columns` maps a column name to its index in the csv.
+    Values are parsed with round trip precision - exactly as float(str) does in GenericCSVData.
+    '''
+    usecols = [datetime_idx] + list(columns.values())
+    frame = pd.read_csv(filepath, usecols=usecols, float_precision='round_trip')
+    position = {idx: i for i, idx in enumerate(sorted(set(usecols)))}  # read_csv keeps the csv order of the used columns
+    dates = pd.to_datetime(frame.iloc[:, position[datetime_idx]], format=dtformat).to_numpy().astype('datetime64[s]')
+    values = {name: frame.iloc[:, position[idx]].to_numpy(dtype=np.float64) for name, idx in columns.items()}
+    return FeedArrays(dates, values)
+
+
+class FeedCache():
+    '''
+    Binary copies of csv data feeds, converted once and then loaded memory mapped.
+    Each feed is stored in <cache_dir>/<name>.npy as a 2d float64 array - the first row holds the bars' dates
+    (int64 seconds since epoch, stored bitwise) and each of the other rows holds one column.
+    A <name>.json stamp records the source file's mtime and size, a change of any of them triggers a new conversion.
+    '''
+
+    DEFAULT_DIR = '.cache'
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def load(self, filepath, columns: dict = DEFAULT_COLUMNS, dtformat='%Y-%m-%d') -> FeedArrays:
+        data_path, stamp_path = self._paths(filepath)
+        stamp = file_stamp(filepath, columns=columns, dtformat=dtformat)
+        if not stamp_matches(stamp_path, stamp) or not os.path.exists(data_path):
+            self.store(read_feed_csv(filepath, columns, dtformat), data_path, stamp_path, stamp)
+        return self._read(data_path, stamp['columns'])
+
+    def store(self, bars: FeedArrays, data_path, stamp_path, stamp):
+        logdebug(f'caching data feed {stamp["source"]} into {data_path}')
+        table = np.empty((len(stamp['columns']) + 1, len(bars)), dtype=np.float64)
+        table[0] = bars.dates.astype('datetime64[s]').astype(np.int64).view(np.float64)
+        for row, name in enumerate(sorted(stamp['columns']), start=1):
+            table[row] = bars[name]
+        atomic_write(data_path, lambda f: np.save(f, table), mode='wb')
+        atomic_write(stamp_path, lambda f: json.dump(stamp, f), mode='w')  # stamp is written last - it validates the data file
+
+    def _read(self, data_path, columns) -> FeedArrays:
+        table = np.load(data_path, mmap_mode='r')
+        dates = table[0].view(np.int64).view('datetime64[s]')
+        return FeedArrays(dates, {name: table[row] for row, name in enumerate(sorted(columns), start=1)})
+
+    def _paths(self, filepath):
+        name = os.path.splitext(os.path.basename(filepath))[0]
+        return os.path.join(self.cache_dir, name + '.npy'), os.path.join(self.cache_dir, name + '.json')
+
+
+def read_feeds(filepaths: list, columns: dict = DEFAULT_COLUMNS, dtformat='%Y-%m-%d', fromdate: datetime = None, todate: datetime = None, cache_dir=None, workers=1, index_dir=None) -> list:
+    '''
+    Reads the data feeds (through the cache when cache_dir is given) and slices them to fromdate-todate,
+    spreading the files over a pool of `workers` processes. Returns FeedArrays in the order of filepaths.
+    Without a cache, index_dir (a FeedIndex directory) limits the parsing to the lines of fromdate-todate.
+    '''
+    args = [(filepath, columns, dtformat, fromdate, todate, cache_dir, index_dir) for filepath in filepaths]
+    if workers <= 1:
+        return [_read_feed_window(*arg) for arg in args]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_read_feed_window, *zip(*args), chunksize=max(1, len(args) // (workers * 4))))
+
+
+def _read_feed_window(filepath, columns, dtformat, fromdate, todate, cache_dir, index_dir) -> FeedArrays:
+    if cache_dir:
+        bars = FeedCache(cache_dir).load(filepath, columns, dtformat)
+    elif index_dir:
+        bars = read_feed_csv(FeedIndex(index_dir).read_window(filepath, fromdate, todate, dtformat), columns, dtformat)
+    else:
+        bars = read_feed_csv(filepath, columns, dtformat)
+    return bars.window(fromdate, todate)
@@ -0,0 +1,84 @@
+import io
+import os
+import json
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+from backtrader.feeds import GenericCSVData
+from database.file_utils import file_stamp, stamp_matches, atomic_write
+from logger import *
+
+
+class FeedIndex():
+    '''
+    Sidecar index of csv data feeds - the date of every line and the byte offset the line starts at.
+    Stored in <index_dir>/<name>.idx.npy (2 rows of int64: dates as seconds since epoch, offsets), built on first use
+    and rebuilt when the csv's mtime or size changes (see the <name>.idx.json stamp).
+    '''
+
+    def __init__(self, index_dir):
+        self.index_dir = index_dir
+        os.makedirs(index_dir, exist_ok=True)
+
+    def load(self, filepath, dtformat='%Y-%m-%d') -> tuple:
+        ''' Returns (dates, offsets) of the lines of the file, excluding the header '''
+        name = os.path.splitext(os.path.basename(filepath))[0]
+        index_path, stamp_path = os.path.join(self.index_dir, name + '.idx.npy'), os.path.join(self.index_dir, name + '.idx.json')
+        stamp = file_stamp(filepath, dtformat=dtformat)
+        if not stamp_matches(stamp_path, stamp) or not os.path.exists(index_path):
+            logdebug(f'indexing data feed {filepath} into {index_path}')
+            index = self.build(filepath, dtformat)
+            atomic_write(index_path, lambda f: np.save(f, index), mode='wb')
+            atomic_write(stamp_path, lambda f: json.dump(stamp, f), mode='w')
+        index = np.load(index_path)
+        return index[0].view('datetime64[s]'), index[1]
+
+    @staticmethod
+    def build(filepath, dtformat) -> np.ndarray:
+        with open(filepath, 'rb') as f:
+            content = f.read()
+        lines = content.split(b'\n')
+        offsets = np.cumsum([0] + [len(line) + 1 for line in lines[:-1]])
+        lines, offsets = lines[1:], offsets[1:]  # skip the headers
+        if lines and not lines[-1].strip():
+            lines, offsets = lines[:-1], offsets[:-1]
+        dates = pd.to_datetime([line.split(b',', 1)[0].decode() for line in lines], format=dtformat)
+        return np.array([dates.to_numpy().astype('datetime64[s]').astype(np.int64), offsets], dtype=np.int64)
+
+    def offsets_of(self, filepath, fromdate: datetime = None, todate: datetime = None, dtformat='%Y-%m-%d') -> tuple:
+        '''
+        Returns byte offsets (start, end) of the lines between the dates, with a margin of one day on each side
+        (the exact filtering is left to the feed). end is None when the range reaches the end of the file.
+        '''
+        dates, offsets = self.load(filepath, dtformat)
+        begin = np.searchsorted(dates, np.datetime64(fromdate - timedelta(days=1), 's')) if fromdate else 0
+        end = np.searchsorted(dates, np.datetime64(todate + timedelta(days=1), 's'), side='right') if todate else len(dates)
+        start_offset = int(offsets[begin]) if begin < len(offsets) else os.path.getsize(filepath)
+        end_offset = int(offsets[end]) if end < len(offsets) else None
+        return start_offset, end_offset
+
+    def read_window(self, filepath, fromdate: datetime = None, todate: datetime = None, dtformat='%Y-%m-%d') -> io.StringIO:
+        ''' Returns the header and the lines between the dates (see offsets_of) as a csv text stream '''
+        start, end = self.offsets_of(filepath, fromdate, todate, dtformat)
+        with open(filepath, 'rb') as f:
+            header = f.readline()
+            f.seek(start)
+            content = f.read() if end is None else f.read(end - start)
+        return io.StringIO((header + content).decode())
+
+
+class IndexedCSVData(GenericCSVData):
+    '''
+    GenericCSVData that seeks straight to the first line of fromdate using a FeedIndex,
+    instead of reading (and discarding) all the lines before it.
+    '''
+
+    params = (
+        ('index', None),  # FeedIndex
+    )
+
+    def start(self):
+        super().start()  # opens the file and skips the headers
+        if self.p.index is not None and self.p.fromdate is not None:
+            start, _ = self.p.index.offsets_of(self.p.dataname, self.p.fromdate, dtformat=self.p.dtformat)
+            self.f.seek(start)
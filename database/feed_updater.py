@@ -0,0 +1,68 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable
+import pandas as pd
+from database import merge_data_feeds, csv_to_dataframe
+from database.data_writer import write_to_file, weeksdays_validator
+from logger import *
+
+FEED_COLUMNS = ['High', 'Low', 'Open', 'Close', 'Volume', 'Adj Close']  # the column order of the csv files of data_feeds/
+
+
+def yahoo_download(symbol: str, start: datetime = None) -> pd.DataFrame:
+    ''' Downloads the daily bars of the symbol from start (all the history when None) until today '''
+    import yfinance as yf
+    feed = yf.download(symbol, start=start, end=None, progress=False, auto_adjust=False)
+    if isinstance(feed.columns, pd.MultiIndex):  # newer versions index the columns by (price, ticker)
+        feed.columns = feed.columns.get_level_values(0)
+    feed = feed[FEED_COLUMNS]  # backward compatibility to the way the feed loader works
+    feed.index.name = 'Date'
+    return feed
+
+
+class FeedUpdater():
+    '''
+    Brings the csv data feeds of a directory up to date, downloading the symbols concurrently on a bounded thread pool.
+    A file that exists gets only the bars after its last date, merged in with merge_data_feeds - any conflict with
+    the stored bars fails the symbol and leaves its file as is. A missing file is downloaded with its whole history.
+    download(symbol, start) returns a dataframe indexed by date with FEED_COLUMNS, yahoo_download by default.
+    '''
+
+    def __init__(self, feeds_dir, download: Callable[[str, datetime], pd.DataFrame] = yahoo_download, workers=8):
+        self.feeds_dir = feeds_dir
+        self.download = download
+        self.workers = workers
+
+    def update(self, symbols: list) -> dict:
+        ''' Returns the symbols that failed, mapped to their exceptions '''
+        lost = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {symbol: executor.submit(self.update_symbol, symbol) for symbol in symbols}
+            for symbol, future in futures.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    logerror(f'updating data feed of {symbol} failed: {e}')
+                    lost[symbol] = e
+        return lost
+
+    def update_symbol(self, symbol: str) -> int:
+        ''' Returns the number of bars added to the symbol's file '''
+        filepath = os.path.join(self.feeds_dir, f'{symbol}.csv')
+        if not os.path.exists(filepath):
+            loginfo(f'downloading data feed of {symbol}')
+            feed = self.download(symbol, None)
+            feed.to_csv(filepath)
+            return len(feed)
+        stored = csv_to_dataframe(filepath)
+        start = stored.index[-1] + timedelta(days=1)
+        new_bars = self.download(symbol, start.to_pydatetime())
+        if new_bars.empty:
+            logdebug(f'data feed of {symbol} is up to date')
+            return 0
+        merged, intervals = merge_data_feeds(stored, new_bars, include_intervals=True, validator=weeksdays_validator)
+        write_to_file(merged, intervals, filepath)
+        added = sum(end - begin + 1 for begin, end in intervals)
+        loginfo(f'added {added} bars to data feed of {symbol}')
+        return added
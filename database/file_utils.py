@@ -0,0 +1,24 @@
+import os
+import json
+
+
+def file_stamp(filepath, **extra) -> dict:
+    ''' Identifies the version of a file by its mtime and size, along with extra values that affect what is derived from it '''
+    stat = os.stat(filepath)
+    return dict(source=os.path.abspath(filepath), mtime_ns=stat.st_mtime_ns, size=stat.st_size, **extra)
+
+
+def stamp_matches(stamp_path, stamp) -> bool:
+    try:
+        with open(stamp_path) as f:
+            return json.load(f) == stamp
+    except (OSError, ValueError):
+        return False
+
+
+def atomic_write(path, write, mode):
+    ''' Writes through a temporary file so readers (or other processes) never see a partial file '''
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, mode) as f:
+        write(f)
+    os.replace(tmp_path, path)
@@ -0,0 +1,105 @@
+import os
+import json
+import numpy as np
+from database.array_feed import FeedArrays
+from database.feed_cache import DEFAULT_COLUMNS, read_feeds
+from database.file_utils import file_stamp, stamp_matches, atomic_write
+from logger import *
+
+
+class Panel():
+    '''
+    The bars of a universe of symbols aligned on one master calendar - the union of the dates of all the symbols.
+    Every column is an N symbols x T dates float64 matrix (memory mapped when loaded from a PanelStore),
+    holding NaN where a symbol has no bar.
+    '''
+
+    def __init__(self, dates: np.ndarray, symbols: list, columns: dict):
+        self.dates = dates
+        self.symbols = symbols
+        self.columns = columns
+        self._rows = {symbol: row for row, symbol in enumerate(symbols)}
+
+    def __len__(self):
+        return len(self.dates)
+
+    def __getitem__(self, column) -> np.ndarray:
+        return self.columns[column]
+
+    def row(self, symbol) -> int:
+        return self._rows[symbol]
+
+    def feed_arrays(self, symbol) -> FeedArrays:
+        '''
+        Returns the bars of the symbol, from its first bar to its last one.
+        The arrays are views of the panel's rows, unless the symbol misses bars in the middle of its history -
+        then the existing bars are copied out.
+        '''
+        row = self.row(symbol)
+        exists = ~np.isnan(self.columns['close'][row])
+        bars = np.flatnonzero(exists)
+        if not len(bars):
+            return FeedArrays(self.dates[:0], {name: values[row, :0] for name, values in self.columns.items()})
+        start, end = bars[0], bars[-1] + 1
+        if len(bars) == end - start:
+            return FeedArrays(self.dates[start:end], {name: values[row, start:end] for name, values in self.columns.items()})
+        return FeedArrays(self.dates[exists], {name: values[row][exists] for name, values in self.columns.items()})
+
+
+class PanelStore():
+    '''
+    Builds a Panel from csv data feeds and keeps it in <panel_dir>: calendar.npy (int64 seconds since epoch),
+    a <column>.npy matrix per column and a panel.json describing the symbols and the stamps of the source files.
+    The panel is rebuilt when a file is added, removed or changed.
+    '''
+
+    DEFAULT_DIR = '.panel'
+    META_FILE = 'panel.json'
+    CALENDAR_FILE = 'calendar.npy'
+
+    def __init__(self, panel_dir):
+        self.panel_dir = panel_dir
+        os.makedirs(panel_dir, exist_ok=True)
+
+    def load(self, filepaths: list, columns: dict = DEFAULT_COLUMNS, dtformat='%Y-%m-%d', cache_dir=None, workers=1) -> Panel:
+        '''
+        Returns the panel of the files, building it first if it's missing or stale.
+        cache_dir and workers are passed to read_feeds when building.
+        '''
+        meta = dict(symbols=[symbol_of(filepath) for filepath in filepaths], columns=columns,
+                    sources=[file_stamp(filepath, dtformat=dtformat) for filepath in filepaths])
+        meta_path = os.path.join(self.panel_dir, PanelStore.META_FILE)
+        if not stamp_matches(meta_path, meta):
+            self.store(build_panel(filepaths, columns, dtformat, cache_dir, workers), meta, meta_path)
+        return self._read(meta['symbols'], columns)
+
+    def store(self, panel: Panel, meta, meta_path):
+        logdebug(f'storing panel of {len(panel.symbols)} symbols x {len(panel)} dates into {self.panel_dir}')
+        calendar = panel.dates.astype('datetime64[s]').astype(np.int64)
+        atomic_write(os.path.join(self.panel_dir, PanelStore.CALENDAR_FILE), lambda f: np.save(f, calendar), mode='wb')
+        for name, values in panel.columns.items():
+            atomic_write(self._column_path(name), lambda f: np.save(f, values), mode='wb')
+        atomic_write(meta_path, lambda f: json.dump(meta, f), mode='w')  # written last - it validates the matrices
+
+    def _read(self, symbols, columns) -> Panel:
+        dates = np.load(os.path.join(self.panel_dir, PanelStore.CALENDAR_FILE)).view('datetime64[s]')
+        return Panel(dates, symbols, {name: np.load(self._column_path(name), mmap_mode='r') for name in columns})
+
+    def _column_path(self, name):
+        return os.path.join(self.panel_dir, name + '.npy')
+
+
+def build_panel(filepaths: list, columns: dict = DEFAULT_COLUMNS, dtformat='%Y-%m-%d', cache_dir=None, workers=1) -> Panel:
+    ''' Aligns the bars of the files on the union of their dates, in memory '''
+    feeds_bars = read_feeds(filepaths, columns, dtformat, cache_dir=cache_dir, workers=workers)
+    dates = np.unique(np.concatenate([bars.dates for bars in feeds_bars])) if feeds_bars else np.array([], dtype='datetime64[s]')
+    matrices = {name: np.full((len(feeds_bars), len(dates)), np.nan) for name in columns}
+    for row, bars in enumerate(feeds_bars):
+        positions = np.searchsorted(dates, bars.dates)
+        for name, values in matrices.items():
+            values[row, positions] = bars[name]
+    return Panel(dates, [symbol_of(filepath) for filepath in filepaths], matrices)
+
+
+def symbol_of(filepath) -> str:
+    return os.path.splitext(os.path.basename(filepath))[0]
@@ -1,26 +1,14 @@
 import pandas as pd
-import os
-import yfinance as yf
+from database.feed_updater import FeedUpdater, yahoo_download
 
 data = pd.read_html('https://en.wikipedia.org/wiki/List_of_S%26P_500_companies')
 table = data[0]
-tickers = table['Symbol'].tolist()
+tickers = [symbol.replace('.', '') for symbol in table['Symbol'].tolist()]
 FEEDS_DIR = './data_feeds/'
+WORKERS = 8  # concurrent downloads
 
 # todo validate data_feed directory
-lost = []
-for symbol in tickers:
-    try:
-        if not os.path.exists(f'{FEEDS_DIR}{symbol}.csv'):
-            print('downloading data feed of {}'.format(symbol))
-            symbol = symbol.replace('.','')
-            feed = yf.download(symbol, start=None, end=None, progress=True) #  when start and end are None gives all histroy until today.
-            feed = feed[feed.columns[[1,2,0,3,5,4]]]  # backward compatibility to the way the feed loader works
-            feed.to_csv(f'{FEEDS_DIR}{symbol}.csv')
-        else:
-            print('data feed of {} already exists, skipping'.format(symbol))
-    except Exception as e:
-        print(e)
-        lost.append(symbol)  
+# downloads the whole history of new symbols, and only the bars after the last stored date of existing ones
+lost = FeedUpdater(FEEDS_DIR, download=yahoo_download, workers=WORKERS).update(tickers)
 if len(lost):
-    print("\033[31mError downloading {} symbols: {}.\033[00m".format(len(lost), lost))
+    print("\033[31mError downloading {} symbols: {}.\033[00m".format(len(lost), list(lost)))
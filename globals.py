@@ -1,6 +1,4 @@
 import backtrader as bt
 import math
 
-cerebro = bt.Cerebro() # bad practice - delete
-
 OUTPUT_DIR = 'output/'
\ No newline at end of file
@@ -1,5 +1,6 @@
-import globals as gb
 from globals import *
+from database.data_loader import StaticLoader
+from runners.session import BacktestSession
 import datetime
 from backtrader.stores import ibstore as store
 from samples.ibtest.ibtest import TestStrategy
@@ -42,13 +43,13 @@ stockkwargs = dict(
 
 def backtest():
     global cerebro
-    cerebro = gb.cerebro
-    cerebro.addstrategy(TestStrategy)
-    from backtest import add_data
-    add_data(limit=0, random=False, start_date=datetime(2016,11,30), end_date=datetime(2021, 4, 26), dirpath='data_feeds', stock_names=['ABC.csv'])
+    session = BacktestSession()
+    cerebro = session.cerebro
+    session.add_strategy(TestStrategy)
+    session.load_data(StaticLoader, limit=0, random=False, start_date=datetime.datetime(2016,11,30), end_date=datetime.datetime(2021, 4, 26), dirpath='data_feeds', stock_names=['ABC.csv'])
     backfill(cerebro.datas)
     global strategies
-    strategies = backtest()
+    strategies = session.run()
     merge_data(cerebro.datas)
     pass
     
@@ -0,0 +1,77 @@
+import math
+from dataclasses import dataclass
+from datetime import datetime
+import pandas as pd
+import backtrader as bt
+from analyzers.drawdown_guard import DrawdownGuard
+from runners.optimizer import ParameterSweep, rank
+from runners.results import DRAWDOWN_GUARD
+from logger import *
+
+DATES, SYMBOLS = 'dates', 'symbols'  # what the budget of a rung is
+
+
+@dataclass
+class HalvingResult:
+    table: pd.DataFrame  # a row of params and metrics per rung and candidate that ran in it
+    params: dict  # the best params of the last rung
+
+
+class SuccessiveHalving():
+    '''
+    Successive halving search: all the combinations run on a small budget - a prefix of the date range or a subset
+    of the symbols - and only the best 1/eta of them (by `metric`, see rank) are promoted to the next rung,
+    which runs them on eta times the budget, until the last rung runs the survivors on the whole range and universe.
+    With max_drawdown, every run is stopped once its drawdown passes it (see DrawdownGuard), stopped runs rank
+    after all the others.
+
+    The universe is read once (see ParameterSweep), the runs of every rung are spread over the pool of workers.
+    '''
+
+    def __init__(self, strategy: bt.Strategy, start_date: datetime, end_date: datetime, cash=10000.0, strategy_params: dict = None, analyzers: list = (),
+                 metric='trades_sqn', maximize=True, eta=2, rungs=3, budget=DATES, max_drawdown: float = None, dirpath='data_feeds', cache_dir=None):
+        '''
+        budget - DATES grows the date range from its start, SYMBOLS grows the symbols (in the order they were loaded)
+        rungs - the number of budgets, the first one is 1/eta^(rungs - 1) of the whole
+        '''
+        if budget not in (DATES, SYMBOLS):
+            raise ValueError(f'unknown budget {budget}, expected {DATES} or {SYMBOLS}')
+        analyzers = list(analyzers)
+        if max_drawdown is not None:
+            analyzers.append((DrawdownGuard, dict(_name=DRAWDOWN_GUARD, max_drawdown=max_drawdown)))
+        self.sweep = ParameterSweep(strategy, start_date, end_date, cash, strategy_params, analyzers, dirpath, cache_dir)
+        self.metric = metric
+        self.maximize = maximize
+        self.eta = eta
+        self.rungs = rungs
+        self.budget = budget
+
+    def load(self, stock_names: list, workers=1) -> 'SuccessiveHalving':
+        self.sweep.load(stock_names, workers)
+        return self
+
+    def run(self, combinations: list[dict], workers: int = None) -> HalvingResult:
+        candidates = list(range(len(combinations)))
+        tables = []
+        for rung in range(self.rungs):
+            end_date, symbols = self.budget_of(rung)
+            loginfo(f'rung {rung}: running {len(candidates)} candidates until {end_date.date()} on {len(symbols or self.sweep.feeds)} symbols')
+            rows = [None] * len(candidates)
+            calls = [('run_combination', combinations[candidate], None, end_date, symbols) for candidate in candidates]
+            for i, row in self.sweep.execute(calls, workers):
+                rows[i] = dict(rung=rung, candidate=candidates[i], **row)
+            table = pd.DataFrame(rows)
+            tables.append(table)
+            order = rank(table, self.metric, self.maximize)
+            if rung < self.rungs - 1:
+                candidates = sorted(candidates[i] for i in order[:max(1, math.ceil(len(candidates) / self.eta))])
+        return HalvingResult(pd.concat(tables, ignore_index=True), combinations[candidates[order[0]]])
+
+    def budget_of(self, rung: int) -> tuple:
+        ''' The end date and the symbols (None for all of them) the rung runs on '''
+        fraction = self.eta ** (rung - self.rungs + 1)
+        sweep = self.sweep
+        if self.budget == SYMBOLS:
+            symbols = list(sweep.feeds)
+            return sweep.end_date, symbols[:max(1, math.ceil(len(symbols) * fraction))] if fraction < 1 else None
+        return sweep.start_date + (sweep.end_date - sweep.start_date) * fraction, None
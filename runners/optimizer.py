@@ -0,0 +1,149 @@
+import os
+import csv
+import itertools
+import multiprocessing
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import backtrader as bt
+from database.data_loader import ArrayLoader
+from database.feed_cache import FeedCache, read_feeds
+from database.panel_store import symbol_of
+from runners.results import RunResult, metrics
+from runners.session import BacktestSession
+from logger import *
+
+_sweep = None  # the sweep whose combinations a worker process runs, inherited from the parent when the pool forks
+
+
+class ParameterSweep():
+    '''
+    Runs a strategy once for every combination of a grid of its params (see grid) on the same universe of symbols.
+
+    The feeds are read once, into FeedArrays, before the pool of workers starts. The workers are forked, so they
+    inherit the arrays instead of reading or receiving them - every combination runs its own BacktestSession
+    fed by ArrayData views of the same arrays (see ArrayLoader), nothing is parsed or copied per combination.
+    The metrics of every combination (see metrics) stream back as soon as it finishes, as a row with its params.
+    '''
+
+    def __init__(self, strategy: bt.Strategy, start_date: datetime, end_date: datetime, cash=10000.0, strategy_params: dict = None,
+                 analyzers: list = (), dirpath='data_feeds', cache_dir=None):
+        '''
+        strategy_params - params common to all the combinations
+        analyzers - list of (analyzer class, kwargs) added to every run
+        cache_dir - the FeedCache directory, defaults to {dirpath}/.cache
+        '''
+        self.strategy = strategy
+        self.start_date, self.end_date = start_date, end_date
+        self.cash = cash
+        self.strategy_params = strategy_params or {}
+        self.analyzers = list(analyzers)
+        self.dirpath = dirpath
+        self.cache_dir = cache_dir or os.path.join(dirpath, FeedCache.DEFAULT_DIR)
+        self.feeds: dict = None
+        self.filepaths: list = None
+
+    def load(self, stock_names: list, workers=1) -> 'ParameterSweep':
+        ''' Reads the feeds of the stocks (e.g. 'AAPL.csv') between the dates of the sweep '''
+        self.filepaths = [os.path.join(self.dirpath, stock) for stock in stock_names]
+        bars = read_feeds(self.filepaths, fromdate=self.start_date, todate=self.end_date, cache_dir=self.cache_dir, workers=workers)
+        self.feeds = {symbol_of(stock): feed for stock, feed in zip(stock_names, bars)}
+        return self
+
+    def backtest(self, params: dict, start_date: datetime = None, end_date: datetime = None, symbols: list = None) -> RunResult:
+        ''' Backtests a single combination, between other dates (inside the loaded ones) or on some of the symbols when given '''
+        feeds = self.feeds if symbols is None else {symbol: self.feeds[symbol] for symbol in symbols}
+        filepaths = self.filepaths if symbols is None else [filepath for symbol, filepath in zip(self.feeds, self.filepaths) if symbol in feeds]
+        session = BacktestSession(cash=self.cash)
+        session.load_data(ArrayLoader, feeds=feeds, start_date=start_date or self.start_date, end_date=end_date or self.end_date, filepaths=filepaths)
+        session.add_strategy(self.strategy, **self.strategy_params, **params)
+        for analyzer, kwargs in self.analyzers:
+            session.add_analyzer(analyzer, **kwargs)
+        session.run()
+        return session.result()
+
+    def run_combination(self, params: dict, start_date: datetime = None, end_date: datetime = None, symbols: list = None) -> dict:
+        ''' Backtests a single combination, returns its params followed by the metrics of its result '''
+        return {**params, **metrics(self.backtest(params, start_date, end_date, symbols))}
+
+    def run(self, combinations: list[dict], workers: int = None, results_path=None) -> Iterator[dict]:
+        '''
+        Yields the row of every combination as it finishes (not in the order of combinations).
+        results_path - a csv file every row is written to as soon as it arrives, so a long sweep can be followed
+        (and what was done survives an interrupted one)
+        '''
+        if self.feeds is None:
+            raise ValueError('no feeds to sweep over, call load() first')
+        workers = workers or os.cpu_count()
+        loginfo(f'sweeping {len(combinations)} combinations of {self.strategy.__name__} params on {len(self.feeds)} symbols by {workers} workers')
+        rows = (row for _, row in self.execute([('run_combination', params) for params in combinations], workers))
+        writer, file = None, open(results_path, 'w', newline='') if results_path else None
+        try:
+            for row in rows:
+                if file:
+                    if writer is None:
+                        writer = csv.DictWriter(file, fieldnames=list(row))
+                        writer.writeheader()
+                    writer.writerow(row)
+                    file.flush()
+                yield row
+        finally:
+            if file:
+                file.close()
+
+    def table(self, combinations: list[dict], workers: int = None, results_path=None) -> pd.DataFrame:
+        ''' The rows of all the combinations, in the order of combinations '''
+        names = list(combinations[0]) if combinations else []
+        position = {tuple(params[name] for name in names): i for i, params in enumerate(combinations)}
+        rows = sorted(self.run(combinations, workers, results_path), key=lambda row: position[tuple(row[name] for name in names)])
+        return pd.DataFrame(rows)
+
+    def execute(self, calls: list[tuple], workers: int = None) -> Iterator[tuple]:
+        '''
+        Runs calls of methods of the sweep - (method name, *args) - over the pool of workers sharing its feeds.
+        Yields (index of the call, its return value) as every call finishes.
+        '''
+        if self.feeds is None:
+            raise ValueError('no feeds to run on, call load() first')
+        workers = workers or os.cpu_count()
+        if workers <= 1:
+            for i, (method, *args) in enumerate(calls):
+                yield i, getattr(self, method)(*args)
+            return
+        with ProcessPoolExecutor(max_workers=workers, mp_context=_fork_context(), initializer=_init_worker, initargs=(self,)) as executor:
+            futures = {executor.submit(_call, method, *args): i for i, (method, *args) in enumerate(calls)}
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+
+
+def grid(**values) -> list[dict]:
+    ''' Every combination of the values of the params, e.g. grid(atr_period=[10, 14], ema_fast=[5, 10]) has 4 '''
+    return [dict(zip(values, combination)) for combination in itertools.product(*values.values())]
+
+
+def rank(rows: pd.DataFrame, metric: str, maximize=True) -> np.ndarray:
+    '''
+    Positions of the rows from the best to the worst by the metric column. Rows without a value of the metric,
+    and runs stopped before their end (see DrawdownGuard), come last.
+    '''
+    scores = rows[metric].astype(float).to_numpy()
+    scores = np.where(np.isnan(scores), -np.inf, scores if maximize else -scores)
+    if 'stopped' in rows:
+        scores = np.where(rows['stopped'].to_numpy(dtype=bool), -np.inf, scores)
+    return np.argsort(-scores, kind='stable')
+
+
+def _init_worker(sweep: ParameterSweep):
+    global _sweep
+    _sweep = sweep  # with fork the sweep (and its arrays) is inherited, other start methods pickle it once per worker
+
+
+def _call(method: str, *args):
+    return getattr(_sweep, method)(*args)
+
+
+def _fork_context():
+    return multiprocessing.get_context('fork') if 'fork' in multiprocessing.get_all_start_methods() else None
+
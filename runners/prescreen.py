@@ -0,0 +1,92 @@
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime
+import pandas as pd
+import backtrader as bt
+from database.data_loader import ArrayLoader
+from database.feed_cache import FeedCache, read_feeds
+from database.panel_store import symbol_of
+from runners.results import RunResult
+from runners.scanner import scan, between, strategy_params
+from runners.session import BacktestSession
+from runners.sharded import REFERENCE_SYMBOLS
+from logger import *
+
+
+@dataclass
+class PrescreenReport:
+    universe: int  # the number of symbols scanned
+    hits: pd.DataFrame  # the (date, symbol) hits of the scan
+    symbols: list[str]  # the symbols the backtest ran on - those with hits, and the references
+    bars: int  # the bars of the universe between the dates
+    skipped_bars: int  # the bars of the symbols the backtest didn't run on
+    scan_seconds: float
+    run_seconds: float
+
+    def __str__(self):
+        return (f'prescreen: {len(self.symbols)} of {self.universe} symbols backtested, {self.skipped_bars} of {self.bars} bars '
+                f'({self.skipped_bars / max(self.bars, 1):.0%}) skipped - scan {self.scan_seconds:.1f}s, backtest {self.run_seconds:.1f}s')
+
+
+class TwoPhaseBacktest():
+    '''
+    Backtests a strategy on the symbols it could enter only: the universe is scanned first by the strategy's `pattern`
+    (see strategies.conditions - its entry condition, or a necessary condition of it), then the symbols with at least one
+    hit, and the reference symbols (feeds the strategy reads, e.g. the market index), run in a single Cerebro as usual.
+    The feeds are read once - the scan and the backtest view the same arrays.
+
+    Symbols without hits never enter, so dropping them leaves the trades of the others as they are. Except that a
+    strategy starts only when all its feeds are warmed up - a dropped symbol that starts later than the others would
+    have delayed the start of the full run.
+    '''
+
+    def __init__(self, strategy: bt.Strategy, start_date: datetime, end_date: datetime, cash=10000.0, strategy_params: dict = None, analyzers: list = (),
+                 reference_symbols: list = REFERENCE_SYMBOLS, dirpath='data_feeds', cache_dir=None):
+        '''
+        analyzers - list of (analyzer class, kwargs) added to the backtest
+        reference_symbols - the files of the reference feeds (e.g. '^GSPC.csv'), always backtested and never scanned
+        cache_dir - of the binary copies of the files (see FeedCache), defaults to {dirpath}/.cache
+        '''
+        if getattr(strategy, 'pattern', None) is None:
+            raise ValueError(f'{strategy.__name__} has no pattern to prescreen the symbols by')
+        self.strategy = strategy
+        self.start_date, self.end_date = start_date, end_date
+        self.cash = cash
+        self.strategy_params = strategy_params or {}
+        self.analyzers = list(analyzers)
+        self.reference_symbols = list(reference_symbols)
+        self.dirpath = dirpath
+        self.cache_dir = cache_dir or os.path.join(dirpath, FeedCache.DEFAULT_DIR)
+
+    def run(self, stock_names: list = None, workers=1) -> tuple[RunResult, PrescreenReport]:
+        ''' stock_names - the files of the universe (e.g. 'AAPL.csv'), all the csv files of dirpath by default '''
+        stocks = list(stock_names or sorted(f for f in os.listdir(self.dirpath) if f.endswith('.csv')))
+        stocks += [stock for stock in self.reference_symbols if stock not in stocks]
+        filepaths = [os.path.join(self.dirpath, stock) for stock in stocks]
+        feeds = dict(zip(map(symbol_of, stocks), read_feeds(filepaths, fromdate=self.start_date, todate=self.end_date, cache_dir=self.cache_dir, workers=workers)))
+        references = {symbol_of(stock) for stock in self.reference_symbols}
+
+        start = time.perf_counter()
+        scanned = {symbol: bars for symbol, bars in feeds.items() if symbol not in references}
+        hits = scan(scanned, self.strategy.pattern, strategy_params(self.strategy, **self.strategy_params), self.start_date, self.end_date)
+        kept = set(hits['symbol']) | references
+        scan_seconds = time.perf_counter() - start
+
+        selected = [(symbol, filepath) for symbol, filepath in zip(feeds, filepaths) if symbol in kept]  # in the order of the universe
+        bars = {symbol: len(between(feed, self.start_date, self.end_date)) for symbol, feed in scanned.items()}
+        start = time.perf_counter()
+        result = self.backtest({symbol: feeds[symbol] for symbol, _ in selected}, [filepath for _, filepath in selected])
+        report = PrescreenReport(len(scanned), hits, [symbol for symbol, _ in selected], sum(bars.values()),
+                                 sum(count for symbol, count in bars.items() if symbol not in kept), scan_seconds, time.perf_counter() - start)
+        loginfo(str(report))
+        return result, report
+
+    def backtest(self, feeds: dict, filepaths: list) -> RunResult:
+        session = BacktestSession(cash=self.cash)
+        session.load_data(ArrayLoader, feeds=feeds, start_date=self.start_date, end_date=self.end_date, filepaths=filepaths)
+        session.add_strategy(self.strategy, **self.strategy_params)
+        for analyzer, kwargs in self.analyzers:
+            session.add_analyzer(analyzer, **kwargs)
+        session.run()
+        return session.result()
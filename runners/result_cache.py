@@ -0,0 +1,100 @@
+import os
+import json
+import hashlib
+import inspect
+import sys
+import backtrader as bt
+from utils.disk_cache import DiskLRU
+
+DEFAULT_DIR = os.path.join('.cache', 'results')
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MAX_BYTES = 512 << 20
+# load_data arguments that only affect how (or which - the files are fingerprinted anyway) feeds are loaded, not the bars
+LOADING_ARGUMENTS = ('limit', 'dirpath', 'stock_names', 'stock2file', 'random', 'use_cache', 'cache_dir', 'index_dir', 'panel_dir', 'workers', 'feeds', 'filepaths')
+
+_checksums = {}  # (path, mtime, size) -> checksum, files are hashed once per process
+
+
+class ResultCache(DiskLRU):
+    '''
+    Results of backtest runs (RunResult) keyed by the content of everything that determines them - see result_key().
+    Bounded by size, the least recently used results are evicted first.
+    '''
+
+    def __init__(self, cache_dir=DEFAULT_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        super().__init__(cache_dir, max_bytes)
+
+
+def result_key(cerebro: bt.Cerebro, cash: float, load_arguments: list[dict], filepaths: list) -> str:
+    '''
+    Hash of the run's configuration: the source of the strategies (the modules of their classes and every project module
+    they import, directly or not - see source_modules),
+    their params, the analyzers, cerebro's and the broker's settings, the cash, the date range (and the other
+    load_data arguments that affect the bars) and the checksums of the data files, in the order they were loaded.
+    '''
+    broker = cerebro.broker
+    content = dict(
+        strategies=[dict(source=_source_hash(strategy), params=_params(strategy, kwargs), args=args) for strategy, args, kwargs in _strategies(cerebro)],
+        analyzers=[dict(cls=_qualified_name(analyzer), args=args, kwargs=kwargs) for analyzer, args, kwargs in cerebro.analyzers],
+        cerebro=cerebro.p._getkwargs(),
+        broker=dict(cls=_qualified_name(type(broker)), params=broker.p._getkwargs(), comminfo={str(name): info.p._getkwargs() for name, info in broker.comminfo.items()}),
+        sizers={str(key): (_qualified_name(sizer), args, kwargs) for key, (sizer, args, kwargs) in cerebro.sizers.items()},
+        cash=cash,
+        load_arguments=[{key: value for key, value in arguments.items() if key not in LOADING_ARGUMENTS} for arguments in load_arguments],
+        data=[checksum(filepath) for filepath in filepaths],
+    )
+    return hashlib.sha256(json.dumps(content, sort_keys=True, default=repr).encode()).hexdigest()
+
+
+def checksum(filepath) -> str:
+    stat = os.stat(filepath)
+    stamp = (os.path.abspath(filepath), stat.st_mtime_ns, stat.st_size)
+    if stamp not in _checksums:
+        with open(filepath, 'rb') as f:
+            _checksums[stamp] = hashlib.sha256(f.read()).hexdigest()
+    return _checksums[stamp]
+
+
+def _strategies(cerebro: bt.Cerebro):
+    ''' (class, args, kwargs) of the strategies added by addstrategy '''
+    for strategies in cerebro.strats:
+        yield from strategies
+
+
+def _params(strategy: bt.Strategy, kwargs: dict) -> dict:
+    params = dict(strategy.params._getitems())
+    params.update(kwargs)
+    return params
+
+
+def source_modules(cls) -> list[str]:
+    '''
+    The names of the project modules (the files under PROJECT_ROOT) the class depends on: the modules of the classes of
+    its mro, and the project modules they import - the modules, classes and functions in their namespaces, recursively.
+    '''
+    pending = [base.__module__ for base in cls.__mro__ if _is_project_module(base.__module__)]
+    found = set()
+    while pending:
+        name = pending.pop()
+        if name in found:
+            continue
+        found.add(name)
+        for value in vars(sys.modules[name]).values():
+            module = value.__name__ if inspect.ismodule(value) else getattr(value, '__module__', None)
+            if isinstance(module, str) and module not in found and _is_project_module(module):
+                pending.append(module)
+    return sorted(found)
+
+
+def _source_hash(cls) -> str:
+    sources = [f'{name}\n{inspect.getsource(sys.modules[name])}' for name in source_modules(cls)]
+    return hashlib.sha256('\n'.join(sources).encode()).hexdigest()
+
+
+def _is_project_module(name: str) -> bool:
+    filepath = getattr(sys.modules.get(name), '__file__', None)
+    return filepath is not None and os.path.abspath(filepath).startswith(PROJECT_ROOT + os.sep) and 'site-packages' not in filepath
+
+
+def _qualified_name(cls) -> str:
+    return f'{cls.__module__}.{cls.__qualname__}'
@@ -0,0 +1,141 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+from collections.abc import Mapping
+import numpy as np
+import pandas as pd
+import backtrader as bt
+from utils.backtrader_helpers import extract_trades_list
+
+EQUITY_CURVE = 'equitycurve'  # the _name of the EquityCurve analyzer the runners add
+DRAWDOWN_GUARD = 'drawdownguard'  # the _name of the DrawdownGuard analyzer, when a run has one
+
+
+@dataclass
+class TradeRecord:
+    ''' Picklable summary of a bt.Trade '''
+    symbol: str
+    price: float
+    size: float  # 0 once the trade is closed
+    open_datetime: datetime
+    close_datetime: Optional[datetime]
+    barlen: int
+    pnl: float
+    pnlcomm: float
+    isclosed: bool
+
+    @staticmethod
+    def of(trade: bt.Trade) -> 'TradeRecord':
+        return TradeRecord(trade.data._name, trade.price, trade.size, trade.open_datetime(), trade.close_datetime() if trade.isclosed else None,
+                           trade.barlen, trade.pnl, trade.pnlcomm, trade.isclosed)
+
+
+@dataclass
+class RunResult:
+    '''
+    Outcome of a backtest run that can cross process boundaries - the trades, the equity curve (broker value by date)
+    and the analyses of the analyzers (a dict of analyzer name to analysis per run, a merged result holds one per shard).
+    '''
+    starting_cash: float
+    trades: list[TradeRecord] = field(default_factory=list)
+    equity: pd.Series = field(default_factory=lambda: pd.Series(dtype=float))
+    analyses: list[dict] = field(default_factory=list)
+
+    @property
+    def final_value(self) -> float:
+        return float(self.equity.iloc[-1]) if len(self.equity) else self.starting_cash
+
+    @property
+    def closed_trades(self) -> list[TradeRecord]:
+        return [trade for trade in self.trades if trade.isclosed]
+
+
+def extract_result(strategy: bt.Strategy, starting_cash: float, exclude_symbols=()) -> RunResult:
+    '''
+    Collects the result of a finished strategy. The trades of feeds in exclude_symbols are left out.
+    The equity curve is taken from the EquityCurve analyzer when the strategy has one (named EQUITY_CURVE).
+    '''
+    trades = [TradeRecord.of(trade) for trade in extract_trades_list(strategy) if trade.data._name not in exclude_symbols]
+    analyses = {name: _plain(analyzer.get_analysis()) for name, analyzer in zip(strategy.analyzers.getnames(), strategy.analyzers)}
+    equity = pd.Series(analyses.pop(EQUITY_CURVE, {}), dtype=float)
+    return RunResult(starting_cash, trades, equity, [analyses])
+
+
+def merge_results(results: list[RunResult]) -> RunResult:
+    '''
+    Merges the results of runs of disjoint parts of a portfolio into the result of the whole portfolio:
+    trades are concatenated in time order and the equity curves are summed, every curve is extended
+    backwards by its starting cash and forwards by its last value.
+    '''
+    trades = sorted((trade for result in results for trade in result.trades), key=lambda t: (t.close_datetime or datetime.max, t.open_datetime, t.symbol))
+    curves = pd.concat([result.equity.rename(i) for i, result in enumerate(results)], axis=1).sort_index().ffill()
+    for i, result in enumerate(results):
+        curves[i] = curves[i].fillna(result.starting_cash)
+    equity = curves.sum(axis=1) if len(curves.columns) else pd.Series(dtype=float)
+    return RunResult(sum(result.starting_cash for result in results), trades, equity, [analysis for result in results for analysis in result.analyses])
+
+
+def chain_results(results: list[RunResult]) -> RunResult:
+    '''
+    Chains the results of runs of consecutive periods, each started on the same cash, into one run over all of them:
+    every equity curve is rescaled to start from the value the previous one ended with (compounding the returns),
+    the trades are concatenated as they are.
+    '''
+    curves, scale = [], 1.0
+    for result in results:
+        curves.append(result.equity * scale)
+        scale *= result.final_value / result.starting_cash
+    equity = pd.concat(curves) if curves else pd.Series(dtype=float)
+    return RunResult(results[0].starting_cash if results else 0.0, [trade for result in results for trade in result.trades],
+                     equity[~equity.index.duplicated(keep='last')], [analysis for result in results for analysis in result.analyses])
+
+
+def trade_stats(trades: list[TradeRecord]) -> dict:
+    ''' The main statistics BasicTradeStats calculates, and the SQN (as bt.analyzers.SQN does), from the closed trades '''
+    pnls = np.array([trade.pnlcomm for trade in trades if trade.isclosed])
+    won, lost = pnls[pnls >= 0], pnls[pnls < 0]
+    stats = dict(total=len(trades), closed=len(pnls), won=len(won), lost=len(lost),
+                 pnl_total=pnls.sum() if len(pnls) else None, pnl_average=pnls.mean() if len(pnls) else None,
+                 win_rate=len(won) / len(pnls) * 100 if len(pnls) else None, profit_factor=None, reward_risk_ratio=None, sqn=0)
+    if len(won) and len(lost):
+        stats['profit_factor'] = won.sum() / -lost.sum()
+        stats['reward_risk_ratio'] = won.mean() / -lost.mean()
+    if len(pnls) > 1:
+        stddev = pnls.std()
+        stats['sqn'] = np.sqrt(len(pnls)) * pnls.mean() / stddev if stddev else None
+    return stats
+
+
+def max_drawdown(equity: pd.Series) -> tuple:
+    ''' Returns the max drawdown of the equity curve as (percent, money) '''
+    if not len(equity):
+        return 0.0, 0.0
+    peaks = equity.cummax()
+    drawdowns = peaks - equity
+    return float((drawdowns / peaks).max() * 100), float(drawdowns.max())
+
+
+def summarize(result: RunResult) -> dict:
+    drawdown_percent, drawdown_money = max_drawdown(result.equity)
+    return dict(starting_cash=result.starting_cash, final_value=result.final_value,
+                return_percent=(result.final_value / result.starting_cash - 1) * 100,
+                max_drawdown_percent=drawdown_percent, max_drawdown=drawdown_money, trades=trade_stats(result.trades))
+
+
+def metrics(result: RunResult) -> dict:
+    '''
+    The summary of the run (see summarize) flattened to a row of numbers, the trade statistics prefixed by trades_.
+    stopped tells whether a DrawdownGuard stopped the run (of any of the merged runs) before its end.
+    '''
+    summary = summarize(result)
+    trades = summary.pop('trades')
+    summary.update({f'trades_{name}': value for name, value in trades.items()})
+    summary['stopped'] = any(analysis.get(DRAWDOWN_GUARD, {}).get('stopped', False) for analysis in result.analyses)
+    return summary
+
+
+def _plain(analysis):
+    ''' Converts the (auto) ordered dicts of an analysis to plain dicts, which pickle safely '''
+    if isinstance(analysis, Mapping):
+        return {key: _plain(value) for key, value in analysis.items()}
+    return analysis
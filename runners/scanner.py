@@ -0,0 +1,56 @@
+import os
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+import backtrader as bt
+from database.array_feed import FeedArrays
+from database.feed_cache import FeedCache, read_feeds
+from database.panel_store import symbol_of
+from strategies.conditions import Pattern
+from logger import *
+
+SESSION_END = np.timedelta64(timedelta(hours=23, minutes=59, seconds=59))  # daily bars are stamped at the end of their day
+
+
+def scan(feeds: dict[str, FeedArrays], pattern: Pattern, params: dict, start_date: datetime = None, end_date: datetime = None) -> pd.DataFrame:
+    '''
+    The bars on which the entry condition of the pattern holds - a row of (date, symbol) per hit, by date then symbol.
+    The lines are computed on the bars between the dates only, as a backtest between them computes its indicators.
+    Hits are a superset of the strategy's entries: its positions, orders and warm up aren't taken into account.
+    '''
+    dates, symbols = [], []
+    for symbol, bars in feeds.items():
+        bars = between(bars, start_date, end_date)
+        hits = pattern.hits(bars, params)
+        dates.append(bars.dates[hits])
+        symbols.append(np.full(np.count_nonzero(hits), symbol, dtype=object))
+    table = pd.DataFrame(dict(date=np.concatenate(dates) if dates else np.array([], dtype='datetime64[s]'),
+                              symbol=np.concatenate(symbols) if symbols else np.array([], dtype=object)))
+    return table.sort_values(['date', 'symbol'], ignore_index=True)
+
+
+def scan_universe(pattern: Pattern, params: dict, start_date: datetime = None, end_date: datetime = None, dirpath='data_feeds', stock_names: list = None,
+                  cache_dir: str = None, workers=1) -> pd.DataFrame:
+    '''
+    Scans the csv files of dirpath (or the stock_names of them, e.g. 'AAPL.csv'), read through the feed cache
+    (see FeedCache, in {dirpath}/.cache by default) by `workers` processes.
+    '''
+    stocks = stock_names or sorted(f for f in os.listdir(dirpath) if f.endswith('.csv'))
+    filepaths = [os.path.join(dirpath, stock) for stock in stocks]
+    bars = read_feeds(filepaths, fromdate=start_date, todate=end_date, cache_dir=cache_dir or os.path.join(dirpath, FeedCache.DEFAULT_DIR), workers=workers)
+    table = scan({symbol_of(stock): feed for stock, feed in zip(stocks, bars)}, pattern, params, start_date, end_date)
+    loginfo(f'scanned {len(stocks)} feeds: {len(table)} hits of {table["symbol"].nunique()} symbols')
+    return table
+
+
+def strategy_params(strategy: bt.Strategy, **params) -> dict:
+    ''' The params of the strategy class (with the given ones instead of its defaults), to scan by its pattern '''
+    return {**dict(strategy.params._getitems()), **params}
+
+
+def between(bars: FeedArrays, start_date: datetime = None, end_date: datetime = None) -> FeedArrays:
+    ''' The bars a feed with fromdate=start_date, todate=end_date has - stamped at the end of their day, from start_date until end_date '''
+    stamps = bars.dates + SESSION_END
+    start = np.searchsorted(stamps, np.datetime64(start_date, 's')) if start_date else 0
+    end = np.searchsorted(stamps, np.datetime64(end_date, 's'), side='right') if end_date else len(bars)
+    return bars.slice(start, end)
@@ -0,0 +1,117 @@
+import backtrader as bt
+from backtrader.dataseries import TimeFrame
+from backtrader.analyzers.tradeanalyzer import TradeAnalyzer
+from analyzers.basic_trade_stats import BasicTradeStats
+from analyzers.equity_curve import EquityCurve
+from analyzers.exposer import Exposer
+from custom_indicators.indicator_store import IndicatorStore
+from custom_indicators.registry import IndicatorRegistry
+from database.data_loader import DataLoader, StaticLoader
+from globals import OUTPUT_DIR
+from runners.results import RunResult, extract_result, EQUITY_CURVE
+from runners.result_cache import ResultCache, result_key
+from utils import utils
+from utils.backtrader_helpers import print_trades_length
+from logger import *
+
+
+class BacktestSession():
+    '''
+    A single, isolated backtest - owns its Cerebro, the loaders feeding it, its analyzers and its output directory.
+    Sessions share no state, so any number of them can be created and run in one process, in threads or in a process pool.
+    Every session records its equity curve (see EquityCurve), so result() can be called after run().
+    '''
+
+    def __init__(self, cash=10000.0, output_dir=OUTPUT_DIR, **cerebro_kwargs):
+        self.cerebro = bt.Cerebro(**cerebro_kwargs)
+        self.cash = cash
+        self.output_dir = output_dir
+        self.loaders: list[DataLoader] = []
+        self.load_arguments: list[dict] = []
+        self.strategies: list[bt.Strategy] = None
+        self.indicators = IndicatorRegistry.of(self.cerebro)  # the indicators the strategies ask for by indicator()
+        self.cerebro.addanalyzer(EquityCurve, _name=EQUITY_CURVE)
+
+    def add_strategy(self, strategy: bt.Strategy, **params):
+        loginfo(f'backtesting strategy {strategy.__name__}')
+        self.cerebro.addstrategy(strategy, **params)
+        return self
+
+    def load_data(self, loader_cls=StaticLoader, **kwargs) -> DataLoader:
+        ''' Feeds the session's cerebro by a new loader of loader_cls, kwargs are passed to its load_feeds '''
+        loader = loader_cls(self.cerebro)
+        loader.load_feeds(**kwargs)
+        self.loaders.append(loader)
+        self.load_arguments.append(kwargs)
+        return loader
+
+    def use_indicator_store(self, store: IndicatorStore):
+        ''' The talib indicators the strategies ask for by indicator() are read from the store when it has them, runonce only '''
+        self.indicators.store = store
+        return self
+
+    def add_analyzer(self, analyzer: bt.Analyzer, **kwargs):
+        self.cerebro.addanalyzer(analyzer, **kwargs)
+        return self
+
+    def add_analyzers(self):
+        ''' The analyzers of the statistics report (see show_statistics) '''
+        self.add_analyzer(BasicTradeStats, _name='basic_trade_stats', useStandardPrint=False)
+        self.add_analyzer(TradeAnalyzer)
+        self.add_analyzer(Exposer)
+        self.add_analyzer(bt.analyzers.DrawDown)
+        self.add_analyzer(bt.analyzers.SQN)
+        self.add_analyzer(bt.analyzers.SharpeRatio)
+        self.add_analyzer(bt.analyzers.SharpeRatio_A)
+        return self
+
+    def add_observers(self):
+        self.cerebro.addobserver(bt.observers.DrawDown)
+        self.cerebro.addobserver(bt.observers.LogReturns, timeframe=TimeFrame.Months, compression=0)
+        return self
+
+    def clean_output(self):
+        utils.clean_previous_output(self.output_dir)
+
+    def run(self) -> list[bt.Strategy]:
+        self.cerebro.broker.setcash(self.cash)
+        self.cerebro.broker.set_shortcash(False)
+        loginfo(f'Strating portfolio value: {self.cerebro.broker.getvalue():.2f}')
+        self.strategies = self.cerebro.run()
+        if self.indicators.created:
+            self.indicators.report()
+        if self.indicators.store is not None:
+            self.indicators.store.evict()
+        return self.strategies
+
+    def run_cached(self, cache: ResultCache, exclude_symbols=()) -> RunResult:
+        '''
+        Returns the result of the run from the cache, when the same run (see result_key) was already done -
+        cerebro doesn't run at all then, and self.strategies stays None. Otherwise runs and caches the result.
+        Sessions fed by live data are never cached.
+        '''
+        if any(loader.filepaths is None for loader in self.loaders):
+            logwarning('session has feeds of live data, running without the result cache')
+            self.run()
+            return self.result(exclude_symbols)
+        filepaths = [filepath for loader in self.loaders for filepath in loader.filepaths]
+        key = result_key(self.cerebro, self.cash, self.load_arguments + [dict(exclude_symbols=list(exclude_symbols))], filepaths)
+        result = cache.get(key)
+        if result is not None:
+            loginfo(f'backtest result found in cache ({key[:12]}), skipping the run')
+            return result
+        self.run()
+        result = self.result(exclude_symbols)
+        cache.put(key, result)
+        return result
+
+    def result(self, exclude_symbols=()) -> RunResult:
+        ''' The picklable result of the first strategy of the run (see extract_result) '''
+        return extract_result(self.strategies[0], self.cash, exclude_symbols)
+
+    def show_statistics(self):
+        strategy = self.strategies[0]
+        loginfo(f'Final portfolio value: {self.cerebro.broker.getvalue():.2f}')
+        strategy.analyzers.basic_trade_stats.print()
+        print_trades_length(strategy.analyzers.tradeanalyzer)
+        strategy.analyzers.exposer.print()
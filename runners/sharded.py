@@ -0,0 +1,73 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import backtrader as bt
+from database.data_loader import StaticLoader
+from runners.results import RunResult, merge_results
+from runners.session import BacktestSession
+from runners.result_cache import ResultCache
+from logger import *
+
+REFERENCE_SYMBOLS = ['^GSPC.csv']  # feeds strategies read (e.g. market trend) rather than trade independently
+
+
+class ShardedBacktest():
+    '''
+    Runs a strategy over a universe of symbols split into shards - every shard runs in its own process on its own
+    Cerebro and the results are merged into the result of the whole universe (see merge_results).
+    Suits strategies whose feeds are independent except for the portfolio cash, like the TradeStateStrategy ones.
+
+    The cash is split between the shards by their number of symbols, so positions are sized against the capital
+    of the shard rather than of the whole portfolio. per_symbol runs every symbol as a shard of its own - each symbol
+    trades its own independent capital.
+    Reference symbols are loaded into every shard, their trades are reported from the first shard only.
+    '''
+
+    def __init__(self, strategy: bt.Strategy, start_date: datetime, end_date: datetime, cash=10000.0, strategy_params: dict = None,
+                 analyzers: list = (), reference_symbols: list = REFERENCE_SYMBOLS, dirpath='data_feeds', loader_kwargs: dict = None, result_cache: ResultCache = None):
+        '''
+        analyzers - list of (analyzer class, kwargs) added to every shard
+        loader_kwargs - passed to StaticLoader.load_feeds
+        result_cache - shards whose results are in the cache are not run again
+        '''
+        self.strategy = strategy
+        self.start_date, self.end_date = start_date, end_date
+        self.cash = cash
+        self.strategy_params = strategy_params or {}
+        self.analyzers = list(analyzers)
+        self.reference_symbols = list(reference_symbols)
+        self.dirpath = dirpath
+        self.loader_kwargs = loader_kwargs or {}
+        self.result_cache = result_cache
+
+    def run(self, stock_names: list, workers: int = None, per_symbol=False) -> RunResult:
+        workers = workers or os.cpu_count()
+        symbols = [stock for stock in stock_names if stock not in self.reference_symbols]
+        shards = [[symbol] for symbol in symbols] if per_symbol else split(symbols, workers)
+        cash_per_symbol = self.cash / max(len(symbols), 1)
+        jobs = [(shard, cash_per_symbol * len(shard), i > 0) for i, shard in enumerate(shards)]
+        loginfo(f'backtesting {self.strategy.__name__} on {len(symbols)} symbols in {len(shards)} shards by {workers} workers')
+        if workers <= 1:
+            results = [self.run_shard(*job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(self.run_shard, *zip(*jobs)))
+        return merge_results(results)
+
+    def run_shard(self, symbols: list, cash: float, exclude_references=False) -> RunResult:
+        session = BacktestSession(cash=cash)
+        session.load_data(StaticLoader, start_date=self.start_date, end_date=self.end_date, dirpath=self.dirpath, stock_names=self.reference_symbols + symbols, **self.loader_kwargs)
+        session.add_strategy(self.strategy, **self.strategy_params)
+        for analyzer, kwargs in self.analyzers:
+            session.add_analyzer(analyzer, **kwargs)
+        excluded = [os.path.splitext(symbol)[0] for symbol in self.reference_symbols] if exclude_references else []
+        if self.result_cache is not None:
+            return session.run_cached(self.result_cache, exclude_symbols=excluded)
+        session.run()
+        return session.result(exclude_symbols=excluded)
+
+
+def split(symbols: list, shards: int) -> list:
+    ''' Splits the symbols into (at most) the number of shards, round robin so every shard gets a mix of the universe '''
+    shards = max(1, min(shards, len(symbols)))
+    return [symbols[i::shards] for i in range(shards)]
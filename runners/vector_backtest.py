@@ -0,0 +1,150 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, time
+import numpy as np
+import pandas as pd
+from backtrader.utils.date import num2date, time2num
+from database.array_feed import FeedArrays, ORDINAL_OF_EPOCH
+from runners.results import RunResult, TradeRecord
+from runners.scanner import between
+from strategies.conditions import Pattern
+from logger import *
+
+VECTOR_BACKTEST = 'vectorbacktest'  # the name of the analysis of the run
+SESSION_END = time2num(time(23, 59, 59, 999990))  # the default sessionend of backtrader's feeds, which stamps their daily bars
+
+
+@dataclass
+class Signals:
+    ''' The orders of a long only strategy on the bars of a feed - bool arrays of its length, and the size by bar '''
+    entries: np.ndarray  # buy when there's no position
+    exits: np.ndarray  # close the position
+    percents: np.ndarray = None  # of the broker value to buy by on each bar (as PortionSizer's percents), the backtest's percents when None
+
+
+@dataclass
+class _Trade:
+    row: int  # the bar of the feed it was opened on
+    size: float
+    price: float
+    commission: float
+    record: TradeRecord
+
+
+class VectorBacktest():
+    '''
+    Backtests a long only strategy of market orders given as Signals per symbol - the entries and exits computed on
+    the whole arrays of the feeds at once, e.g. by the entry and exit of a Pattern (see pattern_signals). Runs as a
+    backtrader run of such a strategy, with a PortionSizer and a percent commission:
+    an order of a bar is filled on the open of the next bar of its feed, and none is placed on the last bar.
+    An entry is sized by the broker value at the close of its bar - the cash and the positions by their last close.
+    A position is closed on the next open after an exit, or after max_bars bars of holding it
+    (as `len(data) - trade.baropen > max_bars`). Entries are ignored while there's a position or a pending order.
+
+    Only the bars with signals (and those max_bars after a fill) are evaluated, and the equity curve is computed from
+    the fills at the end, so a run takes a fraction of the time of the event engine - which remains the one for
+    strategies of stops, brackets or orders depending on the fills.
+    Unlike backtrader, which checks the cash at the submission of an order, an entry the cash can't pay for at the fill is rejected.
+    '''
+
+    def __init__(self, cash=10000.0, commission=0.0, percents=10.0, max_bars: int = None):
+        ''' commission - the fraction of the value of a fill, as cerebro.broker.setcommission(commission) '''
+        self.cash = cash
+        self.commission = commission
+        self.percents = percents
+        self.max_bars = max_bars
+
+    def run(self, feeds: dict[str, FeedArrays], signals: dict[str, Signals]) -> RunResult:
+        ''' Orders are placed in the order of the symbols on each bar, as a strategy looping over its datas places them '''
+        symbols = list(feeds)
+        dates = np.unique(np.concatenate([feeds[symbol].dates for symbol in symbols])) if symbols else np.array([], dtype='datetime64[s]')
+        rows = [np.searchsorted(dates, feeds[symbol].dates) for symbol in symbols]  # the calendar row of every bar of the feeds
+        closes = np.full((len(dates), len(symbols)), np.nan)
+        for column, symbol in enumerate(symbols):
+            closes[rows[column], column] = feeds[symbol]['close']
+        closes = pd.DataFrame(closes).ffill().fillna(0.0).to_numpy()  # the last close on the rows a feed has no bar
+        stamps = [num2date(day + SESSION_END) for day in (dates.astype('datetime64[D]').astype(np.int64) + ORDINAL_OF_EPOCH).tolist()]  # as the datetime of the bars
+
+        checks = defaultdict(set)  # calendar row -> the columns to check for orders on it
+        for column, symbol in enumerate(symbols):
+            for row in rows[column][np.flatnonzero(np.asarray(signals[symbol].entries, dtype=bool) | np.asarray(signals[symbol].exits, dtype=bool))]:
+                checks[row].add(column)
+        fills = defaultdict(list)  # calendar row -> the (column, bar, size) orders filled on it, size 0 closes the position
+        cash, positions = self.cash, np.zeros(len(symbols))
+        cash_changes, size_changes = np.zeros(len(dates)), np.zeros((len(dates), len(symbols)))
+        opened: dict[int, _Trade] = {}
+        pending, trades, rejected = set(), [], 0
+
+        for row in range(len(dates)):
+            for column, bar, size in fills.pop(row, []):
+                pending.discard(column)
+                symbol, price = symbols[column], feeds[symbols[column]]['open'][bar]
+                if size:
+                    commission = size * price * self.commission
+                    if size * price + commission > cash:
+                        rejected += 1
+                        logdebug(f'{symbol} entry of {size:.2f} at {price:.2f} rejected - not enough cash ({cash:.2f})')
+                        continue
+                    cash_change = -size * price - commission
+                    record = TradeRecord(symbol, price, size, stamps[row], None, 0, 0.0, -commission, False)
+                    opened[column] = _Trade(bar, size, price, commission, record)
+                    trades.append(record)
+                    if self.max_bars is not None:
+                        self._check_at(checks, rows[column], bar + self.max_bars + 1, column)
+                else:
+                    trade = opened.pop(column)
+                    size = -trade.size
+                    commission = trade.size * price * self.commission
+                    cash_change = trade.size * price - commission
+                    pnl = trade.size * (price - trade.price)
+                    trade.record.size, trade.record.isclosed = 0.0, True
+                    trade.record.close_datetime, trade.record.barlen = stamps[row], bar - trade.row
+                    trade.record.pnl, trade.record.pnlcomm = pnl, pnl - trade.commission - commission
+                cash += cash_change
+                positions[column] += size
+                cash_changes[row] += cash_change
+                size_changes[row, column] += size
+
+            columns = sorted(column for column in checks.pop(row, ()) if column not in pending)
+            if not columns:
+                continue
+            value = cash + positions @ closes[row]
+            for column in columns:
+                symbol = symbols[column]
+                bar = np.searchsorted(rows[column], row)
+                if bar + 1 >= len(rows[column]) or rows[column][bar] != row:
+                    continue  # no next bar to fill on, or a check of a bar the feed doesn't have
+                if column in opened:
+                    held = bar - opened[column].row
+                    if signals[symbol].exits[bar] or (self.max_bars is not None and held > self.max_bars):
+                        self._order(fills, pending, rows[column], column, bar, 0.0)
+                elif signals[symbol].entries[bar]:
+                    percents = self.percents if signals[symbol].percents is None else signals[symbol].percents[bar]
+                    self._order(fills, pending, rows[column], column, bar, value / feeds[symbol]['close'][bar] * (percents / 100))
+
+        equity = self.cash + np.cumsum(cash_changes) + (np.cumsum(size_changes, axis=0) * closes).sum(axis=1)
+        if rejected:
+            loginfo(f'{rejected} entries rejected for lack of cash')
+        return RunResult(self.cash, trades, pd.Series(equity, index=pd.DatetimeIndex(stamps)),
+                         [{VECTOR_BACKTEST: dict(rejected=rejected)}])
+
+    @staticmethod
+    def _order(fills, pending, rows, column, bar, size):
+        ''' An order of the bar, filled on the open of the next bar of the feed '''
+        fills[rows[bar + 1]].append((column, bar + 1, size))
+        pending.add(column)
+
+    @staticmethod
+    def _check_at(checks, rows, bar, column):
+        if bar < len(rows):
+            checks[rows[bar]].add(column)
+
+
+def pattern_signals(feeds: dict[str, FeedArrays], pattern: Pattern, params: dict, start_date: datetime = None,
+                    end_date: datetime = None) -> tuple[dict[str, FeedArrays], dict[str, Signals]]:
+    '''
+    The bars of the feeds between the dates, and the Signals of the entry and exit of the pattern on them -
+    its lines computed on the bars between the dates, as a backtest between them computes the strategy's indicators.
+    '''
+    bars = {symbol: between(feed, start_date, end_date) for symbol, feed in feeds.items()}
+    return bars, {symbol: Signals(*pattern.signals(feed, params)) for symbol, feed in bars.items()}
@@ -0,0 +1,90 @@
+from dataclasses import dataclass
+from datetime import datetime
+import pandas as pd
+import backtrader as bt
+from runners.optimizer import ParameterSweep, rank
+from runners.results import RunResult, chain_results, metrics
+from logger import *
+
+
+@dataclass
+class Window:
+    ''' Dates of a walk-forward step - the params are chosen on [train_start, train_end) and run on [test_start, test_end) '''
+    train_start: datetime
+    train_end: datetime
+    test_start: datetime
+    test_end: datetime
+
+
+def rolling_windows(start_date: datetime, end_date: datetime, train_months: int, test_months: int, anchored=False) -> list[Window]:
+    '''
+    Consecutive test periods of test_months from start_date + train_months until end_date (the last one may be shorter),
+    each trained on the train_months before it - or on everything since start_date when anchored.
+    '''
+    windows = []
+    test_start = _add_months(start_date, train_months)
+    while test_start < end_date:
+        test_end = min(_add_months(test_start, test_months), end_date)
+        train_start = start_date if anchored else _add_months(test_start, -train_months)
+        windows.append(Window(train_start, test_start, test_start, test_end))
+        test_start = test_end
+    return windows
+
+
+@dataclass
+class WalkForwardResult:
+    windows: list[Window]
+    params: list[dict]  # the chosen params of every window
+    train: pd.DataFrame  # a row of params and in-sample metrics per window and combination
+    tests: list[RunResult]  # the out-of-sample run of every window
+    out_of_sample: RunResult  # the tests chained one after the other (see chain_results)
+
+    def summary(self) -> pd.DataFrame:
+        ''' A row per window - its dates, the chosen params and the metrics of the out-of-sample run '''
+        return pd.DataFrame([{**vars(window), **params, **metrics(test)} for window, params, test in zip(self.windows, self.params, self.tests)])
+
+
+class WalkForward():
+    '''
+    Walk-forward optimization: for every window (see rolling_windows) the params are searched on the train period,
+    the best ones by `metric` are run on the test period that follows it, and the out-of-sample runs are chained
+    into one equity curve.
+
+    The universe is read once for the whole date range (see ParameterSweep.load) - every run, in-sample or
+    out-of-sample, views the same arrays between the dates of its period, nothing is read per window.
+    The searches of all the windows run together in one pool of workers, then the out-of-sample runs in another.
+    Every period starts without history, so indicators warm up again at the start of each one.
+    '''
+
+    def __init__(self, strategy: bt.Strategy, start_date: datetime, end_date: datetime, train_months: int, test_months: int, cash=10000.0,
+                 strategy_params: dict = None, analyzers: list = (), anchored=False, metric='return_percent', maximize=True, dirpath='data_feeds', cache_dir=None):
+        '''
+        metric - the column of metrics() to choose the params by (see rank)
+        Other arguments as of ParameterSweep and rolling_windows.
+        '''
+        self.sweep = ParameterSweep(strategy, start_date, end_date, cash, strategy_params, analyzers, dirpath, cache_dir)
+        self.windows = rolling_windows(start_date, end_date, train_months, test_months, anchored)
+        self.metric = metric
+        self.maximize = maximize
+
+    def load(self, stock_names: list, workers=1) -> 'WalkForward':
+        self.sweep.load(stock_names, workers)
+        return self
+
+    def run(self, combinations: list[dict], workers: int = None) -> WalkForwardResult:
+        loginfo(f'walking forward {len(self.windows)} windows, {len(combinations)} combinations each')
+        calls = [('run_combination', params, window.train_start, window.train_end) for window in self.windows for params in combinations]
+        rows = [None] * len(calls)
+        for i, row in self.sweep.execute(calls, workers):
+            rows[i] = dict(window=i // len(combinations), **row)
+        train = pd.DataFrame(rows)
+        chosen = [combinations[rank(train[train['window'] == i], self.metric, self.maximize)[0]] for i in range(len(self.windows))]
+        calls = [('backtest', params, window.test_start, window.test_end) for window, params in zip(self.windows, chosen)]
+        tests = [None] * len(calls)
+        for i, result in self.sweep.execute(calls, workers):
+            tests[i] = result
+        return WalkForwardResult(self.windows, chosen, train, tests, chain_results(tests))
+
+
+def _add_months(date: datetime, months: int) -> datetime:
+    return (pd.Timestamp(date) + pd.DateOffset(months=months)).to_pydatetime()
@@ -10,6 +10,9 @@ from backtrader_plotting.schemes import Blackly, Tradimo
 from backtrader import observers
 import globals as gb
 from money_mgmt.sizers import PortionSizer
+from custom_indicators.registry import IndicatorRegistry
+from strategies.trade_book import TradeBook
+from strategies.trigger_index import ActiveSet
 from logger import *
 
 
@@ -19,23 +22,36 @@ Base class for strategy of multiple feeds
 
 class BaseStrategy(bt.Strategy):
 
+    # opt-in - visit on every bar only the stocks whose trigger (see set_trigger) is set, which have pending orders or an open position
+    active_set = False
+
     def __init__(self):
         self.stocks = self.datas
+        self.trade_book = TradeBook(self)
         self.setsizer(PortionSizer())
         self.prepare_strategy()
         for stock in self.stocks:
             self.prepare_stock(stock)
+        if self.active_set:
+            missing = [stock._name for stock in self.stocks if getattr(stock, 'trigger', None) is None]
+            if missing:
+                raise Exception(f'active_set strategies must set_trigger of every stock in prepare_stock, missing for: {missing}')
+            self.active_stocks = ActiveSet(self.stocks, [stock.trigger for stock in self.stocks])
  
     def next(self):
         # TODO redesign
         self.on_next_bar()
-        for stock in self.stocks:
+        for stock in self.active_stocks.active(self.datetime[0]) if self.active_set else self.stocks:
             if not self.getposition(data=stock):
                 self.check_signals(stock)
             else:
                 self.manage_position(stock)
 
 
+    def indicator(self, cls, *args, **kwargs):
+        ''' cls(*args, **kwargs), or the same indicator when the session already has it (see IndicatorRegistry) '''
+        return IndicatorRegistry.of(self.env).get(self, cls, *args, **kwargs)
+
     @staticmethod
     def add_indicator(stock, indicator, attr_name=None, subplot=None):
         stock.indicators = stock.indicators if hasattr(stock, 'indicators') else []
@@ -47,6 +63,16 @@ class BaseStrategy(bt.Strategy):
             setattr(stock, attr_name, indicator)
         return indicator
     
+    @staticmethod
+    def set_trigger(stock, line):
+        '''
+        Declares the line (an indicator or a condition on lines, computed ahead by runonce) that is non zero on the bars
+        check_signals may open a position at - with active_set the stock isn't visited on other bars while it has
+        no pending orders and no position
+        '''
+        stock.trigger = line
+        return line
+
     @staticmethod
     def set_plot_for_indicators(stock, is_plot):
         if hasattr(stock, 'indicators'):
@@ -80,6 +106,12 @@ class BaseStrategy(bt.Strategy):
         raise NotImplementedError
 
     def notify_order(self, order: bt.Order):
+        if self.active_set:
+            self.active_stocks.track(order, self.getposition(order.data).size)
+        self.log_order(order)
+
+    @staticmethod
+    def log_order(order: bt.Order):
         if order.status in [bt.Order.Canceled, bt.Order.Submitted]:
             logdebug(f'order #{order.ref} {order.getstatusname()}, {order.ordtypename()}, {order.getordername()}, price: {order.price or order.created.price:.2f} created price: {order.created.price:.2f}, size: {order.size:.2f}', order.data)
         if order.status in [bt.Order.Completed, bt.Order.Partial]:
@@ -89,14 +121,12 @@ class BaseStrategy(bt.Strategy):
 
 
     def notify_trade(self, trade: bt.Trade):
+        self.trade_book.notify(trade)
         if (trade.status <= 1): # created or open
             loginfo(f'{"long" if trade.size>0 else "short"} trade {trade.status_names[trade.status]}, price: {trade.price:.2f}, size: {trade.size:.2f}, date: {trade.open_datetime().date()}', trade.data)
         else: # closed
             loginfo(f'trade {trade.status_names[trade.status]}, pnl: {trade.pnl:.0f}, date: {trade.close_datetime().date()} bars: {trade.barlen}', trade.data)
 
-    def get_opened_trade(self, stock): #TODO handle trade management by my strategy
-        trades : AutoDictList = self._trades[stock]  # self._trades[stock] is {data: {order_id: [trades]}}
-        open_trades = [t for t in itertools.chain(*self._trades[stock].values()) if t.isopen]
-        if len(open_trades) > 1:
-            raise Exception('Warning - more than one open position for %s, trades: %s'%(stock, open_trades))
-        return open_trades[0]
+    def get_opened_trade(self, stock):
+        ''' The open trade of the stock, raises when it has none - self.trade_book.opened(stock) returns None instead '''
+        return self.trade_book.open_trade(stock)
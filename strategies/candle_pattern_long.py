@@ -5,14 +5,20 @@ from backtrader import talib
 from backtrader.order import Order
 
 from strategies.trade_state_strategy import TradeState, TradeStateStrategy
+from strategies.trigger_index import WakeUp
+from strategies import conditions
 from backtrader import indicators
 from globals import *
 from logger import *
-from custom_indicators import visualizers
+from custom_indicators import visualizers, vectorized
+from custom_indicators.market_regime import MarketRegime
 
 
 class CandlePatternLong(TradeStateStrategy):
     
+    pattern = conditions.CANDLE_PATTERN_LONG  # the entry condition of LookForEntry, for scanning the universe
+    event_driven = True
+
     params = {
         'atr_period': 13,
         'highs_period': 37,
@@ -25,13 +31,14 @@ class CandlePatternLong(TradeStateStrategy):
     def __init__(self):
         super().__init__()
         self.setsizer(RiskBasedWithMaxPortionSizer(risk_per_trade_percents=3.0, max_portion_percents=28))
+        self.market = MarketRegime(self, '^GSPC', fast=self.p.ema_fast, medium=self.p.ema_meduim, slow=self.p.ema_slow)
 
     def prepare_feed(self, feed):
-        feed.atr = talib.ATR(feed.high,feed.low,feed.close, timeperiod=self.p.atr_period, plot=False)
-        feed.tr = talib.ATR(feed.high,feed.low,feed.close, timeperiod=1, plot=False)
-        feed.doji_star = talib.CDLDOJISTAR(feed.open, feed.high, feed.low, feed.close, plot=False) 
-        feed.highest = indicators.Highest(feed.high, period=self.p.highs_period, subplot=False)
-        feed.lowest = indicators.Lowest(feed.low, period=self.p.highs_period, subplot=False)
+        feed.atr = self.indicator(talib.ATR, feed.high,feed.low,feed.close, timeperiod=self.p.atr_period, plot=False)
+        feed.tr = self.indicator(talib.ATR, feed.high,feed.low,feed.close, timeperiod=1, plot=False)
+        feed.doji_star = self.indicator(talib.CDLDOJISTAR, feed.open, feed.high, feed.low, feed.close, plot=False) 
+        feed.highest = self.indicator(vectorized.Highest, feed.high, period=self.p.highs_period, subplot=False)
+        feed.lowest = self.indicator(vectorized.Lowest, feed.low, period=self.p.highs_period, subplot=False)
         feed.highest_breakout = feed.high > feed.highest(-1)
         feed.doji_star_marker = visualizers.SingleMarker(signals=feed.doji_star, level=feed.low*.985, color='purple', marker='hexagram', plotmaster=feed, markersize=7) 
         feed.highest_breakout_marker = visualizers.SingleMarker(signals=feed.highest_breakout, level=feed.high*1.02 ,plotmaster=feed, color='orange', markersize=6, plot=False)
@@ -41,10 +48,10 @@ class CandlePatternLong(TradeStateStrategy):
         feed.close.extend(size=1)
 
         # trend analysis
-        feed.ema_fast = indicators.EMA(feed.close, period=self.p.ema_fast, plot=True)
-        feed.ema_meduim = indicators.EMA(feed.close, period=self.p.ema_meduim, plot=True)
-        feed.ema_slow = indicators.EMA(feed.close, period=self.p.ema_slow, plot=True)
-        feed.trend_line = bt.And((feed.ema_fast > feed.ema_meduim),(feed.ema_meduim > feed.ema_slow)) - bt.And((feed.ema_fast < feed.ema_meduim),(feed.ema_meduim < feed.ema_slow))
+        feed.ema_fast = self.indicator(vectorized.EMA, feed.close, period=self.p.ema_fast, plot=True)
+        feed.ema_meduim = self.indicator(vectorized.EMA, feed.close, period=self.p.ema_meduim, plot=True)
+        feed.ema_slow = self.indicator(vectorized.EMA, feed.close, period=self.p.ema_slow, plot=True)
+        feed.trend_line = self.indicator(vectorized.TrendLine, feed.ema_fast, feed.ema_meduim, feed.ema_slow, plot=False)
         feed.trend = indicators.MovingAverageSimple(feed.trend_line, period=1, plot=True, plotmaster=feed, subplot=True) # using MA with period=1 as a workaround to be able to plot trend_line
 
 
@@ -63,34 +70,19 @@ class CandlePatternLong(TradeStateStrategy):
             loginfo(f'take profit 2 done by {order.getordername()} order')
 
     def market_downtrend(self):
-        index = self.getdatabyname('^GSPC')
-        return index.trend == -1
+        return self.market.downtrend()
     
     def risk_factor(self):
-        index = self.getdatabyname('^GSPC')
-        if index.trend == -1:
-            risk = 3
-        elif index.trend == 0:
-            risk = 2
-        else:
-            risk =1
-        return risk
+        return self.market.risk_factor()
 
     class LookForEntry(TradeState):
+        wake_up = WakeUp(line='doji_star')  # no entry without a doji star
+
         def next(self):
             if self.strategy.getposition(self.feed):
                 return
             volatility = 1.4*self.feed.atr[0]
-            if (
-                self.feed.doji_star[0] > 0 
-                and self.feed.open[1] > self.feed.low[0]
-                and self.feed.lowest[-1] + self.feed.atr[0]/3 >= self.feed.low[0] >= self.feed.lowest[-1]
-                # and self.feed.ema_very_fast[0] > self.feed.ema_fast[0] > self.feed.ema_slow[0]
-                # and self.feed.ema_very_fast[0] < self.feed.ema_very_fast[-1] < self.feed.ema_very_fast[-2]
-                and self.feed.tr[0] >= self.feed.atr[-1] * 1
-                # and self.feed.open[1] - self.feed.close[0] > self.feed.atr[0] * .2
-                # and self.feed.trend[0] > -1 
-                ):
+            if conditions.candle_pattern_entry(self.feed):
                 stopprice = self.feed.low[0] - volatility
                 risk = self.feed.open[1] - stopprice
                 self.feed.risk = lambda : (self.feed.open[1] - stopprice) * self.strategy.risk_factor()
@@ -107,6 +99,7 @@ class CandlePatternLong(TradeStateStrategy):
 
 
     class Tp1(TradeState):
+        wake_up = WakeUp()  # the position changes by order events only
 
         def next(self):
             self.validate()
@@ -138,6 +131,8 @@ class CandlePatternLong(TradeStateStrategy):
                 self.strategy.change_state(self, CandlePatternLong.Tp2(self.strategy, self.feed, self.entry, self.stoploss, self.takeprofit))
 
     class Tp2(TradeState):
+        wake_up = WakeUp()
+
         def next(self):
             pass
 
@@ -0,0 +1,194 @@
+import math
+from dataclasses import dataclass
+from typing import Callable
+import numpy as np
+import talib
+from numpy.lib.stride_tricks import sliding_window_view
+from custom_indicators.vectorized import exponential_smoothing
+from database.array_feed import FeedArrays
+
+
+class Series():
+    '''
+    A line of a whole feed for the scanner: series[ago] is the array of what line[ago] reads on every bar -
+    series[-1] the previous bar's value, series[1] the next one's (NaN where there is none).
+    '''
+
+    def __init__(self, values):
+        self.values = np.asarray(values, dtype=np.float64)
+
+    def __getitem__(self, ago: int) -> np.ndarray:
+        if ago == 0:
+            return self.values
+        shifted = np.full(len(self.values), np.nan)
+        if ago > 0:
+            shifted[:-ago] = self.values[ago:]
+        else:
+            shifted[-ago:] = self.values[:ago]
+        return shifted
+
+
+class ScanFeed():
+    ''' The bars of a feed as Series (open, high, ...), to add the lines of a pattern to - as prepare_feed adds them to a feed '''
+
+    def __init__(self, bars: FeedArrays):
+        self.dates = bars.dates
+        for name, values in bars.columns.items():
+            setattr(self, name, Series(values))
+
+
+@dataclass(frozen=True)
+class Pattern:
+    '''
+    An entry condition shared by a strategy and the scanner (or a necessary condition of the entry, for prescreening).
+    `entry(feed)` reads the lines of the feed by [ago] and combines the comparisons by & and | - so on a strategy's feed
+    it evaluates the current bar, and on a ScanFeed it evaluates all the bars at once. `lines(feed, params)` adds the
+    lines entry() reads to a ScanFeed, computed as the strategy's indicators compute them. `exit(feed)`, of strategies
+    that exit by a condition of the lines only, is evaluated the same way - for the vectorized backtest
+    (see runners.vector_backtest).
+    '''
+    lines: Callable[[ScanFeed, dict], None]
+    entry: Callable[[object], object]
+    exit: Callable[[object], object] = None
+
+    def hits(self, bars: FeedArrays, params: dict) -> np.ndarray:
+        ''' Whether the entry condition holds on each of the bars '''
+        feed = ScanFeed(bars)
+        self.lines(feed, params)
+        return np.asarray(self.entry(feed), dtype=bool)
+
+    def signals(self, bars: FeedArrays, params: dict) -> tuple[np.ndarray, np.ndarray]:
+        ''' Whether the entry condition, and the exit condition, hold on each of the bars '''
+        feed = ScanFeed(bars)
+        self.lines(feed, params)
+        exits = self.exit(feed) if self.exit is not None else np.zeros(len(bars), dtype=bool)
+        return np.asarray(self.entry(feed), dtype=bool), np.asarray(exits, dtype=bool)
+
+
+def highest(values: np.ndarray, period: int) -> np.ndarray:
+    return _rolling(values, period, np.max)
+
+
+def lowest(values: np.ndarray, period: int) -> np.ndarray:
+    return _rolling(values, period, np.min)
+
+
+def average(values: np.ndarray, period: int) -> np.ndarray:
+    ''' The mean of the last period values, summed by math.fsum as backtrader's SMA does '''
+    return _rolling(values, period, lambda windows, axis: np.array([math.fsum(window) for window in windows.tolist()]) / period)
+
+
+def rsi(values: np.ndarray, period: int) -> np.ndarray:
+    ''' As bt.indicators.RSI - the ratio of the smoothed (by 1 / period) up and down moves, as 0 to 100 '''
+    moves = Series(values)[0] - Series(values)[-1]
+    up = exponential_smoothing(np.maximum(moves, 0.0), period, 1.0 / period)
+    down = exponential_smoothing(np.maximum(-moves, 0.0), period, 1.0 / period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 100.0 - 100.0 / (1.0 + up / down)
+
+
+def crossover(fast: np.ndarray, slow: np.ndarray) -> np.ndarray:
+    '''
+    As bt.indicators.CrossOver - 1 on the bars fast crosses above slow, -1 on those it crosses below, 0 otherwise.
+    A cross is taken from the last bar the lines weren't equal, as the NonZeroDifference of backtrader.
+    '''
+    difference = fast - slow
+    kept = difference != 0  # and NaN
+    if len(difference):
+        kept[np.argmax(~np.isnan(difference))] = True  # the first difference is kept even if 0
+    nonzero = Series(difference[np.maximum.accumulate(np.where(kept, np.arange(len(difference)), 0))])
+    return ((nonzero[-1] < 0) & (fast > slow)).astype(np.float64) - ((nonzero[-1] > 0) & (fast < slow))
+
+
+def _rolling(values: np.ndarray, period: int, reduce) -> np.ndarray:
+    rolled = np.full(len(values), np.nan)
+    if len(values) >= period:
+        rolled[period - 1:] = reduce(sliding_window_view(values, period), axis=1)
+    return rolled
+
+
+def candle_pattern_lines(feed: ScanFeed, params: dict):
+    ''' The lines of CandlePatternLong.prepare_feed its entry reads '''
+    high, low, open, close = feed.high[0], feed.low[0], feed.open[0], feed.close[0]
+    feed.atr = Series(talib.ATR(high, low, close, timeperiod=params['atr_period']))
+    feed.tr = Series(talib.ATR(high, low, close, timeperiod=1))
+    feed.doji_star = Series(talib.CDLDOJISTAR(open, high, low, close))
+    feed.lowest = Series(lowest(low, params['highs_period']))
+
+
+def candle_pattern_entry(feed):
+    ''' A doji star at the lows of the period, with a true range of at least the ATR, the next bar opening above its low '''
+    return ((feed.doji_star[0] > 0)
+            & (feed.open[1] > feed.low[0])
+            & (feed.lowest[-1] + feed.atr[0] / 3 >= feed.low[0])
+            & (feed.low[0] >= feed.lowest[-1])
+            # & (feed.ema_very_fast[0] > feed.ema_fast[0]) & (feed.ema_fast[0] > feed.ema_slow[0])
+            # & (feed.ema_very_fast[0] < feed.ema_very_fast[-1]) & (feed.ema_very_fast[-1] < feed.ema_very_fast[-2])
+            # & (feed.open[1] - feed.close[0] > feed.atr[0] * .2)
+            # & (feed.trend[0] > -1)
+            & (feed.tr[0] >= feed.atr[-1]))
+
+
+def classic_breakout_lines(feed: ScanFeed, params: dict):
+    ''' The lines of ClassicBreakout.prepare_feed its entry reads '''
+    high, low, open, close = feed.high[0], feed.low[0], feed.open[0], feed.close[0]
+    feed.highest = Series(highest(high, params['highs_period']))
+    feed.highest_breakout = Series(high > feed.highest[-1])
+    feed.volume_avg = Series(average(feed.volume[0], params['highs_period']))
+    feed.bulish_candle = Series(talib.CDLMARUBOZU(open, high, low, close) > 0)
+    feed.bulish_candle2 = Series(talib.CDLCLOSINGMARUBOZU(open, high, low, close) > 0)
+
+
+def classic_breakout_entry(feed):
+    ''' A breakout of the period's highest high by a marubozu candle on twice the average volume '''
+    return ((feed.volume[0] > feed.volume_avg[0] * 2)
+            & ((feed.bulish_candle[0] > 0) | (feed.bulish_candle2[0] > 0))
+            & (feed.highest_breakout[0] > 0))
+
+
+def highest_highs_lines(feed: ScanFeed, params: dict):
+    ''' The breakouts of HighestHighsBreakoutStrategy.prepare_feed, and whether there was one in the last entry_period bars '''
+    high = feed.high[0]
+    feed.highest = Series(highest(high, params['highs_period']))
+    feed.highest_breakout = Series(high > feed.highest[-1])
+    feed.recent_breakout = Series(highest(feed.highest_breakout[0], params['entry_period']))
+
+
+def highest_highs_could_enter(feed):
+    ''' Necessary for the entry of HighestHighsBreakoutStrategy - its buy level is set only in the entry_period bars since a breakout '''
+    return feed.recent_breakout[0] > 0
+
+
+def rsi_and_sma_lines(feed: ScanFeed, params: dict):
+    ''' The lines of RsiAndMovingAverageStrategy.prepare_stock '''
+    feed.rsi = Series(rsi(feed.close[0], params['rsi_period']))
+    feed.sma = Series(average(feed.close[0], params['sma_period']))
+
+
+def rsi_and_sma_entry(feed):
+    ''' An oversold RSI in an uptrend - a close above the moving average '''
+    return (feed.rsi[0] < 30) & (feed.close[0] > feed.sma[0])
+
+
+def rsi_and_sma_exit(feed):
+    return feed.rsi[0] > 40
+
+
+def sma_cross_lines(feed: ScanFeed, params: dict):
+    ''' The crossover of the moving averages of SmaCross (samples/hello_bt_signals.py) '''
+    feed.crossover = Series(crossover(average(feed.close[0], params['pfast']), average(feed.close[0], params['pslow'])))
+
+
+def sma_cross_entry(feed):
+    return feed.crossover[0] > 0
+
+
+def sma_cross_exit(feed):
+    return feed.crossover[0] < 0
+
+
+CANDLE_PATTERN_LONG = Pattern(candle_pattern_lines, candle_pattern_entry)
+CLASSIC_BREAKOUT = Pattern(classic_breakout_lines, classic_breakout_entry)
+HIGHEST_HIGHS_BREAKOUT = Pattern(highest_highs_lines, highest_highs_could_enter)
+RSI_AND_SMA = Pattern(rsi_and_sma_lines, rsi_and_sma_entry, rsi_and_sma_exit)
+SMA_CROSS = Pattern(sma_cross_lines, sma_cross_entry, sma_cross_exit)
@@ -9,10 +9,10 @@ from backtrader import Indicator, indicators
 # profit - half portion at stop distance, second half 3 times than doji size
 class DojiLongStrategy(BaseStrategy):
 
-
     def prepare_stock(self, stock):
-        stock.doji = talib.CDLDOJISTAR(stock.open, stock.high, stock.low, stock.close)
+        stock.doji = self.indicator(talib.CDLDOJISTAR, stock.open, stock.high, stock.low, stock.close)
         stock.doji.plotinfo.plot = False
+        self.set_trigger(stock, stock.doji)
         stock.ma_short = indicators.EMA(stock, period=3)
         stock.ma_long = indicators.EMA(stock, period=8)
 
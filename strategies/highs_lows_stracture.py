@@ -10,6 +10,8 @@ from backtrader.order import Order, OrderBase
 from enum import Enum
 from custom_indicators import visualizers
 from strategies.trade_state_strategy import TradeStateStrategy, TradeState
+from strategies.trigger_index import WakeUp
+from strategies import conditions
 from logger import *
 
 class Direction(Enum):
@@ -53,13 +55,13 @@ class HighsLowsStructure(BaseStrategy):
     allowed_directions = [Direction.SHORT, Direction.LONG]
 
     def prepare_stock(self, stock):
-        stock.atr = talib.ATR(stock.high, stock.low, stock.close, timeperiod=self.p.atr_period)
-        stock.highs= talib.MAX(stock, timeperiod=self.p.highs_period)
-        stock.lows = talib.MIN(stock, timeperiod=self.p.lows_period)
-        stock.highs_trend= talib.MAX(stock, timeperiod=self.p.atr_period)
-        stock.lows_trend = talib.MIN(stock, timeperiod=self.p.atr_period)
-        stock.long_ma = talib.SMA(stock, timeperiod=self.p.highs_period)
-        stock.short_ma = talib.SMA(stock, timeperiod=self.p.entry_period)
+        stock.atr = self.indicator(talib.ATR, stock.high, stock.low, stock.close, timeperiod=self.p.atr_period)
+        stock.highs= self.indicator(talib.MAX, stock, timeperiod=self.p.highs_period)
+        stock.lows = self.indicator(talib.MIN, stock, timeperiod=self.p.lows_period)
+        stock.highs_trend= self.indicator(talib.MAX, stock, timeperiod=self.p.atr_period)
+        stock.lows_trend = self.indicator(talib.MIN, stock, timeperiod=self.p.atr_period)
+        stock.long_ma = self.indicator(talib.SMA, stock, timeperiod=self.p.highs_period)
+        stock.short_ma = self.indicator(talib.SMA, stock, timeperiod=self.p.entry_period)
         stock.entry = None
         stock.direction = None
 
@@ -133,8 +135,8 @@ class HighLowsStructureImproved(BaseStrategy):
 
 
     def prepare_stock(self, stock):
-        stock.atr = talib.ATR(stock.high, stock.low, stock.close, timeperiod=self.p.atr_period)
-        stock.highest = talib.MAX(stock.high, timeperiod=self.p.highs_period)
+        stock.atr = self.indicator(talib.ATR, stock.high, stock.low, stock.close, timeperiod=self.p.atr_period)
+        stock.highest = self.indicator(talib.MAX, stock.high, timeperiod=self.p.highs_period)
         stock.highest_breakout = stock.high > stock.highest(-1)
         stock.highest._name = 'somename' ## Workaround for bug in Bokeh - cannot print feed.highest(-1) without this attribute
         stock.highs_breakout= visualizers.SingleMarker(signals=stock.highest_breakout, level=stock.high)
@@ -209,6 +211,8 @@ class HighLowsStructureImproved(BaseStrategy):
 
 
 class HighestHighsBreakoutStrategy(TradeStateStrategy):
+    pattern = conditions.HIGHEST_HIGHS_BREAKOUT  # could NoPosition enter, for prescreening the universe
+
     params = (
         ('atr_period', 20),
         ('highs_period', 63),
@@ -219,8 +223,8 @@ class HighestHighsBreakoutStrategy(TradeStateStrategy):
         return self.NoPosition
 
     def prepare_feed(self, feed):
-        feed.atr = talib.ATR(feed.high,feed.low,feed.close, timeperiod=self.p.atr_period)
-        feed.highest = talib.MAX(feed.high, timeperiod=self.p.highs_period)
+        feed.atr = self.indicator(talib.ATR, feed.high,feed.low,feed.close, timeperiod=self.p.atr_period)
+        feed.highest = self.indicator(talib.MAX, feed.high, timeperiod=self.p.highs_period)
         feed.highest_breakout = feed.high > feed.highest(-1)
         feed.highest._name = 'somename' ## Workaround for bug in Bokeh - cannot print feed.highest(-1) without this attribute
         feed.highs_breakout= visualizers.SingleMarker(signals=feed.highest_breakout, level=feed.high)
@@ -236,6 +240,8 @@ class HighestHighsBreakoutStrategy(TradeStateStrategy):
         order.data.state.notify_order(order)
 
     class NoPosition(TradeState):
+        wake_up = WakeUp(line='buy_level')  # no entry without a buy level
+
         def next(self):
             self.validate_no_position()
             if self.feed.buy_level[0] > 0 and self.no_gap() and self.feed.low[0] > self.feed.stop_level[0] and self.feed.low[1] <= self.feed.buy_level:
@@ -256,6 +262,8 @@ class HighestHighsBreakoutStrategy(TradeStateStrategy):
         
 
     class OpenPosition(TradeState):
+        wake_up = WakeUp()
+
         def next(self):
             pass
 
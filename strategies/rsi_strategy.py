@@ -1,21 +1,27 @@
+import backtrader as bt
 from strategies.base_strategy import BaseStrategy
+from strategies import conditions
 from backtrader import indicators
 from backtrader.order import Order
 
 
 class RsiAndMovingAverageStrategy(BaseStrategy):
 
+    pattern = conditions.RSI_AND_SMA  # its entry and exit, for the vectorized backtest (see runners.vector_backtest)
+    params = dict(rsi_period=10, sma_period=200)
+
     def prepare_stock(self, stock):
-        stock.rsi = indicators.RSI(stock, period=10)
-        stock.sma = indicators.SMA(stock, period=200)
+        stock.rsi = indicators.RSI(stock, period=self.p.rsi_period)
+        stock.sma = indicators.SMA(stock, period=self.p.sma_period)
+        self.set_trigger(stock, bt.And(stock.rsi < 30, stock.close > stock.sma))
     
     def check_signals(self, stock):
-        if stock.rsi[0] < 30 and stock.close[0] > stock.sma[0]:
+        if conditions.rsi_and_sma_entry(stock):
             self.buy(stock, exectype=Order.Market)
     
     def manage_position(self, stock):
         trade = self.get_opened_trade(stock)
-        if stock.rsi[0] > 40 or (len(self.data) - trade.baropen) > stock.rsi.p.period:
+        if conditions.rsi_and_sma_exit(stock) or (len(self.data) - trade.baropen) > stock.rsi.p.period:
             self.close(stock)
 
     
@@ -0,0 +1,52 @@
+import backtrader as bt
+
+
+class TradeBook():
+    '''
+    The trades of a strategy, kept up to date from its notify_trade (see notify): the open trades by feed,
+    the trades of every feed and of the whole strategy in the order they were opened, and the closed trades
+    in the order they were closed. Lookups don't scan the history of the trades and the lists are only appended to.
+
+    Backtrader notifies copies of the trades, the book holds the trades themselves (those of strategy._trades),
+    which keep being updated until they are closed.
+    '''
+
+    def __init__(self, strategy: bt.Strategy):
+        self.strategy = strategy
+        self.open_trades: dict = {}  # feed -> {trade ref: trade}
+        self.trades: dict = {}  # feed -> its trades
+        self.all: list[bt.Trade] = []
+        self.closed: list[bt.Trade] = []
+
+    def notify(self, trade: bt.Trade):
+        ''' To be called with every trade notified by notify_trade '''
+        if trade.justopened:
+            trade = self._live(trade)
+            self.open_trades.setdefault(trade.data, {})[trade.ref] = trade
+            self.trades.setdefault(trade.data, []).append(trade)
+            self.all.append(trade)
+        elif trade.isclosed:
+            self.closed.append(self.open_trades.get(trade.data, {}).pop(trade.ref, None) or self._live(trade))
+
+    def opened(self, feed) -> bt.Trade:
+        ''' The open trade of the feed, None if it has none '''
+        trades = self.open_trades.get(feed)
+        if not trades:
+            return None
+        if len(trades) > 1:
+            raise Exception('Warning - more than one open position for %s, trades: %s' % (feed, list(trades.values())))
+        return next(iter(trades.values()))
+
+    def open_trade(self, feed) -> bt.Trade:
+        ''' The open trade of the feed, raises when it has none (see opened for a lookup that may miss) '''
+        trade = self.opened(feed)
+        if trade is None:
+            raise Exception('No open position for %s' % feed)
+        return trade
+
+    def _live(self, notified: bt.Trade) -> bt.Trade:
+        ''' The trade the notified copy was made of - the last ones of its feed and tradeid are the recent ones '''
+        for trade in reversed(self.strategy._trades[notified.data][notified.tradeid]):
+            if trade.ref == notified.ref:
+                return trade
+        return notified
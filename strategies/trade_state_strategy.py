@@ -4,12 +4,16 @@ from money_mgmt.sizers import PortionSizer
 
 from backtrader.order import Order
 from strategies.base_strategy import BaseStrategy
+from strategies.trade_book import TradeBook
+from strategies.conditions import Pattern
+from strategies.trigger_index import StateScheduler, WakeUp
 from globals import *
 from logger import *
 
 class TradeState():
 
     strategy : TradeStateStrategy
+    wake_up : WakeUp = None  # when next() has anything to do, None - on every bar (see StateScheduler)
 
     def __init__(self, strategy : TradeStateStrategy, feed, entry : Order = None, stoploss: Order = None, takeprofit: Order = None):
         self.strategy = strategy
@@ -41,13 +45,18 @@ class TradeState():
 class TradeStateStrategy(bt.Strategy):
 
     feeds = []
+    event_driven = False  # opt-in - visit only the feeds whose states wake up (see TradeState.wake_up), instead of every feed on every bar
+    pattern: Pattern = None  # the vectorized entry condition, for scanning and prescreening the universe (see strategies.conditions)
 
     def __init__(self):
         self.setsizer(PortionSizer(percents=10))
         self.feeds = self.datas
+        self.trade_book = TradeBook(self)
+        self.scheduler = StateScheduler(self.feeds)
         for feed in self.feeds:
             feed.state : TradeState = self.initial_state_cls()(self, feed)
             self.prepare_feed(feed)
+            self.schedule(feed)
     
     @abstractmethod
     def initial_state_cls(self): #TODO define the first state as the default
@@ -57,9 +66,14 @@ class TradeStateStrategy(bt.Strategy):
         assert old_state.feed.state is old_state
         logdebug(f"changing state from {old_state.__class__.__name__} to {new_state.__class__.__name__}", old_state.feed)
         old_state.feed.state = new_state
+        self.schedule(new_state.feed)
+        self.scheduler.wake(new_state.feed)
+
+    def schedule(self, feed):
+        self.scheduler.schedule(feed, feed.state.wake_up if self.event_driven else None, len(self))
 
     def next(self):
-        for feed in self.feeds:
+        for feed in self.scheduler.due(self.datetime[0], len(self)):
             feed.state.next()
 
     @abstractmethod
@@ -68,6 +82,10 @@ class TradeStateStrategy(bt.Strategy):
 
     notify_trade = BaseStrategy.notify_trade
 
-    notify_order = BaseStrategy.notify_order
+    indicator = BaseStrategy.indicator
+
+    def notify_order(self, order: bt.Order):
+        self.scheduler.wake(order.data)
+        BaseStrategy.log_order(order)
 
 
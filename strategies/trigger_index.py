@@ -0,0 +1,155 @@
+import math
+import heapq
+from dataclasses import dataclass
+import numpy as np
+import backtrader as bt
+
+
+class TriggerIndex():
+    '''
+    The feeds whose trigger line (e.g. a breakout or a candle pattern signal) is set - non zero - on a bar, by the bar's datetime.
+    When the lines are precomputed (runonce) the index is built at once on the first lookup, so finding the triggered
+    feeds costs the number of triggered feeds, not the number of feeds. Otherwise every lookup checks the current
+    value of the triggers. A feed counts as triggered only on bars it has (not on bars of other feeds it has no bar at).
+    '''
+
+    def __init__(self, feeds: list, triggers: list):
+        self.feeds = list(feeds)
+        self.triggers = list(triggers)
+        self._bars: dict = None  # datetime -> positions of the triggered feeds, None until built
+
+    def triggered(self, dt: float) -> list[int]:
+        ''' Positions (in feeds) of the feeds triggered on the bar of datetime dt (in backtrader's float format) '''
+        if self._bars is None and self._precomputed():
+            self._bars = self._build()
+        if self._bars is not None:
+            return self._bars.get(dt, [])
+        return [i for i, (feed, trigger) in enumerate(zip(self.feeds, self.triggers)) if feed.datetime[0] == dt and _is_set(trigger[0])]
+
+    def _precomputed(self) -> bool:
+        ''' True when the triggers hold the values of all the bars of their feeds, not just those until the current bar '''
+        return all(len(_array(trigger)) == feed.buflen() > len(feed) for feed, trigger in zip(self.feeds, self.triggers))
+
+    def _build(self) -> dict:
+        bars = {}
+        for i, (feed, trigger) in enumerate(zip(self.feeds, self.triggers)):
+            values = np.asarray(_array(trigger), dtype=np.float64)
+            datetimes = np.asarray(feed.datetime.array, dtype=np.float64)
+            for dt in datetimes[np.flatnonzero(np.nan_to_num(values) != 0)].tolist():
+                bars.setdefault(dt, []).append(i)
+        return bars
+
+
+class ActiveSet():
+    '''
+    The feeds a strategy has to visit on a bar - those whose trigger is set (see TriggerIndex), those with open orders
+    and those with an open position - in the order of the feeds.
+    Orders and positions are followed through track(), which is to be called on every order notification.
+    '''
+
+    def __init__(self, feeds: list, triggers: list):
+        self.feeds = list(feeds)
+        self.index = TriggerIndex(self.feeds, triggers)
+        self._position_of = {id(feed): i for i, feed in enumerate(self.feeds)}
+        self._open_orders = {}  # position of the feed -> refs of its alive orders
+        self._busy = set()  # positions of the feeds with alive orders or an open position
+        self.visits = 0  # the number of feeds visited, to compare with len(feeds) * bars
+
+    def track(self, order: bt.Order, position_size: float):
+        ''' Follows the order (on any of its notifications), position_size is the size of the position of its feed after it '''
+        i = self._position_of[id(order.data)]
+        refs = self._open_orders.setdefault(i, set())
+        if order.alive():
+            refs.add(order.ref)
+        else:
+            refs.discard(order.ref)
+        if refs or position_size:
+            self._busy.add(i)
+        else:
+            self._busy.discard(i)
+
+    def active(self, dt: float) -> list:
+        positions = self._busy.union(self.index.triggered(dt))
+        self.visits += len(positions)
+        return [self.feeds[i] for i in sorted(positions)]
+
+
+@dataclass(frozen=True)
+class WakeUp:
+    '''
+    Declares when a state (see TradeState.wake_up) has anything to do: on the bars `line` - the name of a line of the feed,
+    e.g. a pattern or a crossover - is non zero, and/or every `bars` bars since the state was entered.
+    Order events of the feed, and changes of its state, always wake it. WakeUp() waits for order events only.
+    '''
+    line: str = None
+    bars: int = None
+
+
+class StateScheduler():
+    '''
+    Wait queues of the feeds of a TradeStateStrategy by the wake-up conditions of their states: due() returns the feeds
+    to visit on a bar - those whose state declares no WakeUp (visited on every bar), those woken by an order event or
+    a change of state, those whose line is set on the bar (looked up in a TriggerIndex of the line) and those whose
+    bar count is due - so idle feeds cost nothing.
+    '''
+
+    def __init__(self, feeds: list):
+        self.feeds = list(feeds)
+        self._position_of = {id(feed): i for i, feed in enumerate(self.feeds)}
+        self._always = set()
+        self._woken = set()
+        self._waiting = {}  # name of line -> positions of the feeds waiting for it
+        self._indexes = {}  # name of line -> its TriggerIndex
+        self._every = {}  # position -> (bars, next due bar)
+        self._due_bars = []  # heap of (due bar, position)
+        self.visits = 0  # the number of feeds visited, to compare with len(feeds) * bars
+
+    def schedule(self, feed, wake_up: WakeUp, bar: int):
+        ''' (Re)places the feed in the queues of wake_up (None to visit it on every bar), since the bar (the strategy's len) '''
+        i = self._position_of[id(feed)]
+        self._always.discard(i)
+        for waiting in self._waiting.values():
+            waiting.discard(i)
+        self._every.pop(i, None)
+        if wake_up is None:
+            self._always.add(i)
+            return
+        if wake_up.line:
+            self._waiting.setdefault(wake_up.line, set()).add(i)
+        if wake_up.bars:
+            self._every[i] = (wake_up.bars, bar + wake_up.bars)
+            heapq.heappush(self._due_bars, (bar + wake_up.bars, i))
+
+    def wake(self, feed):
+        ''' Visits the feed on the current bar (when its feeds weren't taken yet, otherwise on the next one) '''
+        self._woken.add(self._position_of[id(feed)])
+
+    def due(self, dt: float, bar: int) -> list:
+        positions = self._always | self._woken
+        self._woken = set()
+        for line, waiting in self._waiting.items():
+            if waiting:
+                positions.update(i for i in self._index(line).triggered(dt) if i in waiting)
+        while self._due_bars and self._due_bars[0][0] <= bar:
+            due, i = heapq.heappop(self._due_bars)
+            if i in self._every and self._every[i][1] == due:
+                positions.add(i)
+                bars = self._every[i][0]
+                self._every[i] = (bars, due + bars)
+                heapq.heappush(self._due_bars, (due + bars, i))
+        self.visits += len(positions)
+        return [self.feeds[i] for i in sorted(positions)]
+
+    def _index(self, line: str) -> TriggerIndex:
+        if line not in self._indexes:
+            self._indexes[line] = TriggerIndex(self.feeds, [getattr(feed, line) for feed in self.feeds])
+        return self._indexes[line]
+
+
+def _array(line):
+    return line.lines[0].array if hasattr(line, 'lines') else line.array
+
+
+def _is_set(value) -> bool:
+    return bool(value) and not math.isnan(value)
+
@@ -0,0 +1,61 @@
+from tests.test_common import *
+from backtrader import talib
+from custom_indicators.indicator_store import IndicatorStore
+from custom_indicators.registry import IndicatorRegistry
+
+
+class TalibIndicators(bt.Strategy):
+    ''' Records the values of a few talib indicators, created through the registry (and its store) '''
+
+    params = dict(store=None)
+
+    def __init__(self):
+        registry = IndicatorRegistry.of(self.env)
+        registry.store = self.p.store
+        data = self.data
+        self.indicators = [
+            registry.get(self, talib.ATR, data.high, data.low, data.close, timeperiod=14),
+            registry.get(self, talib.MAX, data.high, timeperiod=20),
+            registry.get(self, talib.SMA, data.close, timeperiod=10),
+            registry.get(self, talib.CDLDOJISTAR, data.open, data.high, data.low, data.close),
+        ]
+        self.values = []
+
+    def next(self):
+        self.values.append([indicator[0] for indicator in self.indicators])
+
+
+def run(store, **kwargs):
+    [strategy] = run_on_test_data((TalibIndicators, dict(store=store)), **kwargs)
+    return strategy
+
+
+class TestIndicatorStore:
+
+    def test_second_run_loads_the_same_lines(self, tmpdir):
+        store = IndicatorStore(str(tmpdir))
+        computed = run(store)
+        assert (store.hits, store.misses) == (0, 4)
+        loaded = run(IndicatorStore(str(tmpdir)))
+        assert loaded.p.store.hits == 4
+        assert loaded.values == computed.values
+        assert loaded.values == run(None).values
+
+    def test_other_data_or_params_miss(self, tmpdir):
+        store = IndicatorStore(str(tmpdir))
+        run(store)
+        run(store, feeds=['test_data2.csv'])
+        assert store.misses == 8
+
+    def test_not_used_without_runonce(self, tmpdir):
+        store = IndicatorStore(str(tmpdir))
+        assert run(store, runonce=False).values == run(None).values
+        assert (store.hits, store.misses, store.size()) == (0, 0, 0)
+
+    def test_evicts_by_size(self, tmpdir):
+        store = IndicatorStore(str(tmpdir), max_bytes=5000)
+        run(store)
+        assert len(tmpdir.listdir()) == 4, 'eviction waits for the end of the run'
+        store.evict()
+        assert 0 < store.size() <= 5000
+        assert len(tmpdir.listdir()) < 4
@@ -0,0 +1,62 @@
+from tests.test_common import *
+from custom_indicators import vectorized
+from custom_indicators.market_regime import MarketRegime, UP, NEUTRAL, DOWN
+from custom_indicators.registry import IndicatorRegistry
+
+
+class ReadsRegime(bt.Strategy):
+    ''' Compares the regime to the EMA stack of the index computed in place on every bar '''
+
+    def __init__(self):
+        self.market = MarketRegime(self, 'index', fast=5, medium=10, slow=20)
+        index = self.getdatabyname('index')
+        self.emas = [bt.ind.EMA(index.close, period=period) for period in [5, 10, 20]]
+        self.regimes = []
+
+    def next(self):
+        fast, medium, slow = [ema[0] for ema in self.emas]
+        expected = UP if fast > medium > slow else DOWN if fast < medium < slow else NEUTRAL
+        assert self.market() == expected
+        assert self.market.downtrend() == (expected == DOWN)
+        assert self.market.risk_factor() == {UP: 1, NEUTRAL: 2, DOWN: 3}[expected]
+        self.regimes.append(expected)
+
+
+class TrendOfEveryFeed(bt.Strategy):
+    ''' Computes the EMA stack of every feed through the registry, as CandlePatternLong does, before creating the regime '''
+
+    def __init__(self):
+        for feed in self.datas:
+            emas = [self.indicator(vectorized.EMA, feed.close, period=period) for period in [5, 10, 20]]
+            feed.trend_line = self.indicator(vectorized.TrendLine, *emas)
+        self.market = MarketRegime(self, 'index', fast=5, medium=10, slow=20)
+
+    def indicator(self, cls, *args, **kwargs):
+        return IndicatorRegistry.of(self.env).get(self, cls, *args, **kwargs)
+
+
+class WithoutRegime(bt.Strategy):
+    ''' Creates the regime and never reads it '''
+
+    def __init__(self):
+        self.market = MarketRegime(self, 'index')
+
+
+class TestMarketRegime:
+
+    def test_regime_of_the_index(self):
+        [strategy] = run_on_test_data(ReadsRegime, feeds=dict(stock='test_data2.csv', index='test_data.csv'))
+        assert {UP, NEUTRAL, DOWN} <= set(strategy.regimes)
+
+    def test_reuses_the_trend_of_the_index_feed(self):
+        [strategy] = run_on_test_data(TrendOfEveryFeed, feeds=dict(stock='test_data2.csv', index='test_data.csv'))
+        assert strategy.market.line is strategy.getdatabyname('index').trend_line
+        assert IndicatorRegistry.of(strategy.env).created == 8
+
+    def test_requires_the_index_when_read(self):
+        with pytest.raises(Exception, match='index'):
+            run_on_test_data(ReadsRegime, feeds=dict(stock='test_data2.csv', other='test_data.csv'))
+
+    def test_created_without_the_index(self):
+        [strategy] = run_on_test_data(WithoutRegime, feeds=dict(stock='test_data2.csv'))
+        assert strategy.market.line is None
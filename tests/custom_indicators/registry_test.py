@@ -0,0 +1,90 @@
+from tests.test_common import *
+from backtrader import talib
+from custom_indicators.registry import IndicatorRegistry
+
+
+class AsksTwice(bt.Strategy):
+    ''' Asks the registry for the same ATR twice (once with other plot arguments) and for an ATR of another period '''
+
+    def __init__(self):
+        registry = IndicatorRegistry.of(self.env)
+        self.atr = registry.get(self, talib.ATR, self.data.high, self.data.low, self.data.close, timeperiod=14)
+        self.same_atr = registry.get(self, talib.ATR, self.data.high, self.data.low, self.data.close, timeperiod=14, plot=False)
+        self.other_atr = registry.get(self, talib.ATR, self.data.high, self.data.low, self.data.close, timeperiod=7)
+
+
+class Reuses(bt.Strategy):
+    ''' A second strategy of the session, asking for a Highest the first one has and keeping its values '''
+    params = dict(period=20)
+
+    def __init__(self):
+        self.highest = IndicatorRegistry.of(self.env).get(self, bt.ind.Highest, self.data.high, period=self.p.period)
+        self.values = []
+        self.first_len = None
+
+    def next(self):
+        if self.first_len is None:
+            self.first_len = len(self)
+        self.values.append(self.highest[0])
+
+
+class Short(Reuses):
+    params = dict(period=5)
+
+
+class ComparesHighest(bt.Strategy):
+    ''' Records the values of a Highest from the registry and of one created directly '''
+    params = dict(k=1)
+
+    def __init__(self):
+        self.highest = IndicatorRegistry.of(self.env).get(self, bt.ind.Highest, self.data.high, period=20)
+        self.expected = bt.ind.Highest(self.data.high, period=20)
+        self.values = []
+
+    def next(self):
+        self.values.append((self.highest[0], self.expected[0]))
+
+
+def assert_fresh(strategy):
+    values, expected = zip(*strategy.values)
+    assert len(values) == len(strategy.data) - 19
+    assert values == expected
+
+
+class TestIndicatorRegistry:
+
+    def test_same_indicator_is_reused(self):
+        [strategy] = run_on_test_data(AsksTwice)
+        cerebro = strategy.env
+        assert strategy.same_atr is strategy.atr
+        assert strategy.other_atr is not strategy.atr
+        assert cerebro.indicator_registry.created == 2
+        assert cerebro.indicator_registry.avoided == 1
+
+    def test_reuse_across_strategies(self):
+        [first, second] = run_on_test_data(Reuses, (Short, dict(period=20)))
+        cerebro = first.env
+        assert second.highest is first.highest
+        assert cerebro.indicator_registry.avoided == 1
+        assert second.first_len == first.first_len == 20  # the second strategy still waits for the period of the indicator
+        assert second.values == first.values
+
+
+    def test_not_shared_by_optimization_runs(self):
+        cerebro = bt.Cerebro(maxcpus=1, optreturn=False)
+        cerebro.adddata(new_feed())
+        cerebro.optstrategy(ComparesHighest, k=[1, 2])
+        runs = cerebro.run()
+        assert len(runs) == 2
+        for [strategy] in runs:
+            assert_fresh(strategy)
+        assert runs[1][0].highest is not runs[0][0].highest
+
+    def test_not_shared_by_runs_of_the_same_cerebro(self):
+        cerebro = bt.Cerebro()
+        cerebro.adddata(new_feed())
+        cerebro.addstrategy(ComparesHighest)
+        [first] = cerebro.run()
+        [second] = cerebro.run()
+        assert second.highest is not first.highest
+        assert_fresh(second)
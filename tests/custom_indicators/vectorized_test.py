@@ -0,0 +1,70 @@
+from tests.test_common import *
+import numpy as np
+from custom_indicators import vectorized
+
+
+class BothVersions(bt.Strategy):
+    ''' The vectorized indicators next to the backtrader ones they replace, on the feed and on an indicator (NaN at its start) '''
+
+    def __init__(self):
+        self.pairs = []
+        for source in [self.data.high, bt.ind.SMA(self.data.close, period=5)]:
+            for period in [1, 10, 37]:
+                self.pairs += [(vectorized.Highest(source, period=period), bt.ind.Highest(source, period=period)),
+                               (vectorized.Lowest(source, period=period), bt.ind.Lowest(source, period=period)),
+                               (vectorized.EMA(source, period=period), bt.ind.EMA(source, period=period)),
+                               (vectorized.SMA(source, period=period), bt.ind.SMA(source, period=period))]
+        fast, medium, slow = [vectorized.EMA(self.data.close, period=period) for period in [5, 10, 20]]
+        bt_fast, bt_medium, bt_slow = [bt.ind.EMA(self.data.close, period=period) for period in [5, 10, 20]]
+        self.pairs.append((vectorized.TrendLine(fast, medium, slow), bt.And(bt_fast > bt_medium, bt_medium > bt_slow) - bt.And(bt_fast < bt_medium, bt_medium < bt_slow)))
+        self.values = []
+
+    def next(self):
+        self.values.append([(vectorized[0], indicator[0]) for vectorized, indicator in self.pairs])
+
+
+class Range(vectorized.PeriodIndicator):
+    ''' Computed by compute() in next mode too - on the last period values (its lookback) of every bar '''
+    lines = ('range',)
+
+    def compute(self, values):
+        windows = self.windows(values)
+        return self.padded(windows.max(axis=1) - windows.min(axis=1), len(values))
+
+
+class Ranges(bt.Strategy):
+    def __init__(self):
+        self.range = Range(self.data.high, period=10)
+        self.values = []
+
+    def next(self):
+        self.values.append(self.range[0])
+
+
+def assert_same(vectorized, expected, indicator):
+    if isinstance(indicator, bt.ind.SMA):
+        np.testing.assert_allclose(vectorized, expected, rtol=1e-12)
+    else:
+        np.testing.assert_array_equal(vectorized, expected)
+
+
+class TestVectorized:
+
+    def test_same_lines_as_backtrader(self):
+        [strategy] = run_on_test_data(BothVersions)
+        for vectorized, indicator in strategy.pairs:
+            assert vectorized._minperiod == indicator._minperiod
+            assert_same(np.array(vectorized.lines[0].array), np.array(indicator.lines[0].array), indicator)
+
+    def test_same_values_in_next_mode(self):
+        [strategy] = run_on_test_data(BothVersions, runonce=False)
+        values = np.array(strategy.values)
+        assert len(values) > 200
+        for i, (_, indicator) in enumerate(strategy.pairs):
+            assert_same(values[:, i, 0], values[:, i, 1], indicator)
+
+    def test_compute_on_the_lookback_in_next_mode(self):
+        [by_bar] = run_on_test_data(Ranges, runonce=False)
+        [at_once] = run_on_test_data(Ranges)
+        assert len(by_bar.values) > 200
+        assert by_bar.values == at_once.values
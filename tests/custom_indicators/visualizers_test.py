@@ -0,0 +1,49 @@
+from tests.test_common import *
+import math
+import numpy as np
+from custom_indicators import visualizers
+
+
+class LoopPartialLevel(visualizers.PartialLevel):
+    ''' The loop PartialLevel.once was before it was vectorized '''
+
+    def once(self, start, end):
+        for i in range(start,end):
+            for j in range(i-self.length+1, i+1):
+                if not math.isnan(self.signal[j]) and self.signal[j] != 0:
+                    self.lines.level[i] = self.level[j]
+                    break
+
+
+class LoopSingleMarker(visualizers.SingleMarker):
+    ''' The loop SingleMarker.once was before it was vectorized '''
+
+    def once(self, start, end):
+        for i in range(start, end):
+            if self.signals[i] != 0 and not math.isnan(self.signals[i]):
+                self.lines.marker[i] = self.level[i]
+
+
+class Visualized(bt.Strategy):
+    ''' Both versions of the visualizers on the same signals - sparse breakouts, a talib pattern and a line with NaNs '''
+    params = dict(length=10)
+
+    def __init__(self):
+        self.pairs = []
+        highest = bt.ind.Highest(self.data.high, period=20)
+        signals = [self.data.high > highest(-1), bt.talib.CDLDOJISTAR(self.data.open, self.data.high, self.data.low, self.data.close), highest(-1) - self.data.high]
+        for signal in signals:
+            level = self.data.low * .98
+            self.pairs.append((visualizers.PartialLevel(signal=signal, level=level, length=self.p.length), LoopPartialLevel(signal=signal, level=level, length=self.p.length)))
+            self.pairs.append((visualizers.SingleMarker(signals=signal, level=level), LoopSingleMarker(signals=signal, level=level)))
+
+
+class TestVisualizers:
+
+    @pytest.mark.parametrize('length', [1, 10, 40])  # 10 and 40 reach before the start of the arrays - and wrap to their end
+    def test_same_lines_as_the_loops(self, length):
+        [strategy] = run_on_test_data((Visualized, dict(length=length)))
+        for vectorized, loop in strategy.pairs:
+            expected = np.array(loop.lines[0].array)
+            assert np.any(~np.isnan(expected))
+            np.testing.assert_array_equal(np.array(vectorized.lines[0].array), expected)
@@ -35,6 +35,23 @@ class TestMergeDataFeeds:
        intervals = merge_data_feeds_csv(file2, file1, include_intervals=True)[1]
        assert intervals == []
 
+    def test_merge_intervals_in_the_middle(self, file=TEST_DATA_DIR + 'merge_test_datapoints_0-22.csv'):
+        entire_data = csv_to_dataframe(file)
+        partial = entire_data.drop(entire_data.index[[3, 4, 10, 15, 16, 17]])
+        merged, intervals = merge_data_feeds(partial, entire_data, include_intervals=True)
+        assert entire_data.equals(merged)
+        assert intervals == [(3, 4), (10, 10), (15, 17)]
+
+    def test_merge_data_feeds__values_mismatch_out_of_overlap_ignored(self, file=TEST_DATA_DIR + 'merge_test_datapoints_0-22.csv'):
+        entire_data = csv_to_dataframe(file)
+        df1, df2 = entire_data[:10].copy(), entire_data[5:]
+        df1.iloc[2, 1] = float('nan')  # nan outside the overlap doesn't matter
+        merged, intervals = merge_data_feeds(df1, df2, include_intervals=True)
+        assert len(merged) == len(entire_data) and intervals == [(10, 22)]
+        df1.iloc[7, 1] += 0.01
+        with pytest.raises(FeedMergeException):
+            merge_data_feeds(df1, df2)
+
     def test_merge_data_feeds__values_mismatch(self, file1=TEST_DATA_DIR + 'merge_test_datapoints_0-22.csv', file2=TEST_DATA_DIR + 'merge_test_datapoints_0-20.csv'):
         df1 = csv_to_dataframe(file1)
         df2 = csv_to_dataframe(file2)
@@ -61,6 +78,14 @@ class TestMergeDataFeeds:
         df2 = df1.join(df1[df1.columns[3]].rename('columnX'))
         with pytest.raises(FeedMergeException):
             merge = merge_data_feeds(df1, df2)
+
+    def test_merge_data_feeds__duplicate_dates(self, file=TEST_DATA_DIR + 'merge_test_datapoints_0-22.csv'):
+        df1 = csv_to_dataframe(file)
+        df2 = pd.concat([df1[:10], df1[9:]])
+        with pytest.raises(FeedMergeException, match='duplicate dates'):
+            merge_data_feeds(df1, df2)
+        with pytest.raises(FeedMergeException, match='duplicate dates'):
+            merge_data_feeds(df2, df1)
         
 
 @pytest.mark.parametrize('data', [([bt.feeds.GenericCSVData(dataname=TEST_DATA_DIR+'convert_test.csv', dtformat='%Y-%m-%d', 
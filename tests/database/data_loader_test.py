@@ -1,6 +1,6 @@
 from tests.test_common import *
 import test_common
-from database.data_loader import IBLoader
+from database.data_loader import IBLoader, StaticLoader
 from datetime import datetime
 import pytest
 from __init__test import TEST_DATA_DIR
@@ -71,3 +71,30 @@ class TestIBLoader:
         assert_prices(cerebro.datas[0], datetime(2021, 11, 19), 44.44, 66.66, 33.33, 55.55, ago=1), 'Mismatch with data from file'
         assert_prices(cerebro.datas[0], datetime(2021, 11, 22), 335.17, 346.47, 319.0, 319.56, ago=0), 'Mismatch with data from server'
 
+
+
+class TestStaticLoader:
+
+    STOCKS = ['test_data.csv', 'test_data2.csv']
+
+    def load(self, cerebro, tmpdir, **kwargs):
+        StaticLoader(cerebro).load_feeds(datetime(2016, 7, 1), datetime(2017, 6, 30), dirpath=os.path.abspath('tests'), stock_names=self.STOCKS, cache_dir=str(tmpdir), **kwargs)
+        cerebro.addstrategy(test_common.DummyStrategy)
+        return cerebro.run()[0]
+
+    @pytest.mark.parametrize('kwargs', [dict(use_cache=True), dict(index_dir='index'), {}])
+    def test_parallel_load_equals_serial_load(self, tmpdir, kwargs):
+        kwargs = {key: str(tmpdir.join(value)) if key == 'index_dir' else value for key, value in kwargs.items()}
+        serial = self.load(bt.Cerebro(), tmpdir, **kwargs)
+        parallel = self.load(bt.Cerebro(), tmpdir, workers=2, **kwargs)
+        assert [d._name for d in serial.datas] == [d._name for d in parallel.datas]
+        for serial_feed, parallel_feed in zip(serial.datas, parallel.datas):
+            assert feed_to_dataframe(serial_feed).equals(feed_to_dataframe(parallel_feed))
+
+    @pytest.mark.parametrize('workers', [0, 2])
+    def test_writes_nothing_by_default(self, tmpdir, workers):
+        cached = self.load(bt.Cerebro(), tmpdir.join('cache'), use_cache=True)
+        default = self.load(bt.Cerebro(), tmpdir.join('default'), workers=workers)
+        assert not tmpdir.join('default').exists()
+        for cached_feed, feed in zip(cached.datas, default.datas):
+            assert feed_to_dataframe(cached_feed).equals(feed_to_dataframe(feed))
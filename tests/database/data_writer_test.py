@@ -2,8 +2,8 @@ import backtrader as bt
 from __init__test import TEST_DATA_DIR
 from test_common import *
 from shutil import copy
-from database.data_writer import store
-from database import DATETIME_LABEL, diff_data_feed_csv
+from database.data_writer import store, compact, DataWriter, BarLog
+from database import DATETIME_LABEL, diff_data_feed_csv, csv_to_dataframe
 from backtrader import num2date
     
 data_path = TEST_DATA_DIR+'/writer_test.csv'
@@ -58,6 +58,55 @@ class TestStoreData:
         assert diffs.empty, f'Manipulated data should not be written (hence no diffs with the untouched original file)\n{diffs.to_string(index=True)}\n'
 
 
+class TestStreamData:
+
+    def run_streaming(self, filepath, preload=True, todate=datetime(2020, 11, 14)):
+        data = bt.feeds.GenericCSVData(dataname=data_path, dtformat='%Y-%m-%d', fromdate=datetime(2020, 11, 2), todate=todate, openinterest=-1)
+        cerebro = bt.Cerebro(preload=preload)
+        cerebro.adddata(DataWriter.decorate_streaming(data, filepath))
+        cerebro.addstrategy(DummyStrategy)
+        cerebro.run()
+        return data
+
+    @pytest.mark.parametrize('preload', [True, False])
+    def test_bars_logged_and_compacted(self, tmpdir, preload):
+        tmpfile = str(tmpdir.join('tmpfile.csv'))
+        data = self.run_streaming(tmpfile, preload)
+        assert not os.path.exists(tmpfile), 'Bars should be only logged until compaction'
+        assert len(BarLog(tmpfile + BarLog.SUFFIX).read()) == len(data)
+        assert compact(tmpfile)
+        assert not os.path.exists(tmpfile + BarLog.SUFFIX)
+        stored_file = str(tmpdir.join('stored.csv'))
+        store(data, stored_file)
+        assert csv_to_dataframe(tmpfile).equals(csv_to_dataframe(stored_file))
+
+    def test_compact_appends_to_feed_file(self, tmpdir):
+        tmpfile = str(tmpdir.join('tmpfile.csv'))
+        self.run_streaming(tmpfile, todate=datetime(2020, 11, 6))
+        compact(tmpfile)
+        before = len(csv_to_dataframe(tmpfile))
+        self.run_streaming(tmpfile)  # overlaps the bars already in the file
+        assert compact(tmpfile)
+        assert csv_to_dataframe(tmpfile).equals(csv_to_dataframe(data_path))
+        assert before < len(csv_to_dataframe(tmpfile))
+
+    def test_partial_record_ignored(self, tmpdir):
+        tmpfile = str(tmpdir.join('tmpfile.csv'))
+        data = self.run_streaming(tmpfile)
+        with open(tmpfile + BarLog.SUFFIX, 'ab') as f:
+            f.write(b'\x00' * 20)  # crash in the middle of a record
+        assert len(BarLog(tmpfile + BarLog.SUFFIX).read()) == len(data)
+
+    def test_compact_conflict_keeps_feed_file(self, tmpdir):
+        tmpfile = str(tmpdir.join('tmpfile.csv'))
+        stored = csv_to_dataframe(data_path)
+        stored.iloc[3, 0] = 0  # create a conflict with the logged bars
+        stored.to_csv(tmpfile)
+        self.run_streaming(tmpfile)
+        assert not compact(tmpfile)
+        assert csv_to_dataframe(tmpfile).equals(stored)
+        assert os.path.exists(tmpfile + '.premerged')
+
 def extend_last_datapoint_by_1(data_fixture, new_point_diff=1):
     data_fixture.forward()
     data_point = {} 
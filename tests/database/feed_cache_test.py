@@ -0,0 +1,56 @@
+from tests.test_common import *
+from shutil import copy
+import numpy as np
+from database.array_feed import ArrayData
+from database.feed_cache import FeedCache, read_feed_csv
+
+CSV_PATH = 'tests/test_data.csv'
+FROM_DATE, TO_DATE = datetime(2016, 7, 1), datetime(2017, 6, 30)
+
+
+def csv_feed():
+    return bt.feeds.GenericCSVData(dataname=CSV_PATH, fromdate=FROM_DATE, todate=TO_DATE, dtformat='%Y-%m-%d', high=1, low=2, open=3, close=4, volume=5)
+
+
+def assert_same_lines(feed1, feed2):
+    assert len(feed1) == len(feed2)
+    for alias in feed1.lines.getlinealiases():
+        values1, values2 = list(getattr(feed1.lines, alias).array), list(getattr(feed2.lines, alias).array)
+        assert pd.Series(values1).equals(pd.Series(values2)), f'line {alias} differs'
+
+
+class TestFeedCache:
+
+    @pytest.mark.parametrize('preload', [True, False])
+    def test_array_feed_equals_csv_feed(self, tmpdir, preload):
+        bars = FeedCache(str(tmpdir)).load(CSV_PATH)
+        cached_feed = ArrayData(dataname=bars, fromdate=FROM_DATE, todate=TO_DATE)
+        cerebro = bt.Cerebro(preload=preload)
+        cerebro.adddata(csv_feed())
+        cerebro.adddata(cached_feed)
+        cerebro.addstrategy(DummyStrategy)
+        strategy = cerebro.run()[0]
+        assert_same_lines(strategy.datas[0], strategy.datas[1])
+
+    def test_load_is_memory_mapped(self, tmpdir):
+        bars = FeedCache(str(tmpdir)).load(CSV_PATH)
+        assert isinstance(bars['close'], np.memmap)
+        assert np.array_equal(bars['close'], read_feed_csv(CSV_PATH)['close'])
+
+    def test_conversion_done_once(self, tmpdir, mocker):
+        cache = FeedCache(str(tmpdir))
+        cache.load(CSV_PATH)
+        store = mocker.spy(cache, 'store')
+        cache.load(CSV_PATH)
+        assert store.call_count == 0, 'an unchanged file should be loaded from the cache'
+
+    def test_cache_invalidated_on_file_change(self, tmpdir):
+        csv_path = str(tmpdir.join('feed.csv'))
+        copy(CSV_PATH, csv_path)
+        cache = FeedCache(str(tmpdir.join('cache')))
+        length = len(cache.load(csv_path))
+        with open(csv_path, 'a') as f:
+            f.write('2021-04-27,1.0,1.0,1.0,1.0,1.0,1.0\n')
+        bars = cache.load(csv_path)
+        assert len(bars) == length + 1
+        assert bars.dates[-1] == np.datetime64('2021-04-27')
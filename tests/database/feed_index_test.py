@@ -0,0 +1,47 @@
+from tests.test_common import *
+from shutil import copy
+import numpy as np
+from database.feed_index import FeedIndex, IndexedCSVData
+from database.feed_cache import read_feed_csv, read_feeds
+from tests.database.feed_cache_test import CSV_PATH, FROM_DATE, TO_DATE, csv_feed, assert_same_lines
+
+
+class TestFeedIndex:
+
+    def test_offsets_at_line_starts(self, tmpdir):
+        dates, offsets = FeedIndex(str(tmpdir)).load(CSV_PATH)
+        with open(CSV_PATH, 'rb') as f:
+            content = f.read()
+        for date, offset in zip(dates[:20], offsets[:20]):
+            assert content[offset - 1:offset] == b'\n'
+            assert content[offset:offset + 10].decode() == str(date)[:10]
+
+    @pytest.mark.parametrize('preload', [True, False])
+    def test_indexed_feed_equals_csv_feed(self, tmpdir, preload):
+        indexed_feed = IndexedCSVData(dataname=CSV_PATH, fromdate=FROM_DATE, todate=TO_DATE, dtformat='%Y-%m-%d', high=1, low=2, open=3, close=4, volume=5, index=FeedIndex(str(tmpdir)))
+        cerebro = bt.Cerebro(preload=preload)
+        cerebro.adddata(csv_feed())
+        cerebro.adddata(indexed_feed)
+        cerebro.addstrategy(DummyStrategy)
+        strategy = cerebro.run()[0]
+        assert_same_lines(strategy.datas[0], strategy.datas[1])
+
+    def test_read_window(self, tmpdir):
+        window = read_feed_csv(FeedIndex(str(tmpdir)).read_window(CSV_PATH, FROM_DATE, TO_DATE))
+        bars = read_feed_csv(CSV_PATH).window(FROM_DATE, TO_DATE)
+        assert np.array_equal(window.dates, bars.dates)
+        assert np.array_equal(window['close'], bars['close'])
+        [indexed_bars] = read_feeds([CSV_PATH], fromdate=FROM_DATE, todate=TO_DATE, index_dir=str(tmpdir))
+        assert np.array_equal(indexed_bars['open'], bars['open'])
+
+    def test_index_rebuilt_on_file_change(self, tmpdir):
+        csv_path = str(tmpdir.join('feed.csv'))
+        copy(CSV_PATH, csv_path)
+        index = FeedIndex(str(tmpdir.join('index')))
+        length = len(index.load(csv_path)[0])
+        with open(csv_path, 'a') as f:
+            f.write('2021-04-27,1.0,1.0,1.0,1.0,1.0,1.0\n')
+        dates, offsets = index.load(csv_path)
+        assert len(dates) == length + 1
+        assert dates[-1] == np.datetime64('2021-04-27')
+        assert index.offsets_of(csv_path, datetime(2021, 4, 29)) == (os.path.getsize(csv_path), None)
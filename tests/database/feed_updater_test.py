@@ -0,0 +1,62 @@
+from tests.test_common import *
+from database import csv_to_dataframe
+from database.feed_updater import FeedUpdater
+
+PROVIDER_PATH = 'tests/test_data.csv'
+
+
+class FakeProvider():
+    ''' Serves the bars of a local csv file instead of downloading them '''
+
+    def __init__(self, filepath=PROVIDER_PATH):
+        self.feed = csv_to_dataframe(filepath)
+        self.requests = []
+
+    def __call__(self, symbol, start=None):
+        self.requests.append((symbol, start))
+        return self.feed if start is None else self.feed[self.feed.index >= start]
+
+
+def write_head(filepath, bars):
+    with open(PROVIDER_PATH) as f:
+        lines = f.readlines()
+    with open(filepath, 'w') as f:
+        f.writelines(lines[:bars + 1])
+
+
+class TestFeedUpdater:
+
+    def test_appends_missing_tail(self, tmpdir):
+        write_head(str(tmpdir.join('AAA.csv')), 1000)
+        provider = FakeProvider()
+        lost = FeedUpdater(str(tmpdir), download=provider, workers=2).update(['AAA'])
+        assert not lost
+        assert provider.requests == [('AAA', datetime(2020, 4, 17))]
+        assert csv_to_dataframe(str(tmpdir.join('AAA.csv'))).equals(provider.feed)
+
+    def test_downloads_new_symbols_concurrently(self, tmpdir):
+        write_head(str(tmpdir.join('AAA.csv')), 500)
+        provider = FakeProvider()
+        lost = FeedUpdater(str(tmpdir), download=provider, workers=4).update(['AAA', 'BBB', 'CCC'])
+        assert not lost
+        for symbol in ['AAA', 'BBB', 'CCC']:
+            assert csv_to_dataframe(str(tmpdir.join(f'{symbol}.csv'))).equals(provider.feed)
+
+    def test_up_to_date_file_unchanged(self, tmpdir):
+        filepath = str(tmpdir.join('AAA.csv'))
+        write_head(filepath, 1258)
+        before = os.path.getmtime(filepath)
+        assert FeedUpdater(str(tmpdir), download=FakeProvider()).update(['AAA']) == {}
+        assert os.path.getmtime(filepath) == before
+
+    def test_conflict_fails_symbol_only(self, tmpdir):
+        write_head(str(tmpdir.join('AAA.csv')), 1000)
+        write_head(str(tmpdir.join('BBB.csv')), 1000)
+        provider = FakeProvider()
+        conflicting = provider.feed.copy()
+        conflicting.iloc[:, 0] += 1  # also returns the stored bars, with different values
+        download = lambda symbol, start: conflicting if symbol == 'AAA' else provider(symbol, start)
+        lost = FeedUpdater(str(tmpdir), download=download).update(['AAA', 'BBB'])
+        assert list(lost) == ['AAA']
+        assert len(csv_to_dataframe(str(tmpdir.join('AAA.csv')))) == 1000
+        assert csv_to_dataframe(str(tmpdir.join('BBB.csv'))).equals(provider.feed)
@@ -0,0 +1,55 @@
+from tests.test_common import *
+import numpy as np
+from database.array_feed import ArrayData
+from database.feed_cache import read_feed_csv
+from database.panel_store import PanelStore
+from tests.database.feed_cache_test import CSV_PATH, FROM_DATE, TO_DATE, csv_feed, assert_same_lines
+
+
+@pytest.fixture
+def feed_files(tmpdir):
+    ''' test_data.csv and a copy of test_data2.csv missing its first 10 bars and 5 bars in the middle '''
+    with open('tests/test_data2.csv') as f:
+        lines = f.readlines()
+    partial_path = str(tmpdir.join('partial.csv'))
+    with open(partial_path, 'w') as f:
+        f.writelines(lines[:1] + lines[11:300] + lines[305:])
+    return [CSV_PATH, partial_path]
+
+
+class TestPanelStore:
+
+    def test_aligned_on_master_calendar(self, tmpdir, feed_files):
+        panel = PanelStore(str(tmpdir.join('panel'))).load(feed_files)
+        full, partial = read_feed_csv(feed_files[0]), read_feed_csv(feed_files[1])
+        assert panel.symbols == ['test_data', 'partial']
+        assert np.array_equal(panel.dates, full.dates)
+        assert panel['close'].shape == (2, len(full))
+        assert np.isnan(panel['close'][1, :10]).all() and np.isnan(panel['close'][1, 299:304]).all()
+        assert np.array_equal(panel['close'][1][~np.isnan(panel['close'][1])], partial['close'])
+
+    def test_feed_arrays_are_views(self, tmpdir, feed_files):
+        panel = PanelStore(str(tmpdir.join('panel'))).load(feed_files)
+        bars = panel.feed_arrays('test_data')
+        assert isinstance(panel['close'], np.memmap)
+        assert np.shares_memory(bars['close'], panel['close'])
+        partial = panel.feed_arrays('partial')
+        assert np.array_equal(partial.dates, read_feed_csv(feed_files[1]).dates)
+
+    def test_panel_rebuilt_on_file_change(self, tmpdir, feed_files):
+        store = PanelStore(str(tmpdir.join('panel')))
+        store.load(feed_files)
+        with open(feed_files[1], 'a') as f:
+            f.write('2021-04-28,1.0,1.0,1.0,1.0,1.0,1.0\n')
+        panel = store.load(feed_files)
+        assert panel.dates[-1] == np.datetime64('2021-04-28')
+        assert np.isnan(panel['close'][0, -1]) and panel['close'][1, -1] == 1.0
+
+    def test_panel_feed_equals_csv_feed(self, tmpdir, feed_files):
+        panel = PanelStore(str(tmpdir.join('panel'))).load(feed_files)
+        cerebro = bt.Cerebro()
+        cerebro.adddata(csv_feed())
+        cerebro.adddata(ArrayData(dataname=panel.feed_arrays('test_data'), fromdate=FROM_DATE, todate=TO_DATE))
+        cerebro.addstrategy(DummyStrategy)
+        strategy = cerebro.run()[0]
+        assert_same_lines(strategy.datas[0], strategy.datas[1])
@@ -0,0 +1,66 @@
+from tests.test_common import *
+from analyzers.drawdown_guard import DrawdownGuard
+from runners.halving import SuccessiveHalving, SYMBOLS
+from runners.optimizer import ParameterSweep, grid
+from runners.results import DRAWDOWN_GUARD
+
+DIRPATH = os.path.abspath('tests')
+STOCKS = ['test_data.csv', 'test_data2.csv']
+FROM_DATE, TO_DATE = datetime(2016, 7, 1), datetime(2017, 7, 1)
+COMBINATIONS = grid(size=[5, 10, 20], period=[15, 20])
+
+
+@pytest.fixture(scope='module')
+def cache_dir(tmp_path_factory):
+    return str(tmp_path_factory.mktemp('cache'))
+
+
+def halving(cache_dir, **kwargs):
+    return SuccessiveHalving(PeriodicTrades, FROM_DATE, TO_DATE, metric='return_percent', dirpath=DIRPATH, cache_dir=cache_dir, **kwargs).load(STOCKS)
+
+
+class TestSuccessiveHalving:
+
+    @pytest.mark.parametrize('workers', [1, 2])
+    def test_promotes_the_best(self, cache_dir, workers):
+        result = halving(cache_dir).run(COMBINATIONS, workers=workers)
+        table = result.table
+        assert table.groupby('rung').size().tolist() == [6, 3, 2]
+        for rung in [0, 1]:
+            ran = table[table['rung'] == rung].sort_values('return_percent', ascending=False)
+            promoted = set(table[table['rung'] == rung + 1]['candidate'])
+            assert promoted == set(ran['candidate'][:len(promoted)])
+        last = table[table['rung'] == 2]
+        assert result.params == COMBINATIONS[last.loc[last['return_percent'].idxmax(), 'candidate']]
+        full = ParameterSweep(PeriodicTrades, FROM_DATE, TO_DATE, dirpath=DIRPATH, cache_dir=cache_dir).load(STOCKS).run_combination(result.params)
+        assert last['return_percent'].max() == pytest.approx(full['return_percent'])
+
+    def test_budgets(self, cache_dir):
+        dates = halving(cache_dir, rungs=3)
+        assert [dates.budget_of(rung) for rung in range(3)] == [(FROM_DATE + (TO_DATE - FROM_DATE) / 4, None), (FROM_DATE + (TO_DATE - FROM_DATE) / 2, None), (TO_DATE, None)]
+        symbols = halving(cache_dir, rungs=2, budget=SYMBOLS)
+        assert [symbols.budget_of(rung) for rung in range(2)] == [(TO_DATE, ['test_data']), (TO_DATE, None)]
+
+    def test_never_promotes_stopped_runs(self, cache_dir):
+        result = halving(cache_dir, rungs=2, max_drawdown=0.5).run(COMBINATIONS, workers=1)
+        first = result.table[result.table['rung'] == 0]
+        assert first['stopped'].any() and not first['stopped'].all()
+        promoted = result.table[result.table['rung'] == 1]['candidate']
+        assert len(promoted) == 3
+        assert set(first[~first['stopped']]['candidate']) < set(promoted)  # promoted first, stopped runs only to fill the rung
+
+    def test_unknown_budget(self):
+        with pytest.raises(ValueError):
+            SuccessiveHalving(PeriodicTrades, FROM_DATE, TO_DATE, budget='bars')
+
+
+class TestDrawdownGuard:
+
+    def test_stops_the_run(self, cache_dir):
+        sweep = ParameterSweep(PeriodicTrades, FROM_DATE, TO_DATE, analyzers=[(DrawdownGuard, dict(_name=DRAWDOWN_GUARD, max_drawdown=0.5))],
+                               dirpath=DIRPATH, cache_dir=cache_dir).load(STOCKS)
+        result = sweep.backtest(dict(size=20))
+        guard = result.analyses[0][DRAWDOWN_GUARD]
+        assert guard['stopped'] and guard['max_drawdown'] > 0.5
+        assert result.equity.index[-1] == guard['datetime'] < datetime(2017, 6, 1)
+        assert not sweep.backtest(dict(size=1)).analyses[0][DRAWDOWN_GUARD]['stopped']
@@ -0,0 +1,51 @@
+from tests.test_common import *
+import pandas as pd
+from database.data_loader import StaticLoader
+from runners.optimizer import ParameterSweep, grid
+from runners.results import metrics
+from runners.session import BacktestSession
+
+DIRPATH = os.path.abspath('tests')
+STOCKS = ['test_data.csv', 'test_data2.csv']
+FROM_DATE, TO_DATE = datetime(2016, 7, 1), datetime(2017, 6, 30)
+
+
+def csv_run(**params):
+    session = BacktestSession(cash=10000.0)
+    session.load_data(StaticLoader, start_date=FROM_DATE, end_date=TO_DATE, dirpath=DIRPATH, stock_names=STOCKS, use_cache=False)
+    session.add_strategy(PeriodicTrades, **params)
+    session.run()
+    return {**params, **metrics(session.result())}
+
+
+@pytest.fixture
+def sweep(tmp_path):
+    return ParameterSweep(PeriodicTrades, FROM_DATE, TO_DATE, strategy_params=dict(hold=5), dirpath=DIRPATH, cache_dir=str(tmp_path / 'cache')).load(STOCKS)
+
+
+class TestParameterSweep:
+
+    @pytest.mark.parametrize('workers', [1, 2])
+    def test_equals_runs_on_csv_feeds(self, sweep, workers):
+        combinations = grid(size=[5, 10], period=[15, 20])
+        table = sweep.table(combinations, workers=workers)
+        expected = pd.DataFrame([csv_run(hold=5, **params) for params in combinations]).drop(columns='hold')
+        pd.testing.assert_frame_equal(table, expected)
+        assert (table['trades_closed'] > 0).all()
+
+    def test_streams_rows_to_csv(self, sweep, tmp_path):
+        results_path = tmp_path / 'results.csv'
+        rows = sweep.run(grid(size=[5, 10]), workers=2, results_path=results_path)
+        first = next(rows)
+        assert len(pd.read_csv(results_path)) == 1
+        rows = [first] + list(rows)
+        written = pd.read_csv(results_path)
+        assert sorted(written['size']) == [5, 10]
+        assert written['final_value'].tolist() == pytest.approx([row['final_value'] for row in rows])
+
+    def test_requires_load(self):
+        with pytest.raises(ValueError):
+            next(ParameterSweep(PeriodicTrades, FROM_DATE, TO_DATE).run(grid(size=[5])))
+
+    def test_grid(self):
+        assert grid(a=[1, 2], b=['x']) == [dict(a=1, b='x'), dict(a=2, b='x')]
@@ -0,0 +1,82 @@
+from tests.test_common import *
+from shutil import copy
+from database.data_loader import StaticLoader
+from runners.prescreen import TwoPhaseBacktest
+from runners.session import BacktestSession
+from strategies.conditions import Pattern, Series, highest
+
+FROM_DATE, TO_DATE = datetime(2016, 7, 1), datetime(2017, 6, 30)
+STOCKS = ['flat.csv', 'test_data.csv', 'test_data2.csv']
+
+
+def breakout_lines(feed, params):
+    feed.highest = Series(highest(feed.high[0], params['period']))
+
+
+def breakout_entry(feed):
+    return feed.high[0] > feed.highest[-1]
+
+
+class Breakouts(bt.Strategy):
+    ''' Buys the breakouts of the highest high of the period, holds them for 5 bars '''
+    pattern = Pattern(breakout_lines, breakout_entry)
+    params = dict(period=20)
+
+    def __init__(self):
+        self.opened = {}
+        for data in self.datas:
+            data.highest = bt.ind.Highest(data.high, period=self.p.period)
+
+    def next(self):
+        for data in self.datas:
+            if not self.getposition(data) and breakout_entry(data):
+                self.buy(data, size=10)
+                self.opened[data] = len(self)
+            elif self.getposition(data) and len(self) - self.opened[data] >= 5:
+                self.close(data)
+
+
+@pytest.fixture
+def dirpath(tmpdir):
+    ''' The test data files and a flat one - no breakouts to scan '''
+    for stock in STOCKS[1:]:
+        copy(f'tests/{stock}', str(tmpdir))
+    bars = pd.read_csv('tests/test_data.csv')
+    bars[['High', 'Low', 'Open', 'Close']] = 10.0
+    bars.to_csv(str(tmpdir.join('flat.csv')), index=False)
+    return str(tmpdir)
+
+
+def full_run(dirpath, **params):
+    session = BacktestSession()
+    session.load_data(StaticLoader, start_date=FROM_DATE, end_date=TO_DATE, dirpath=dirpath, stock_names=STOCKS, use_cache=True, cache_dir=os.path.join(dirpath, '.cache'))
+    session.add_strategy(Breakouts, **params)
+    session.run()
+    return session.result()
+
+
+class TestTwoPhaseBacktest:
+
+    @pytest.mark.parametrize('params', [{}, dict(period=50)])
+    def test_same_result_as_the_full_run(self, dirpath, params):
+        result, report = TwoPhaseBacktest(Breakouts, FROM_DATE, TO_DATE, strategy_params=params, reference_symbols=[], dirpath=dirpath).run(STOCKS)
+        expected = full_run(dirpath, **params)
+        assert report.symbols == ['test_data', 'test_data2']
+        assert [(t.symbol, t.open_datetime, t.pnlcomm) for t in result.closed_trades] == [(t.symbol, t.open_datetime, t.pnlcomm) for t in expected.closed_trades]
+        assert result.equity.equals(expected.equity)
+
+    def test_report(self, dirpath):
+        _, report = TwoPhaseBacktest(Breakouts, FROM_DATE, TO_DATE, reference_symbols=['flat.csv'], dirpath=dirpath).run(STOCKS[1:])
+        assert report.universe == 2
+        assert report.symbols == ['test_data', 'test_data2', 'flat']
+        assert report.skipped_bars == 0 and report.bars > 400
+        assert set(report.hits['symbol']) == {'test_data', 'test_data2'}
+
+    def test_skipped_bars(self, dirpath):
+        _, report = TwoPhaseBacktest(Breakouts, FROM_DATE, TO_DATE, reference_symbols=[], dirpath=dirpath).run(STOCKS)
+        assert report.universe == 3
+        assert report.skipped_bars * 3 == report.bars
+
+    def test_requires_a_pattern(self):
+        with pytest.raises(ValueError, match='pattern'):
+            TwoPhaseBacktest(DummyStrategy, FROM_DATE, TO_DATE)
@@ -0,0 +1,58 @@
+from tests.test_common import *
+from shutil import copy
+from database.data_loader import StaticLoader
+from money_mgmt.sizers import PortionSizer
+from runners.result_cache import ResultCache, source_modules
+from strategies import conditions
+from runners.session import BacktestSession
+from tests.runners.sharded_test import DIRPATH, STOCKS, FROM_DATE, TO_DATE
+
+
+class SizedRsiEntries(bt.Strategy):
+    def __init__(self):
+        self.setsizer(PortionSizer())
+
+    def next(self):
+        if conditions.rsi_and_sma_entry(self.data):
+            self.buy()
+
+
+def cached_run(cache, cash=10000.0, dirpath=DIRPATH, todate=TO_DATE, **params):
+    session = BacktestSession(cash=cash)
+    session.add_strategy(PeriodicTrades, **params)
+    session.load_data(StaticLoader, start_date=FROM_DATE, end_date=todate, dirpath=dirpath, stock_names=STOCKS, workers=0)
+    return session.run_cached(cache), session
+
+
+class TestResultCache:
+
+    def test_hit_skips_run(self, tmpdir):
+        cache = ResultCache(str(tmpdir))
+        result, session = cached_run(cache)
+        assert session.strategies is not None
+        cached_result, cached_session = cached_run(cache)
+        assert cached_session.strategies is None, 'cerebro should not run on a cache hit'
+        assert cached_result.trades == result.trades and cached_result.equity.equals(result.equity)
+        assert cached_result.analyses == result.analyses
+
+    @pytest.mark.parametrize('change', [dict(cash=5000.0), dict(size=20), dict(todate=datetime(2017, 3, 31))])
+    def test_configuration_change_misses(self, tmpdir, change):
+        cache = ResultCache(str(tmpdir))
+        cached_run(cache)
+        _, session = cached_run(cache, **change)
+        assert session.strategies is not None
+
+    def test_data_change_misses(self, tmpdir):
+        for stock in STOCKS:
+            copy(os.path.join(DIRPATH, stock), str(tmpdir))
+        cache = ResultCache(str(tmpdir.join('results')))
+        cached_run(cache, dirpath=str(tmpdir))
+        with open(str(tmpdir.join(STOCKS[0])), 'a') as f:
+            f.write('2021-04-27,1.0,1.0,1.0,1.0,1.0,1.0\n')
+        _, session = cached_run(cache, dirpath=str(tmpdir))
+        assert session.strategies is not None
+
+    def test_key_covers_the_imported_modules(self):
+        modules = source_modules(SizedRsiEntries)
+        assert {'money_mgmt.sizers', 'strategies.conditions', 'custom_indicators.vectorized', SizedRsiEntries.__module__} <= set(modules)
+        assert not any(module.startswith('backtrader') for module in modules)
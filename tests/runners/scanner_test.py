@@ -0,0 +1,76 @@
+from tests.test_common import *
+import numpy as np
+from backtrader import talib
+from database.feed_cache import read_feed_csv
+from runners.scanner import scan, between
+from strategies import conditions
+
+FILES = dict(a='tests/test_data.csv', b='tests/test_data2.csv')
+
+
+class EntriesByBar(bt.Strategy):
+    '''
+    Evaluates the entry conditions on every bar, on the lines CandlePatternLong and ClassicBreakout prepare -
+    the dates of the hits of both patterns, by feed name.
+    '''
+    params = dict(atr_period=5, highs_period=10)
+
+    def __init__(self):
+        self.hits = {name: dict(candle=[], breakout=[]) for name in FILES}
+        for feed in self.datas:
+            feed.atr = talib.ATR(feed.high, feed.low, feed.close, timeperiod=self.p.atr_period)
+            feed.tr = talib.ATR(feed.high, feed.low, feed.close, timeperiod=1)
+            feed.doji_star = talib.CDLDOJISTAR(feed.open, feed.high, feed.low, feed.close)
+            feed.lowest = bt.ind.Lowest(feed.low, period=self.p.highs_period)
+            feed.highest = bt.ind.Highest(feed.high, period=self.p.highs_period)
+            feed.highest_breakout = feed.high > feed.highest(-1)
+            feed.volume_avg = bt.ind.SMA(feed.volume, period=self.p.highs_period)
+            feed.bulish_candle = talib.CDLMARUBOZU(feed.open, feed.high, feed.low, feed.close) > 0
+            feed.bulish_candle2 = talib.CDLCLOSINGMARUBOZU(feed.open, feed.high, feed.low, feed.close) > 0
+            for line in [feed.open, feed.high, feed.low, feed.close]:
+                line.extend(size=1)  # as CandlePatternLong does, for open[1] on the last bar
+        self.first_date = None
+
+    def next(self):
+        self.first_date = self.first_date or self.datetime.date(0)
+        for feed in self.datas:
+            if conditions.candle_pattern_entry(feed):
+                self.hits[feed._name]['candle'].append(feed.datetime.date(0))
+            if conditions.classic_breakout_entry(feed):
+                self.hits[feed._name]['breakout'].append(feed.datetime.date(0))
+
+
+def csv_feed(filepath, fromdate=None, todate=None):
+    return bt.feeds.GenericCSVData(dataname=filepath, fromdate=fromdate, todate=todate, dtformat='%Y-%m-%d', high=1, low=2, open=3, close=4, volume=5)
+
+
+def by_bar(params):
+    cerebro = bt.Cerebro()
+    for name, filepath in FILES.items():
+        cerebro.adddata(csv_feed(filepath), name=name)
+    cerebro.addstrategy(EntriesByBar, **params)
+    return cerebro.run()[0]
+
+
+class TestScanner:
+
+    @pytest.mark.parametrize('params', [dict(atr_period=5, highs_period=10), dict(atr_period=3, highs_period=20)])
+    def test_same_hits_as_the_strategies(self, params):
+        strategy = by_bar(params)
+        feeds = {name: read_feed_csv(filepath) for name, filepath in FILES.items()}
+        for key, pattern in [('candle', conditions.CANDLE_PATTERN_LONG), ('breakout', conditions.CLASSIC_BREAKOUT)]:
+            table = scan(feeds, pattern, params)
+            table = table[table['date'].dt.date >= strategy.first_date]  # the strategy starts after the warm up of all its indicators
+            expected = sorted((date, name) for name, hits in strategy.hits.items() for date in hits[key])
+            assert len(expected) > 0
+            assert list(zip(table['date'].dt.date, table['symbol'])) == expected
+
+    def test_between_has_the_bars_of_the_feed(self):
+        fromdate, todate = datetime(2016, 7, 1), datetime(2017, 6, 30)
+        cerebro = bt.Cerebro()
+        cerebro.adddata(csv_feed(FILES['a'], fromdate, todate))
+        cerebro.addstrategy(DummyStrategy)
+        feed = cerebro.run()[0].data
+        dates = [bt.num2date(value).date() for value in feed.datetime.array]
+        bars = between(read_feed_csv(FILES['a']), fromdate, todate)
+        assert [date.date() for date in pd.to_datetime(bars.dates)] == dates
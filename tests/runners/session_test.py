@@ -0,0 +1,30 @@
+from tests.test_common import *
+from concurrent.futures import ThreadPoolExecutor
+from database.data_loader import StaticLoader
+from runners.session import BacktestSession
+from tests.runners.sharded_test import DIRPATH, STOCKS, FROM_DATE, TO_DATE
+
+
+def run_session(stocks, cash=10000.0):
+    session = BacktestSession(cash=cash)
+    session.add_strategy(PeriodicTrades)
+    session.load_data(StaticLoader, start_date=FROM_DATE, end_date=TO_DATE, dirpath=DIRPATH, stock_names=stocks)
+    session.run()
+    return session
+
+
+class TestBacktestSession:
+
+    def test_sessions_are_isolated(self):
+        session1, session2 = run_session(STOCKS[:1]), run_session(STOCKS, cash=5000.0)
+        assert len(session1.cerebro.datas) == 1 and len(session2.cerebro.datas) == 2
+        assert {t.symbol for t in session1.result().trades} == {'test_data'}
+        assert session2.result().starting_cash == 5000.0 and session2.result().equity.iloc[0] == pytest.approx(5000.0)
+
+    def test_concurrent_sessions(self):
+        expected = run_session(STOCKS).result()
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            results = [session.result() for session in executor.map(lambda _: run_session(STOCKS), range(3))]
+        for result in results:
+            assert result.trades == expected.trades
+            assert result.equity.equals(expected.equity)
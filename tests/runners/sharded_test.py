@@ -0,0 +1,35 @@
+from tests.test_common import *
+import numpy as np
+from analyzers.basic_trade_stats import BasicTradeStats
+from runners.sharded import ShardedBacktest, split
+from runners.results import summarize, merge_results
+
+DIRPATH = os.path.abspath('tests')
+STOCKS = ['test_data.csv', 'test_data2.csv']
+FROM_DATE, TO_DATE = datetime(2016, 7, 1), datetime(2017, 6, 30)
+
+
+def sharded_backtest():
+    return ShardedBacktest(PeriodicTrades, FROM_DATE, TO_DATE, cash=10000.0, analyzers=[(BasicTradeStats, dict(_name='basic_trade_stats'))],
+                           reference_symbols=[], dirpath=DIRPATH)
+
+
+def single_run(cash=10000.0):
+    return sharded_backtest().run_shard(STOCKS, cash)
+
+
+class TestShardedBacktest:
+
+    @pytest.mark.parametrize('workers, per_symbol', [(1, False), (2, False), (2, True)])
+    def test_equals_single_run(self, workers, per_symbol):
+        expected = merge_results([single_run()])
+        result = sharded_backtest().run(STOCKS, workers=workers, per_symbol=per_symbol)
+        assert [(t.symbol, t.open_datetime, t.pnlcomm) for t in result.closed_trades] == [(t.symbol, t.open_datetime, t.pnlcomm) for t in expected.closed_trades]
+        assert np.allclose(result.equity.to_numpy(), expected.equity.to_numpy())
+        assert result.starting_cash == expected.starting_cash
+        assert summarize(result)['trades'] == summarize(expected)['trades']
+        assert len(result.analyses) == min(workers, 2) and all('basic_trade_stats' in analysis for analysis in result.analyses)
+
+    def test_split(self):
+        assert split(list('abcde'), 2) == [['a', 'c', 'e'], ['b', 'd']]
+        assert split(list('ab'), 4) == [['a'], ['b']]
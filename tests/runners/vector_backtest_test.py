@@ -0,0 +1,110 @@
+from tests.test_common import *
+import numpy as np
+from analyzers.equity_curve import EquityCurve
+from database.feed_cache import read_feed_csv
+from money_mgmt.sizers import PortionSizer
+from runners.results import extract_result, EQUITY_CURVE
+from runners.vector_backtest import VectorBacktest, Signals, pattern_signals
+from strategies import conditions
+
+FILES = dict(a='tests/test_data.csv', b='tests/test_data2.csv')
+
+
+class RsiAndSma(bt.Strategy):
+    ''' As RsiAndMovingAverageStrategy - which can't be run without the plotting dependencies of BaseStrategy '''
+    params = dict(rsi_period=10, sma_period=200)
+
+    def __init__(self):
+        for data in self.datas:
+            data.rsi = bt.ind.RSI(data, period=self.p.rsi_period)
+            data.sma = bt.ind.SMA(data, period=self.p.sma_period)
+        self.baropen = {}
+
+    def notify_trade(self, trade):
+        if trade.justopened:
+            self.baropen[trade.data] = trade.baropen
+
+    def next(self):
+        for data in self.datas:
+            if not self.getposition(data):
+                if conditions.rsi_and_sma_entry(data):
+                    self.buy(data)
+            elif conditions.rsi_and_sma_exit(data) or (len(self.data) - self.baropen[data]) > self.p.rsi_period:
+                self.close(data)
+
+
+class SmaCross(bt.SignalStrategy):
+    ''' samples/hello_bt_signals.py '''
+    params = dict(pfast=10, pslow=30)
+
+    def __init__(self):
+        sma1 = bt.ind.SMA(period=self.p.pfast)
+        sma2 = bt.ind.SMA(period=self.p.pslow)
+        self.signal_add(bt.SIGNAL_LONG, bt.ind.CrossOver(sma1, sma2))
+
+
+def event_run(strategy, files, cash, commission, percents, **params):
+    cerebro = bt.Cerebro()
+    for name, filepath in files.items():
+        cerebro.adddata(bt.feeds.GenericCSVData(dataname=filepath, dtformat='%Y-%m-%d', high=1, low=2, open=3, close=4, volume=5), name=name)
+    cerebro.addstrategy(strategy, **params)
+    cerebro.addsizer(PortionSizer, percents=percents)
+    cerebro.addanalyzer(EquityCurve, _name=EQUITY_CURVE)
+    cerebro.broker.setcash(cash)
+    cerebro.broker.setcommission(commission=commission)
+    return extract_result(cerebro.run()[0], cash)
+
+
+def vector_run(pattern, files, cash, commission, percents, max_bars=None, **params):
+    feeds, signals = pattern_signals({name: read_feed_csv(filepath) for name, filepath in files.items()}, pattern, params)
+    return VectorBacktest(cash, commission, percents, max_bars).run(feeds, signals)
+
+
+def trades_of(result):
+    return sorted((t.symbol, t.open_datetime, t.close_datetime, t.barlen, t.isclosed) for t in result.trades)
+
+
+def assert_same(result, expected):
+    assert len(result.trades) > 5
+    assert trades_of(result) == trades_of(expected)
+    by_open = lambda trades: [t.pnlcomm for t in sorted(trades, key=lambda t: (t.symbol, t.open_datetime))]
+    assert by_open(result.trades) == pytest.approx(by_open(expected.trades), rel=1e-9)
+    assert result.equity.index.equals(expected.equity.index)
+    assert np.allclose(result.equity, expected.equity, rtol=1e-12)
+
+
+class TestVectorBacktest:
+
+    @pytest.mark.parametrize('params', [dict(rsi_period=10, sma_period=200), dict(rsi_period=5, sma_period=50)])
+    def test_same_as_rsi_and_moving_average(self, params):
+        expected = event_run(RsiAndSma, FILES, 10000.0, 0.001, 10, **params)
+        result = vector_run(conditions.RSI_AND_SMA, FILES, 10000.0, 0.001, 10, max_bars=params['rsi_period'], **params)
+        assert_same(result, expected)
+
+    @pytest.mark.parametrize('params', [dict(pfast=10, pslow=30), dict(pfast=5, pslow=20)])
+    def test_same_as_sma_cross(self, params):
+        files = dict(a=FILES['a'])
+        expected = event_run(SmaCross, files, 10000.0, 0.002, 50, **params)
+        assert_same(vector_run(conditions.SMA_CROSS, files, 10000.0, 0.002, 50, **params), expected)
+
+    def test_fills_and_sizes(self):
+        bars = read_feed_csv(FILES['a']).slice(0, 10)
+        entries, exits = np.zeros(10, dtype=bool), np.zeros(10, dtype=bool)
+        entries[[2, 4, 9]], exits[[5, 9]] = True, True  # the entry of bar 4 is ignored, those of the last bar never filled
+        percents = np.full(10, 20.0)
+        result = VectorBacktest(cash=1000.0, commission=0.01).run(dict(a=bars), dict(a=Signals(entries, exits, percents)))
+        [trade] = result.trades
+        size = 1000.0 * 0.2 / bars['close'][2]
+        assert (trade.price, trade.barlen, trade.isclosed, trade.size) == (bars['open'][3], 3, True, 0.0)
+        assert trade.pnl == pytest.approx(size * (bars['open'][6] - bars['open'][3]))
+        assert trade.pnlcomm == pytest.approx(trade.pnl - size * (bars['open'][3] + bars['open'][6]) * 0.01)
+        assert result.final_value == pytest.approx(1000.0 + trade.pnlcomm)
+        assert result.equity.iloc[3] == pytest.approx(1000.0 - size * bars['open'][3] * 1.01 + size * bars['close'][3])
+
+    def test_rejects_entries_without_cash(self):
+        bars = read_feed_csv(FILES['a']).slice(0, 10)
+        entries = np.zeros(10, dtype=bool)
+        entries[1] = True
+        result = VectorBacktest(cash=1000.0, percents=150).run(dict(a=bars), dict(a=Signals(entries, np.zeros(10, dtype=bool))))
+        assert result.trades == [] and result.final_value == 1000.0
+        assert result.analyses == [dict(vectorbacktest=dict(rejected=1))]
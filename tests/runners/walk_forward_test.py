@@ -0,0 +1,57 @@
+from tests.test_common import *
+import numpy as np
+from runners.optimizer import ParameterSweep, grid
+from runners.walk_forward import WalkForward, Window, rolling_windows
+
+DIRPATH = os.path.abspath('tests')
+STOCKS = ['test_data.csv', 'test_data2.csv']
+FROM_DATE, TO_DATE = datetime(2016, 7, 1), datetime(2017, 7, 1)
+COMBINATIONS = grid(size=[5, 10], period=[15, 20])
+
+
+@pytest.fixture(scope='module')
+def walk_forward(tmp_path_factory):
+    cache_dir = str(tmp_path_factory.mktemp('cache'))
+    return WalkForward(PeriodicTrades, FROM_DATE, TO_DATE, train_months=4, test_months=3, dirpath=DIRPATH, cache_dir=cache_dir).load(STOCKS)
+
+
+@pytest.fixture(scope='module', params=[1, 2])
+def result(walk_forward, request):
+    return walk_forward.run(COMBINATIONS, workers=request.param)
+
+
+class TestRollingWindows:
+
+    def test_rolling(self):
+        windows = rolling_windows(datetime(2016, 1, 1), datetime(2016, 12, 15), train_months=6, test_months=4)
+        assert windows == [Window(datetime(2016, 1, 1), datetime(2016, 7, 1), datetime(2016, 7, 1), datetime(2016, 11, 1)),
+                           Window(datetime(2016, 5, 1), datetime(2016, 11, 1), datetime(2016, 11, 1), datetime(2016, 12, 15))]
+
+    def test_anchored(self):
+        windows = rolling_windows(datetime(2016, 1, 1), datetime(2017, 1, 1), train_months=6, test_months=3, anchored=True)
+        assert [window.train_start for window in windows] == [datetime(2016, 1, 1)] * 2
+        assert [window.test_start for window in windows] == [datetime(2016, 7, 1), datetime(2016, 10, 1)]
+
+
+class TestWalkForward:
+
+    def test_chooses_best_in_sample(self, walk_forward, result):
+        assert len(result.windows) == 3 and len(result.train) == 3 * len(COMBINATIONS)
+        for window, params in zip(result.windows, result.params):
+            sweep = ParameterSweep(PeriodicTrades, window.train_start, window.train_end, dirpath=DIRPATH, cache_dir=walk_forward.sweep.cache_dir).load(STOCKS)
+            table = sweep.table(COMBINATIONS, workers=1)
+            assert params == COMBINATIONS[int(table['return_percent'].idxmax())]
+
+    def test_out_of_sample_runs(self, walk_forward, result):
+        for window, params, test in zip(result.windows, result.params, result.tests):
+            expected = walk_forward.sweep.backtest(params, window.test_start, window.test_end)
+            assert test.equity.equals(expected.equity)
+            assert test.equity.index.min() >= window.test_start and test.equity.index.max() < window.test_end
+
+    def test_chains_equity(self, result):
+        equity = result.out_of_sample.equity
+        assert equity.index.is_monotonic_increasing and equity.index.is_unique
+        total = np.prod([test.final_value / test.starting_cash for test in result.tests])
+        assert result.out_of_sample.final_value == pytest.approx(10000.0 * total)
+        assert len(result.out_of_sample.trades) == sum(len(test.trades) for test in result.tests)
+        assert len(result.summary()) == 3
@@ -0,0 +1,66 @@
+from tests.test_common import *
+import itertools
+from strategies.trade_book import TradeBook
+from utils import backtrader_helpers as bh
+
+
+class Booked(bt.Strategy):
+    ''' Opens a position every 20 bars (reversing it every 60 bars) and closes it 10 bars later, checking the book on every bar '''
+
+    def __init__(self):
+        self.trade_book = TradeBook(self)
+
+    def next(self):
+        for data in self.datas:
+            open_trades = [t for t in itertools.chain(*self._trades[data].values()) if t.isopen]
+            assert self.trade_book.opened(data) is (open_trades[0] if open_trades else None)
+            if len(self) % 60 == 0 and self.getposition(data):
+                self.sell(data, size=2 * self.getposition(data).size)
+            elif len(self) % 20 == 0:
+                self.buy(data, size=10)
+            elif len(self) % 20 == 10:
+                self.close(data)
+
+    def notify_trade(self, trade):
+        self.trade_book.notify(trade)
+
+
+@pytest.fixture(scope='module')
+def strategy():
+    cerebro = bt.Cerebro()
+    for name in ['test_data', 'test_data2']:
+        cerebro.adddata(bt.feeds.GenericCSVData(dataname=f'tests/{name}.csv', fromdate=datetime(2016, 7, 1), todate=datetime(2017, 6, 30),
+                                                dtformat='%Y-%m-%d', high=1, low=2, open=3, close=4, volume=5), name=name)
+    cerebro.addstrategy(Booked)
+    return cerebro.run()[0]
+
+
+class TestTradeBook:
+
+    def test_holds_the_trades_of_the_strategy(self, strategy):
+        book = strategy.trade_book
+        for data in strategy.datas:
+            expected = [trade for trades in strategy._trades[data].values() for trade in trades]
+            assert book.trades[data] == expected and len(expected) > 5
+        assert sorted(book.all, key=id) == sorted((trade for trades in book.trades.values() for trade in trades), key=id)
+        assert book.closed == sorted(book.closed, key=lambda trade: trade.dtclose)
+        assert {id(trade) for trade in book.closed} == {id(trade) for trade in book.all if trade.isclosed}
+
+    def test_extract_trades(self, strategy):
+        assert bh.extract_trades(strategy) is strategy.trade_book.trades
+        assert bh.extract_trades_list(strategy) is strategy.trade_book.all
+
+    def test_more_than_one_open_trade(self, strategy):
+        book = TradeBook(strategy)
+        book.open_trades['feed'] = {1: 'trade', 2: 'other trade'}
+        with pytest.raises(Exception):
+            book.opened('feed')
+
+    def test_no_open_trade(self, strategy):
+        book = TradeBook(strategy)
+        data = strategy.datas[0]
+        assert book.opened(data) is None
+        with pytest.raises(Exception, match='No open position'):
+            book.open_trade(data)
+        book.open_trades[data] = {1: 'trade'}
+        assert book.open_trade(data) == 'trade'
@@ -0,0 +1,124 @@
+from tests.test_common import *
+import math
+from strategies.trigger_index import ActiveSet, StateScheduler, TriggerIndex, WakeUp
+
+
+class Breakouts(bt.Strategy):
+    ''' Visits the stocks the way BaseStrategy does - buys 20 bars breakouts, closes them 5 bars later '''
+    params = dict(active_set=False)
+
+    def __init__(self):
+        for stock in self.datas:
+            stock.trigger = stock.close > bt.ind.Highest(stock.high(-1), period=20)
+        self.active = ActiveSet(self.datas, [stock.trigger for stock in self.datas])
+        self.visited = []
+
+    def next(self):
+        for stock in self.active.active(self.datetime[0]) if self.p.active_set else self.datas:
+            if not self.getposition(stock):
+                if stock.trigger[0]:
+                    self.buy(stock, size=10)
+                    self.visited.append((len(self), stock._name))
+            elif len(self) - self.opened[stock] >= 5:
+                self.close(stock)
+
+    def notify_order(self, order):
+        self.active.track(order, self.getposition(order.data).size)
+
+    def notify_trade(self, trade):
+        self.opened = getattr(self, 'opened', {})
+        self.opened[trade.data] = len(self)
+
+
+def run(active_set, runonce=True):
+    cerebro = bt.Cerebro(runonce=runonce)
+    for name in ['test_data', 'test_data2']:
+        cerebro.adddata(bt.feeds.GenericCSVData(dataname=f'tests/{name}.csv', fromdate=datetime(2016, 7, 1), todate=datetime(2017, 6, 30),
+                                                dtformat='%Y-%m-%d', high=1, low=2, open=3, close=4, volume=5), name=name)
+    cerebro.addstrategy(Breakouts, active_set=active_set)
+    return cerebro.run()[0]
+
+
+def trades_of(strategy):
+    return [(data._name, trade.open_datetime(), trade.pnl) for data, trades in strategy._trades.items() for trade in trades[0]]
+
+
+class TestActiveSet:
+
+    @pytest.mark.parametrize('runonce', [True, False])
+    def test_same_trades_as_visiting_all(self, runonce):
+        everything, active = run(False, runonce), run(True, runonce)
+        assert trades_of(active) == trades_of(everything) and len(trades_of(active)) > 5
+        assert active.visited == everything.visited
+        assert active.active.visits < len(active) * len(active.datas) / 2
+
+    def test_index_of_precomputed_lines(self):
+        strategy = run(False)
+        bars = TriggerIndex(strategy.datas, [stock.trigger for stock in strategy.datas])._build()
+        for i, stock in enumerate(strategy.datas):
+            datetimes, values = stock.datetime.array, stock.trigger.lines[0].array
+            expected = [dt for dt, value in zip(datetimes, values) if value and not math.isnan(value)]
+            assert expected and [dt for dt in datetimes if i in bars.get(dt, [])] == expected
+
+
+class Waiting(bt.Strategy):
+    ''' A state machine per feed as of TradeStateStrategy - waits for a breakout, then holds the position for 5 bars '''
+    params = dict(event_driven=True)
+
+    class Flat:
+        wake_up = WakeUp(line='breakout')
+
+        def next(self, strategy, feed):
+            strategy.visited.append((len(strategy), feed._name, 'flat'))
+            if feed.breakout[0]:
+                strategy.buy(feed, size=10)
+
+    class Holding:
+        wake_up = WakeUp(bars=5)
+
+        def next(self, strategy, feed):
+            strategy.visited.append((len(strategy), feed._name, 'holding'))
+            if len(strategy) - feed.entered >= 5:
+                strategy.close(feed)
+
+    def __init__(self):
+        self.scheduler = StateScheduler(self.datas)
+        self.visited = []
+        for feed in self.datas:
+            feed.breakout = feed.close > bt.ind.Highest(feed.high(-1), period=20)
+            self.change_state(feed, self.Flat())
+
+    def change_state(self, feed, state):
+        feed.state = state
+        feed.entered = len(self)
+        self.scheduler.schedule(feed, state.wake_up if self.p.event_driven else None, len(self))
+        self.scheduler.wake(feed)
+
+    def next(self):
+        for feed in self.scheduler.due(self.datetime[0], len(self)):
+            feed.state.next(self, feed)
+
+    def notify_order(self, order):
+        self.scheduler.wake(order.data)
+        if order.status == order.Completed:
+            self.change_state(order.data, self.Holding() if self.getposition(order.data) else self.Flat())
+
+
+def run_states(event_driven, runonce=True):
+    cerebro = bt.Cerebro(runonce=runonce)
+    for name in ['test_data', 'test_data2']:
+        cerebro.adddata(bt.feeds.GenericCSVData(dataname=f'tests/{name}.csv', fromdate=datetime(2016, 7, 1), todate=datetime(2017, 6, 30),
+                                                dtformat='%Y-%m-%d', high=1, low=2, open=3, close=4, volume=5), name=name)
+    cerebro.addstrategy(Waiting, event_driven=event_driven)
+    return cerebro.run()[0]
+
+
+class TestStateScheduler:
+
+    @pytest.mark.parametrize('runonce', [True, False])
+    def test_same_trades_as_visiting_all(self, runonce):
+        everything, waiting = run_states(False, runonce), run_states(True, runonce)
+        assert trades_of(waiting) == trades_of(everything) and len(trades_of(waiting)) > 5
+        assert waiting.scheduler.visits < len(waiting) * len(waiting.datas) / 2
+        holding = [(bar, name) for bar, name, state in waiting.visited if state == 'holding']
+        assert holding and set(holding) < {(bar, name) for bar, name, state in everything.visited if state == 'holding'}
@@ -12,6 +12,17 @@ class DummyStrategy(bt.Strategy):
     def next(self):
         pass
 
+class PeriodicTrades(bt.Strategy):
+    ''' Trades every feed independently - opens a position of `size` every `period` bars and closes it `hold` bars later '''
+    params = dict(size=10, period=20, hold=10)
+
+    def next(self):
+        for data in self.datas:
+            if len(self) % self.p.period == 0:
+                self.buy(data, size=self.p.size)
+            elif len(self) % self.p.period == self.p.hold:
+                self.close(data)
+
 DUMMY_DATA = PandasData(dataname=pd.DataFrame(data=1, columns=PandasData.datafields, index=pd.date_range('20210816', periods=10)))
 
 TEST_DATA0 = bt.feeds.GenericCSVData(dataname='tests/test_data.csv', fromdate=datetime(2016, 7, 1), todate=datetime(2017,6,30), dtformat='%Y-%m-%d', high=1, low=2, open=3, close=4, volume=5)
@@ -38,4 +49,23 @@ def run_strategy(strategy, datas=[TEST_DATA0, TEST_DATA1]):
         cerebro.adddata(d)
     cerebro.addstrategy(strategy)
     strategy = cerebro.run()
-    return strategy[0]
\ No newline at end of file
+    return strategy[0]
+
+
+def new_feed(filename='test_data.csv'):
+    ''' A fresh feed of a test data file, between the dates of TEST_DATA0 - a feed can be run by a single cerebro only '''
+    return bt.feeds.GenericCSVData(dataname=f'tests/{filename}', fromdate=datetime(2016, 7, 1), todate=datetime(2017, 6, 30), dtformat='%Y-%m-%d', high=1, low=2, open=3, close=4, volume=5)
+
+
+def run_on_test_data(*strategies, feeds=('test_data.csv',), **cerebro_kwargs) -> list[bt.Strategy]:
+    '''
+    Runs the strategies - classes or (class, params) pairs - on new feeds of the test data files (see new_feed), given as
+    a list of file names or a dict of feed name to file name. cerebro_kwargs are params of the Cerebro (e.g. runonce).
+    '''
+    cerebro = bt.Cerebro(**cerebro_kwargs)
+    for name, filename in (feeds.items() if isinstance(feeds, dict) else zip([None] * len(feeds), feeds)):
+        cerebro.adddata(new_feed(filename), name=name)
+    for strategy in strategies:
+        strategy, params = strategy if isinstance(strategy, tuple) else (strategy, {})
+        cerebro.addstrategy(strategy, **params)
+    return cerebro.run()
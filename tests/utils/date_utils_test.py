@@ -0,0 +1,19 @@
+from tests.test_common import *
+from zoneinfo import ZoneInfo
+import numpy as np
+from backtrader import num2date
+from utils.date_utils import num2datetime64
+
+
+class TestNum2Datetime64:
+
+    @pytest.mark.parametrize('tz', [None, ZoneInfo('US/Eastern'), ZoneInfo('Asia/Jerusalem')])
+    def test_equals_num2date(self, tz):
+        rng = np.random.default_rng(0)
+        days = np.arange(730000, 730500, dtype=np.float64)
+        nums = np.concatenate([rng.uniform(700000, 740000, 5000), days + 0.99999988426, days + 1e-12, days + 0.5])
+        assert num2datetime64(nums, tz).tolist() == [num2date(num, tz) for num in nums]
+
+    def test_nan_to_nat(self):
+        dates = num2datetime64([737000.5, float('nan')])
+        assert dates[0] == np.datetime64('2018-11-02T12:00:00') and np.isnat(dates[1])
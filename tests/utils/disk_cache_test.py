@@ -0,0 +1,29 @@
+from tests.test_common import *
+import time
+from utils.disk_cache import DiskLRU
+
+
+class TestDiskLRU:
+
+    def test_put_and_get(self, tmpdir):
+        cache = DiskLRU(str(tmpdir))
+        assert cache.get('a') is None
+        cache.put('a', {'value': [1, 2]})
+        assert 'a' in cache and cache.get('a') == {'value': [1, 2]}
+
+    def test_evicts_least_recently_used(self, tmpdir):
+        cache = DiskLRU(str(tmpdir), max_bytes=2500)
+        for key in ['a', 'b']:
+            cache.put(key, b'x' * 1000)
+            time.sleep(0.01)
+        cache.get('a')  # 'b' is now the least recently used
+        time.sleep(0.01)
+        cache.put('c', b'x' * 1000)
+        assert 'a' in cache and 'c' in cache and 'b' not in cache
+        assert cache.size() <= 2500
+
+    def test_unreadable_entry_dropped(self, tmpdir):
+        cache = DiskLRU(str(tmpdir))
+        with open(str(tmpdir.join('a' + DiskLRU.SUFFIX)), 'wb') as f:
+            f.write(b'not a pickle')
+        assert cache.get('a') is None and 'a' not in cache
@@ -3,13 +3,17 @@ import backtrader as bt
 from backtrader.analyzers.tradeanalyzer import TradeAnalyzer
 from backtrader.utils.dateintern import num2date
 from charts import charts, translate
+from utils.date_utils import num2datetime64
 import pandas
 from backtrader import num2date
 
 def extract_trades(strategy: bt.Strategy) -> dict[bt.DataBase, list[bt.Trade]]:
     '''
-    returns a dictionary of data feed to its trades (by stripping the order_id from strategy._trades)
+    returns a dictionary of data feed to its trades - those of the strategy's trade_book (see TradeBook) when it has one,
+    otherwise by stripping the order_id from strategy._trades
     '''
+    if hasattr(strategy, 'trade_book'):
+        return strategy.trade_book.trades
     trades = strategy._trades # trades is in the form of dict[feed, dict[order_id, trade]]
     all_trades = dict()
     for feed in trades.keys():
@@ -18,19 +22,20 @@ def extract_trades(strategy: bt.Strategy) -> dict[bt.DataBase, list[bt.Trade]]:
     return all_trades
 
 def extract_trades_list(strategy: bt.Strategy) -> list[bt.Trade]:
+    if hasattr(strategy, 'trade_book'):
+        return strategy.trade_book.all
     return [trade for trades in extract_trades(strategy).values() for trade in trades] 
 
 def extract_line_data(line : bt.linebuffer.LineBuffer) -> list[float]:
     values = line.getzero(size=len(line))
     return values if line.useislice else list(values)
 
-def extract_line_data_datetime(datetime_line: bt.linebuffer.LineBuffer) -> list[datetime]:
+def extract_line_data_datetime(datetime_line: bt.linebuffer.LineBuffer, tz=None) -> list[datetime]:
     """
-       Convert line buffer of dates of Matplotlib dates format to `~datetime.datetime` list.
+       Convert line buffer of dates of Matplotlib dates format to `~datetime.datetime` list (in tz, when given).
     """
     formatted_dates = extract_line_data(datetime_line)
-    datetime_dates = list(map(lambda fdate : num2date(fdate), formatted_dates))
-    return datetime_dates
+    return num2datetime64(formatted_dates, tz).tolist()
 
 def print_trades_length(trade_analyzer: TradeAnalyzer):
     trades_len = trade_analyzer.get_analysis().get('len')
@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+ORDINAL_OF_EPOCH = datetime(1970, 1, 1).toordinal()
+MICROSECONDS_PER_DAY = 24 * 60 * 60 * 1000000
+
+
+def num2datetime64(nums, tz=None) -> np.ndarray:
+    '''
+    Vectorized backtrader.num2date - converts float dates (days since 0001-01-01 plus one) to a naive datetime64[us] array,
+    in the tz when given (the float dates are UTC, as in num2date). NaN converts to NaT.
+    Rounds the microseconds exactly as num2date does, so the results are equal to its element by element.
+    '''
+    nums = np.asarray(nums, dtype=np.float64)
+    missing = np.isnan(nums)
+    nums = np.where(missing, ORDINAL_OF_EPOCH, nums)
+    days = np.floor(nums)
+    hours, remainder = np.divmod(24.0 * (nums - days), 1)
+    minutes, remainder = np.divmod(60.0 * remainder, 1)
+    seconds, remainder = np.divmod(60.0 * remainder, 1)
+    microseconds = (1e6 * remainder).astype(np.int64)
+    microseconds[microseconds < 10] = 0  # compensate for rounding errors
+    microseconds[microseconds > 999990] = 1000000
+    total = (days.astype(np.int64) - ORDINAL_OF_EPOCH) * MICROSECONDS_PER_DAY \
+        + ((hours * 60 + minutes) * 60 + seconds).astype(np.int64) * 1000000 + microseconds
+    dates = total.view('datetime64[us]')
+    if tz is not None:
+        dates = pd.DatetimeIndex(dates).tz_localize('UTC').tz_convert(tz).tz_localize(None).to_numpy().astype('datetime64[us]')
+    dates[missing] = np.datetime64('NaT')
+    return dates
@@ -0,0 +1,83 @@
+import os
+import pickle
+from typing import Any, Optional
+from database.file_utils import atomic_write
+from logger import *
+
+
+class DiskLRU():
+    '''
+    Pickled values in files named by their keys, bounded by the total size of the files - putting a value evicts the
+    least recently used entries (by mtime, which get() refreshes) until the cache fits in max_bytes again.
+    Safe for concurrent processes: files are written atomically and entries another process evicted are just misses.
+    '''
+
+    SUFFIX = '.pkl'
+
+    def __init__(self, cache_dir, max_bytes=1 << 30):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+            os.utime(path)  # mark as recently used
+            return value
+        except FileNotFoundError:
+            return None
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError) as e:
+            logwarning(f'dropping unreadable cache entry {path}: {e}')
+            self._remove(path)
+            return None
+
+    def put(self, key: str, value: Any, evict=True):
+        ''' evict=False defers the eviction to a later evict(), for putting many values at once '''
+        atomic_write(self._path(key), lambda f: pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL), mode='wb')
+        if evict:
+            self.evict()
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries[:-1]:  # the most recent entry is kept even if it's larger than max_bytes alone
+            if total <= self.max_bytes:
+                break
+            logdebug(f'evicting cache entry {path}')
+            self._remove(path)
+            total -= size
+
+    def clear(self):
+        for _, _, path in self._entries():
+            self._remove(path)
+
+    def _entries(self) -> list:
+        ''' (mtime, size, path) of the entries '''
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(DiskLRU.SUFFIX):
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, path))
+        return entries
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + DiskLRU.SUFFIX)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
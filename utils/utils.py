@@ -3,11 +3,11 @@ from logger import *
 import os
 
 
-def clean_previous_output():
+def clean_previous_output(output_dir=OUTPUT_DIR):
     '''
     DANGROUS - USE WITH CARE
     
-    Delete all the files inside {OUTPUT_DIR}
+    Delete all the files inside {output_dir}
     '''
     files_to_delete = ["html",]
     def clean_dir(path):
@@ -21,5 +21,5 @@ def clean_previous_output():
                     files_deleted += 1
         logdebug(f'{files_deleted} files were deleted in {path}')
 
-    if os.path.abspath(OUTPUT_DIR).endswith('backtester/output'):  ## hardcoded validation
-        clean_dir(OUTPUT_DIR)
\ No newline at end of file
+    if os.path.abspath(output_dir).endswith('backtester/output'):  ## hardcoded validation
+        clean_dir(output_dir)
\ No newline at end of file